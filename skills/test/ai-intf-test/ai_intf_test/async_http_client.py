@@ -0,0 +1,248 @@
+"""异步 HTTP 客户端模块：基于 asyncio + aiohttp 的高并发 submitValidate 请求
+
+复用 HttpClient 的 URL 构造、认证头和响应解析逻辑，仅替换网络层：
+- 通过 asyncio.Semaphore 限制在途请求数
+- 通过 aiohttp.TCPConnector 复用 HTTP keep-alive 连接
+- 重试语义与 HttpClient._send_with_retry 保持一致
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Optional, Tuple
+
+from .http_client import HttpClient
+from .models import TestInput, TestResult
+from .request_timing import create_trace_config
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHttpClient:
+    """submitValidate 接口异步客户端
+
+    用法：
+        async with AsyncHttpClient(http_client, max_in_flight=500) as client:
+            result = await client.execute(test_input)
+
+    登录流程注入到 http_client.session 的 Cookie / Authorization 头在每次请求时
+    读取，401 刷新会话后后续请求立即使用新凭据。
+    """
+
+    def __init__(
+        self,
+        http_client: HttpClient,
+        max_in_flight: int = 200,
+        pool_size: int = 100,
+        keepalive_timeout: float = 30.0,
+    ) -> None:
+        self._http_client = http_client
+        self._max_in_flight = max(1, max_in_flight)
+        self._pool_size = max(1, pool_size)
+        self._keepalive_timeout = keepalive_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session = None
+        self._aiohttp = None
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        """创建 aiohttp 会话（带连接池）"""
+        if self._session is not None:
+            return
+
+        try:
+            import aiohttp
+        except ImportError as e:
+            raise ImportError("异步模式需要安装 aiohttp: pip install aiohttp") from e
+
+        self._aiohttp = aiohttp
+        sync_session = self._http_client.session
+        connect_timeout, read_timeout = self._http_client.timeout
+
+        auth = None
+        if sync_session.auth is not None:
+            username, password = sync_session.auth.username, sync_session.auth.password
+            auth = aiohttp.BasicAuth(username, password)
+
+        connector = aiohttp.TCPConnector(
+            limit=self._pool_size,
+            keepalive_timeout=self._keepalive_timeout,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            auth=auth,
+            trace_configs=[create_trace_config(aiohttp)],
+            timeout=aiohttp.ClientTimeout(
+                total=None,
+                sock_connect=connect_timeout,
+                sock_read=read_timeout,
+            ),
+        )
+        self._semaphore = asyncio.Semaphore(self._max_in_flight)
+        logger.debug(
+            f"异步 HTTP 会话已创建 (max_in_flight={self._max_in_flight}, "
+            f"pool_size={self._pool_size})"
+        )
+
+    async def execute(self, test_input: TestInput) -> TestResult:
+        """异步执行单个 submitValidate 请求
+
+        在途请求数受 max_in_flight 限制；response_time_ms 从获得并发名额后开始计时，
+        不包含排队等待时间。相同 (claimId, itemId) 的请求经 response_cache 合并。
+        """
+        if self._session is None:
+            raise RuntimeError("AsyncHttpClient 未打开，请先调用 open() 或使用 async with")
+
+        cache = self._http_client.response_cache
+        if cache is None:
+            return await self._execute_uncached(test_input)
+        return await cache.get_or_execute_async(
+            (test_input.claim_id, test_input.item_id),
+            lambda: self._execute_uncached(test_input),
+        )
+
+    async def _execute_uncached(self, test_input: TestInput) -> TestResult:
+        client = self._http_client
+        result = client.new_result(test_input)
+        payload = client.build_payload(test_input)
+
+        async with self._semaphore:
+            start = time.time()
+            response = await self._send_with_retry(result.url, payload, result)
+            result.response_time_ms = int((time.time() - start) * 1000)
+
+        if response is None:
+            result.error = "所有重试均失败，未获得响应"
+            return result
+
+        status_code, content = response
+        client.fill_result(result, status_code, content)
+        return result
+
+    async def _send_with_retry(
+        self, url: str, payload: dict, result: Optional[TestResult] = None
+    ) -> Optional[Tuple[int, bytes]]:
+        """带重试机制的异步 POST 请求，语义同 HttpClient._send_with_retry
+
+        分阶段耗时通过 TraceConfig 采集；aiohttp 的 TLS 握手计入 connect_ms，
+        等待连接池空闲连接的时间计入 ttfb_ms。
+        """
+        retry_config = self._http_client.retry_config
+        max_retries = retry_config.max_retries
+        retry_status_codes = set(retry_config.retry_on_status_codes)
+        aiohttp = self._aiohttp
+
+        limiter = self._http_client.rate_limiter
+        controller = self._http_client.concurrency_controller
+        login_handler = self._http_client.login_handler
+        sync_session = self._http_client.session
+        refreshed = False
+        breaker = None
+        if self._http_client.circuit_breakers and result is not None:
+            breaker = self._http_client.circuit_breakers.get(result.service_type)
+
+        last_error = None
+
+        attempt = 0
+        while attempt < max_retries:
+            attempt += 1
+            generation = login_handler.generation if login_handler else 0
+            if breaker:
+                breaker.before_request()
+            if limiter:
+                await limiter.acquire_async()
+            if controller:
+                await controller.acquire_async()
+
+            response = None
+            headers_at = None
+            phases = {"connect_ms": 0.0}
+            start_time = time.time()
+            try:
+                async with self._session.post(
+                    url,
+                    json=payload,
+                    headers=dict(sync_session.headers),
+                    trace_request_ctx=phases,
+                ) as resp:
+                    headers_at = time.time()
+                    response = (resp.status, await resp.read())
+            except asyncio.TimeoutError as e:
+                last_error = f"请求超时: {e}"
+                logger.warning(f"请求超时 [{attempt}/{max_retries}]: {e}")
+            except aiohttp.ClientConnectionError as e:
+                last_error = f"连接失败: {e}"
+                logger.warning(f"连接失败 [{attempt}/{max_retries}]: {e}")
+            except aiohttp.ClientError as e:
+                last_error = f"请求异常: {e}"
+                logger.warning(f"请求异常 [{attempt}/{max_retries}]: {e}")
+            finally:
+                end_time = time.time()
+                elapsed_ms = int((end_time - start_time) * 1000)
+                status_code = response[0] if response is not None else None
+                if controller:
+                    controller.release(status_code, elapsed_ms)
+                if breaker:
+                    breaker.record(status_code)
+                connect_ms = int(phases["connect_ms"])
+                if headers_at is not None:
+                    ttfb_ms = max(0, int((headers_at - start_time) * 1000) - connect_ms)
+                    transfer_ms = int((end_time - headers_at) * 1000)
+                else:
+                    ttfb_ms, transfer_ms = 0, 0
+                if result is not None:
+                    result.add_attempt_timing(connect_ms, 0, ttfb_ms, transfer_ms)
+
+            if response is not None:
+                logger.debug(
+                    f"请求完成 [{attempt}/{max_retries}] {url} "
+                    f"status={status_code} elapsed={elapsed_ms}ms "
+                    f"(connect={connect_ms} ttfb={ttfb_ms} transfer={transfer_ms})"
+                )
+
+                # 会话过期：在线程中刷新一次（阻塞式登录不占用事件循环），成功后重发
+                if status_code == 401 and login_handler and not refreshed:
+                    refreshed = True
+                    if await asyncio.to_thread(login_handler.refresh, sync_session, generation):
+                        attempt -= 1
+                        continue
+
+                if status_code in retry_status_codes and attempt < max_retries:
+                    delay = self._http_client.retry_delay(attempt)
+                    logger.warning(
+                        f"HTTP {status_code}，{delay:.1f}秒后重试 "
+                        f"[{attempt}/{max_retries}]"
+                    )
+                    await self._backoff(delay, result)
+                    continue
+
+                return response
+
+            if attempt < max_retries:
+                delay = self._http_client.retry_delay(attempt)
+                logger.info(f"{delay:.1f}秒后重试...")
+                await self._backoff(delay, result)
+
+        logger.error(f"所有 {max_retries} 次重试均失败: {last_error}")
+        return None
+
+    @staticmethod
+    async def _backoff(seconds: float, result: Optional[TestResult]) -> None:
+        """重试前等待，并将等待时间计入 result.backoff_ms"""
+        await asyncio.sleep(seconds)
+        if result is not None:
+            result.backoff_ms += int(seconds * 1000)
+
+    async def close(self) -> None:
+        """关闭 aiohttp 会话"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            logger.debug("异步 HTTP 会话已关闭")
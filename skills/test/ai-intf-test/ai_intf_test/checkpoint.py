@@ -0,0 +1,110 @@
+"""断点续跑模块：将每条 TestResult 实时追加到 JSONL checkpoint 文件
+
+每完成一条测试即写入一行 JSON 并 flush，进程中途崩溃时已完成的结果不会丢失；
+配合 --resume 可跳过 checkpoint 中已有结果的 (claimId, itemId)：同一键出现多次时，
+只跳过 checkpoint 中已完成的次数，其余重复行仍会执行。
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Iterable, Iterator, Tuple
+
+from .models import TestResult
+
+logger = logging.getLogger(__name__)
+
+ResultKey = Tuple[int, str]
+
+
+def result_key(claim_id: int, item_id: str) -> ResultKey:
+    """checkpoint 中用于判重的键"""
+    return claim_id, item_id
+
+
+class CheckpointWriter:
+    """线程安全的 JSONL 追加写入器"""
+
+    def __init__(self, path: str, resume: bool = False) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._count = 0
+
+        output_dir = os.path.dirname(path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        # 续跑时追加，否则覆盖上一次的 checkpoint
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+        if resume and self._file.tell() > 0 and not _ends_with_newline(path):
+            # 上次崩溃可能留下半行，换行后再追加，避免与新记录粘连
+            self._file.write("\n")
+        logger.info(f"checkpoint 文件: {path} (resume={resume})")
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def count(self) -> int:
+        """本次运行写入的结果条数"""
+        return self._count
+
+    def append(self, result: TestResult) -> None:
+        """追加一条测试结果并立即 flush"""
+        line = json.dumps(result.to_dict(), ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self._count += 1
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def iter_checkpoint(path: str) -> Iterator[TestResult]:
+    """逐行读取 checkpoint 中的测试结果
+
+    进程崩溃时最后一行可能只写了一半，无法解析的行会被跳过。
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield TestResult.from_dict(json.loads(line))
+            except (ValueError, KeyError) as e:
+                logger.warning(f"checkpoint 第 {line_no} 行无法解析，已跳过: {e}")
+
+
+def load_completed_keys(path: str) -> Counter:
+    """读取 checkpoint 中已有结果的 (claimId, itemId) → 已完成次数"""
+    return Counter(result_key(r.claim_id, r.item_id) for r in iter_checkpoint(path))
+
+
+def skip_completed(inputs: Iterable, completed: Counter) -> Iterator:
+    """跳过已完成的测试输入：每个键只跳过 completed 中记录的次数
+
+    崩溃前重复行只完成了一部分时，剩余的重复行仍会执行，报告中不会缺行。
+    """
+    remaining = Counter(completed)
+    for test_input in inputs:
+        key = result_key(test_input.claim_id, test_input.item_id)
+        if remaining[key] > 0:
+            remaining[key] -= 1
+            continue
+        yield test_input
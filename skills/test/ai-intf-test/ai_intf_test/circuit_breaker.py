@@ -0,0 +1,157 @@
+"""熔断模块：按服务（eer / ptp / claim ...）隔离故障，避免对已宕机的服务持续重试
+
+每个服务一个 CircuitBreaker，状态机：
+- closed:    正常放行；连续失败（连接异常 / 超时 / 5xx）达到 failure_threshold 次后打开
+- open:      拒绝请求（抛出 CircuitOpenError），reset_timeout 秒后转为半开
+- half_open: 放行最多 half_open_max_calls 个探测请求；成功则关闭，失败则重新打开
+
+被拒绝的行由 TestPipeline 按 open_action 处理：fail_fast 直接记为异常，
+requeue 延后到熔断器半开时重新执行。
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from .config_loader import CircuitBreakerConfig
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """服务熔断中，请求未发送"""
+
+    def __init__(self, service: str, retry_after: float) -> None:
+        super().__init__(f"服务 {service} 熔断中，{retry_after:.1f}s 后半开重试")
+        self.service = service
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """单个服务的熔断器（线程安全，asyncio 下也可直接调用，不会阻塞）"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ) -> None:
+        self.name = name
+        self._failure_threshold = max(1, failure_threshold)
+        self._reset_timeout = reset_timeout
+        self._half_open_max_calls = max(1, half_open_max_calls)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        # 统计
+        self.open_count = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def before_request(self) -> None:
+        """发送请求前调用；熔断中抛出 CircuitOpenError
+
+        放行的请求必须随后调用一次 record(status_code) 报告结果。
+        """
+        with self._lock:
+            if self._state == OPEN:
+                remaining = self._opened_at + self._reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, remaining)
+                self._state = HALF_OPEN
+                self._probes = 0
+                logger.info(f"熔断器 [{self.name}] 半开，放行探测请求")
+
+            if self._state == HALF_OPEN:
+                if self._probes >= self._half_open_max_calls:
+                    self.rejected += 1
+                    # 探测请求尚未返回，稍后再试
+                    raise CircuitOpenError(self.name, min(1.0, self._reset_timeout))
+                self._probes += 1
+
+    def record(self, status_code: Optional[int]) -> None:
+        """报告请求结果：None（连接异常 / 超时）或 5xx 视为失败"""
+        failed = status_code is None or status_code >= 500
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if failed:
+                    self._open()
+                else:
+                    self._state = CLOSED
+                    self._failures = 0
+                    logger.info(f"熔断器 [{self.name}] 探测成功，恢复关闭")
+                return
+
+            if not failed:
+                self._failures = 0
+                return
+            self._failures += 1
+            if self._state == CLOSED and self._failures >= self._failure_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        """打开熔断（调用方持有锁）"""
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._failures = 0
+        self.open_count += 1
+        logger.warning(
+            f"熔断器 [{self.name}] 打开：连续失败达到阈值，{self._reset_timeout:g}s 内拒绝请求"
+        )
+
+
+class CircuitBreakerRegistry:
+    """按服务名懒创建熔断器"""
+
+    def __init__(self, config: CircuitBreakerConfig) -> None:
+        self._config = config
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def requeue(self) -> bool:
+        """熔断时是否延后重试（否则直接记为失败）"""
+        return self._config.open_action == "requeue"
+
+    def get(self, service: str) -> CircuitBreaker:
+        breaker = self._breakers.get(service)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(service)
+                if breaker is None:
+                    breaker = self._breakers[service] = CircuitBreaker(
+                        name=service,
+                        failure_threshold=self._config.failure_threshold,
+                        reset_timeout=self._config.reset_timeout,
+                        half_open_max_calls=self._config.half_open_max_calls,
+                    )
+        return breaker
+
+    def summary(self) -> Dict[str, Dict]:
+        """{服务名: {"state", "open_count", "rejected"}}，只包含打开过的熔断器"""
+        return {
+            name: {"state": b.state, "open_count": b.open_count, "rejected": b.rejected}
+            for name, b in sorted(self._breakers.items())
+            if b.open_count
+        }
+
+
+def create_circuit_breakers(config: CircuitBreakerConfig) -> Optional[CircuitBreakerRegistry]:
+    """根据配置创建熔断器注册表，未启用时返回 None"""
+    if not config.enabled:
+        return None
+    return CircuitBreakerRegistry(config)
@@ -3,7 +3,7 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import yaml
 
@@ -21,6 +21,10 @@ class LoginConfig:
     url: str = ""
     usernum: str = ""
     password: str = ""
+    # 登录会话缓存文件（跨运行复用 Cookie / Token，文件权限 0600），为空（默认）则每次运行都重新登录
+    cache_path: str = ""
+    # 缓存有效期（秒），0 表示不缓存
+    cache_ttl_seconds: int = 1800
 
 
 @dataclass
@@ -50,6 +54,20 @@ class ExcelConfig:
 class OutputConfig:
     output_path: str = "./output/test_result_{timestamp}.xlsx"
     output_dir: str = "./output"
+    # 断点续跑 checkpoint（JSONL，每完成一条追加一行），为空（默认）则不记录；
+    # 未指定 --resume 的运行会覆盖该文件
+    checkpoint_path: str = ""
+    # 是否跳过 checkpoint 中已有结果的 (claimId, itemId)（由 --resume 开启）
+    resume: bool = False
+    # 原始响应体保留策略: all / failed / spill / none
+    keep_raw_response: str = "failed"
+    # spill 模式下 FAIL/ERROR 行原始响应的落盘目录
+    raw_response_dir: str = "./output/raw"
+    # 运行结果存储目录（每次运行保存一份 run_<时间戳>.jsonl.gz，供 diff 对比，不会自动清理），
+    # 为空（默认）则不保存
+    result_store_dir: str = ""
+    # 报告明细写出方式: styled（边框 + 按结论着色）/ plain（不设样式）/ csv（明细写 .csv，最快）
+    report_style: str = "styled"
 
 
 @dataclass
@@ -69,6 +87,18 @@ class RoutingConfig:
     """itemId 到 service_path 的路由配置"""
     default_service_path: str = ""
     rules: Dict[str, RoutingRuleConfig] = field(default_factory=dict)
+    # 预编译的路由索引（首次解析时构建），修改 rules 后需调用 invalidate_index()
+    _index: Optional["_RoutingIndex"] = field(default=None, init=False, repr=False, compare=False)
+
+    def resolve(self, item_id: str) -> Tuple[str, str]:
+        """根据 itemId 解析 (service_path, 服务名称)
+
+        匹配逻辑：按规则与列表顺序，itemId 包含规则中的子串则命中；
+        未命中返回 (default_service_path, "unknown")。
+        """
+        if self._index is None:
+            self._index = _RoutingIndex(self)
+        return self._index.lookup(item_id)
 
     def resolve_service_path(self, item_id: str) -> str:
         """根据 itemId 解析对应的 service_path
@@ -81,35 +111,134 @@ class RoutingConfig:
         Returns:
             对应的 service_path（如 /eer、/ptp）
         """
-        upper_id = item_id.strip().upper()
-        for rule_name, rule in self.rules.items():
-            for pattern in rule.items:
-                if pattern.upper() in upper_id:
-                    return rule.service_path
-        return self.default_service_path
+        return self.resolve(item_id)[0]
 
     def resolve_service_name(self, item_id: str) -> str:
         """根据 itemId 解析服务名称（如 eer、ptp、claim）"""
-        upper_id = item_id.strip().upper()
-        for rule_name, rule in self.rules.items():
+        return self.resolve(item_id)[1]
+
+    def invalidate_index(self) -> None:
+        """丢弃预编译索引（rules 变更后调用）"""
+        self._index = None
+
+
+class _RoutingIndex:
+    """路由规则的预编译索引
+
+    - exact: 模式串 → 路由结果。itemId 通常与某个模式串完全相同（如 T001），
+      编译时已按规则优先级计算出该串实际命中的路由，查表即可
+    - cache: itemId → 路由结果的记忆化缓存，同一 itemId 只做一次子串扫描
+    """
+
+    _MAX_CACHE_SIZE = 10000
+
+    def __init__(self, config: RoutingConfig) -> None:
+        self._default = (config.default_service_path, "unknown")
+        patterns: List[Tuple[str, Tuple[str, str]]] = []
+        seen = set()
+        for rule_name, rule in config.rules.items():
             for pattern in rule.items:
-                if pattern.upper() in upper_id:
-                    return rule_name
-        return "unknown"
+                upper = str(pattern).upper()
+                if upper not in seen:
+                    seen.add(upper)
+                    patterns.append((upper, (rule.service_path, rule_name)))
+        self._patterns = patterns
+        self._exact = {upper: self._scan(upper) for upper, _ in patterns}
+        self._cache: Dict[str, Tuple[str, str]] = {}
+
+    def _scan(self, upper_id: str) -> Tuple[str, str]:
+        for pattern, route in self._patterns:
+            if pattern in upper_id:
+                return route
+        return self._default
+
+    def lookup(self, item_id: str) -> Tuple[str, str]:
+        route = self._cache.get(item_id)
+        if route is not None:
+            return route
+
+        upper_id = item_id.strip().upper()
+        route = self._exact.get(upper_id)
+        if route is None:
+            route = self._scan(upper_id)
+
+        if len(self._cache) >= self._MAX_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[item_id] = route
+        return route
 
 
 @dataclass
 class ConcurrencyConfig:
     enabled: bool = False
+    mode: str = "thread"  # thread / async
     max_workers: int = 3
     request_interval: float = 0.5
+    # async 模式参数
+    max_in_flight: int = 200
+    pool_size: int = 100
+    keepalive_timeout: float = 30.0
+    # 共享令牌桶限速（req/s），0 表示不限速
+    rate_limit: float = 0.0
+    burst: int = 0
+    # 自适应并发：按延迟与背压状态码在 [min_workers, 并发上限] 间动态调整
+    adaptive: bool = False
+    min_workers: int = 1
+    latency_target_ms: int = 0
+    # 分片进程数：>1 时将输入按行拆分到多个子进程执行（每个进程独立登录与连接池）
+    processes: int = 1
 
 
 @dataclass
 class RetryConfig:
     max_retries: int = 3
     retry_interval: float = 2.0
-    retry_on_status_codes: List[int] = field(default_factory=lambda: [500, 502, 503, 504])
+    retry_on_status_codes: List[int] = field(default_factory=lambda: [429, 500, 502, 503, 504])
+    # 退避策略: fixed（固定 retry_interval）/ exponential（retry_interval × 2^(n-1)，上限 max_retry_interval）
+    backoff: str = "exponential"
+    max_retry_interval: float = 30.0
+    # 是否在退避时间上加随机抖动（取 [d/2, d]），避免并发 worker 同时重试
+    jitter: bool = True
+
+
+@dataclass
+class CircuitBreakerConfig:
+    """按服务熔断配置"""
+    enabled: bool = False
+    # 连续失败（连接异常 / 超时 / 5xx）多少次后打开熔断
+    failure_threshold: int = 5
+    # 打开后多少秒转为半开
+    reset_timeout: float = 30.0
+    # 半开状态允许同时放行的探测请求数
+    half_open_max_calls: int = 1
+    # 熔断中的行: fail_fast（直接记为异常）/ requeue（延后到半开时重新执行）
+    open_action: str = "requeue"
+
+
+@dataclass
+class ResponseCacheConfig:
+    """重复 (claimId, itemId) 请求的合并与缓存配置"""
+    # 在途合并：相同键的请求未返回时，后续请求等待并共享其结果
+    coalesce: bool = True
+    # 响应缓存有效期（秒），0 表示不缓存已返回的结果
+    ttl_seconds: float = 0.0
+    max_entries: int = 100000
+
+
+@dataclass
+class LoadConfig:
+    """压测（开环）配置"""
+    enabled: bool = False
+    # 恒定目标速率（req/s）与持续时间（秒），profile 非空时忽略
+    rate: float = 10.0
+    duration: int = 60
+    # 负载曲线，如 "10-200:120,200:600"（爬坡 2 分钟后保持 10 分钟）
+    profile: str = ""
+    # 统计窗口（秒）
+    window_seconds: int = 10
+    # 最大在途请求数（压测线程数）
+    max_in_flight: int = 200
+    output_path: str = "./output/loadtest_{timestamp}.json"
 
 
 @dataclass
@@ -130,6 +259,9 @@ class AppConfig:
     routing: RoutingConfig = field(default_factory=RoutingConfig)
     concurrency: ConcurrencyConfig = field(default_factory=ConcurrencyConfig)
     retry: RetryConfig = field(default_factory=RetryConfig)
+    circuit_breaker: CircuitBreakerConfig = field(default_factory=CircuitBreakerConfig)
+    response_cache: ResponseCacheConfig = field(default_factory=ResponseCacheConfig)
+    load: LoadConfig = field(default_factory=LoadConfig)
     log: LogConfig = field(default_factory=LogConfig)
 
 
@@ -149,6 +281,8 @@ def _build_login_config(data: dict) -> LoginConfig:
         url=lg.get("url", "") or "",
         usernum=lg.get("usernum", "") or "",
         password=lg.get("password", "") or "",
+        cache_path=lg.get("cache_path") or "",
+        cache_ttl_seconds=int(lg.get("cache_ttl_seconds", 1800) or 0),
     )
 
 
@@ -180,9 +314,18 @@ def _build_excel_config(data: dict) -> ExcelConfig:
 
 def _build_output_config(data: dict) -> OutputConfig:
     o = data.get("output", {})
+    report_style = str(o.get("report_style", "styled")).lower()
+    if report_style not in ("styled", "plain", "csv"):
+        raise ValueError(f"output.report_style 仅支持 styled / plain / csv: {report_style}")
     return OutputConfig(
         output_path=o.get("output_path", "./output/test_result_{timestamp}.xlsx"),
         output_dir=o.get("output_dir", "./output"),
+        checkpoint_path=o.get("checkpoint_path") or "",
+        resume=bool(o.get("resume", False)),
+        keep_raw_response=str(o.get("keep_raw_response", "failed")).lower(),
+        raw_response_dir=o.get("raw_response_dir", "./output/raw"),
+        result_store_dir=o.get("result_store_dir") or "",
+        report_style=report_style,
     )
 
 
@@ -211,10 +354,23 @@ def _build_routing_config(data: dict) -> RoutingConfig:
 
 def _build_concurrency_config(data: dict) -> ConcurrencyConfig:
     c = data.get("concurrency", {})
+    mode = str(c.get("mode", "thread")).lower()
+    if mode not in ("thread", "async"):
+        raise ValueError(f"concurrency.mode 仅支持 thread / async: {mode}")
     return ConcurrencyConfig(
         enabled=bool(c.get("enabled", False)),
+        mode=mode,
         max_workers=int(c.get("max_workers", 3)),
         request_interval=float(c.get("request_interval", 0.5)),
+        max_in_flight=int(c.get("max_in_flight", 200)),
+        pool_size=int(c.get("pool_size", 100)),
+        keepalive_timeout=float(c.get("keepalive_timeout", 30.0)),
+        rate_limit=float(c.get("rate_limit", 0) or 0),
+        burst=int(c.get("burst", 0) or 0),
+        adaptive=bool(c.get("adaptive", False)),
+        min_workers=int(c.get("min_workers", 1)),
+        latency_target_ms=int(c.get("latency_target_ms", 0) or 0),
+        processes=max(1, int(c.get("processes", 1) or 1)),
     )
 
 
@@ -223,7 +379,46 @@ def _build_retry_config(data: dict) -> RetryConfig:
     return RetryConfig(
         max_retries=int(r.get("max_retries", 3)),
         retry_interval=float(r.get("retry_interval", 2.0)),
-        retry_on_status_codes=r.get("retry_on_status_codes", [500, 502, 503, 504]),
+        retry_on_status_codes=r.get("retry_on_status_codes", [429, 500, 502, 503, 504]),
+        backoff=str(r.get("backoff", "exponential")).lower(),
+        max_retry_interval=float(r.get("max_retry_interval", 30.0)),
+        jitter=bool(r.get("jitter", True)),
+    )
+
+
+def _build_circuit_breaker_config(data: dict) -> CircuitBreakerConfig:
+    cb = data.get("circuit_breaker", {})
+    open_action = str(cb.get("open_action", "requeue")).lower()
+    if open_action not in ("fail_fast", "requeue"):
+        raise ValueError(f"circuit_breaker.open_action 仅支持 fail_fast / requeue: {open_action}")
+    return CircuitBreakerConfig(
+        enabled=bool(cb.get("enabled", False)),
+        failure_threshold=int(cb.get("failure_threshold", 5)),
+        reset_timeout=float(cb.get("reset_timeout", 30.0)),
+        half_open_max_calls=int(cb.get("half_open_max_calls", 1)),
+        open_action=open_action,
+    )
+
+
+def _build_response_cache_config(data: dict) -> ResponseCacheConfig:
+    rc = data.get("response_cache", {})
+    return ResponseCacheConfig(
+        coalesce=bool(rc.get("coalesce", True)),
+        ttl_seconds=float(rc.get("ttl_seconds", 0) or 0),
+        max_entries=int(rc.get("max_entries", 100000)),
+    )
+
+
+def _build_load_config(data: dict) -> LoadConfig:
+    ld = data.get("load", {})
+    return LoadConfig(
+        enabled=bool(ld.get("enabled", False)),
+        rate=float(ld.get("rate", 10.0)),
+        duration=int(ld.get("duration", 60)),
+        profile=ld.get("profile", "") or "",
+        window_seconds=int(ld.get("window_seconds", 10)),
+        max_in_flight=int(ld.get("max_in_flight", 200)),
+        output_path=ld.get("output_path", "./output/loadtest_{timestamp}.json"),
     )
 
 
@@ -254,5 +449,8 @@ def load_config(path: str) -> AppConfig:
         routing=_build_routing_config(data),
         concurrency=_build_concurrency_config(data),
         retry=_build_retry_config(data),
+        circuit_breaker=_build_circuit_breaker_config(data),
+        response_cache=_build_response_cache_config(data),
+        load=_build_load_config(data),
         log=_build_log_config(data),
     )
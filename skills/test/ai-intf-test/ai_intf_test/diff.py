@@ -0,0 +1,324 @@
+"""运行对比模块：按 (claimId, itemId) 对比本次运行与基线运行
+
+用法:
+  # 对比结果存储目录中最近两次运行
+  python -m ai_intf_test.diff --store-dir ./output/runs
+
+  # 指定基线与本次（支持 .jsonl.gz 存储文件 / checkpoint .jsonl / 输出的 .xlsx 报告）
+  python -m ai_intf_test.diff ./output/runs/run_20240101_120000.jsonl.gz ./output/test_result_20240102.xlsx
+
+  # 写出明细（.xlsx 或 .json），存在回归时以退出码 1 结束（便于接入发布流水线）
+  python -m ai_intf_test.diff --store-dir ./output/runs --output ./output/diff.xlsx --strict
+
+检查项:
+- pass→fail：基线校验通过、本次不通过或请求异常
+- 新增校验项：本次出现了基线同一行没有的 ValidateResult.name
+- 延迟回归：本次响应时间比基线慢 latency_threshold_ms 以上且超过 latency_ratio 倍
+  （复用结果的行未发送请求，不参与延迟回归判定与延迟分位数统计）
+
+基线与本次均按同一规则载入为字典（哈希索引，重复键的取舍见 result_store.index_run_records），
+再逐行查找，整体 O(n)。
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .latency_histogram import LatencyHistogram
+from .result_store import (
+    RunKey,
+    RunRecord,
+    add_run_record,
+    iter_run_records,
+    list_runs,
+    load_run_index,
+)
+
+PASS_TO_FAIL = "pass→fail"
+FAIL_TO_PASS = "fail→pass"
+NEW_RESULT_NAME = "新增校验项"
+LATENCY_REGRESSION = "延迟回归"
+ONLY_IN_BASELINE = "仅基线存在"
+ONLY_IN_CURRENT = "仅本次存在"
+
+# 计为回归的变化类型（--strict 时决定退出码）
+REGRESSION_KINDS = (PASS_TO_FAIL, NEW_RESULT_NAME, LATENCY_REGRESSION)
+
+
+@dataclass
+class DiffOptions:
+    # 单行延迟回归判定：慢了至少 latency_threshold_ms 毫秒，且为基线的 latency_ratio 倍以上
+    latency_threshold_ms: int = 200
+    latency_ratio: float = 1.5
+
+
+@dataclass
+class RunDiff:
+    """对比结果"""
+    baseline_rows: int = 0
+    current_rows: int = 0
+    matched_rows: int = 0
+    counts: Counter = field(default_factory=Counter)
+    # (claimId, itemId, serviceType, 变化类型, 基线, 本次, 说明)
+    changes: List[Tuple] = field(default_factory=list)
+    # 基线中从未出现过的 ValidateResult.name → 本次出现的行数
+    new_names: Counter = field(default_factory=Counter)
+    baseline_latency: Dict[str, LatencyHistogram] = field(default_factory=dict)
+    current_latency: Dict[str, LatencyHistogram] = field(default_factory=dict)
+
+    @property
+    def regression_count(self) -> int:
+        return sum(self.counts[k] for k in REGRESSION_KINDS)
+
+
+def _status(rec: RunRecord) -> str:
+    if rec.error:
+        return "ERROR"
+    return "PASS" if rec.passed else "FAIL"
+
+
+def diff_runs(
+    baseline: Dict[RunKey, RunRecord],
+    current: Iterable[Tuple[RunKey, RunRecord]],
+    options: Optional[DiffOptions] = None,
+) -> RunDiff:
+    """对比本次运行与基线
+
+    Args:
+        baseline: load_run_index() 得到的基线哈希索引
+        current: 本次运行的 ((claimId, itemId), RunRecord) 迭代器，
+            重复键与基线按同一规则取舍（result_store.index_run_records）
+        options: 判定阈值
+    """
+    opts = options or DiffOptions()
+    diff = RunDiff(baseline_rows=len(baseline))
+    changes = diff.changes
+    counts = diff.counts
+
+    baseline_names = set()
+    base_latency: Dict[str, List[int]] = {}
+    cur_latency: Dict[str, List[int]] = {}
+    for rec in baseline.values():
+        if rec.names:
+            baseline_names.update(rec.names)
+        if not rec.error and not rec.from_cache:
+            _latency_list(base_latency, rec.service_type).append(rec.response_time_ms)
+
+    current_index: Dict[RunKey, RunRecord] = {}
+    for key, cur in current:
+        diff.current_rows += 1
+        add_run_record(current_index, key, cur)
+
+    for key, cur in current_index.items():
+        if not cur.error and not cur.from_cache:
+            _latency_list(cur_latency, cur.service_type).append(cur.response_time_ms)
+        for name in cur.names:
+            if name not in baseline_names:
+                diff.new_names[name] += 1
+
+        base = baseline.get(key)
+        if base is None:
+            counts[ONLY_IN_CURRENT] += 1
+            changes.append((*key, cur.service_type, ONLY_IN_CURRENT, "", _status(cur), ""))
+            continue
+        diff.matched_rows += 1
+
+        base_ok = base.passed and not base.error
+        cur_ok = cur.passed and not cur.error
+        if base_ok and not cur_ok:
+            counts[PASS_TO_FAIL] += 1
+            changes.append((*key, cur.service_type, PASS_TO_FAIL, _status(base), _status(cur),
+                            ", ".join(cur.names)))
+        elif cur_ok and not base_ok:
+            counts[FAIL_TO_PASS] += 1
+            changes.append((*key, cur.service_type, FAIL_TO_PASS, _status(base), _status(cur), ""))
+
+        if cur.names and cur.names != base.names:
+            added = sorted(set(cur.names) - set(base.names))
+            if added:
+                counts[NEW_RESULT_NAME] += 1
+                changes.append((*key, cur.service_type, NEW_RESULT_NAME, ", ".join(base.names),
+                                ", ".join(cur.names), ", ".join(added)))
+
+        if (
+            not cur.error
+            and not base.error
+            and not cur.from_cache
+            and not base.from_cache
+            and cur.response_time_ms - base.response_time_ms >= opts.latency_threshold_ms
+            and cur.response_time_ms > base.response_time_ms * opts.latency_ratio
+        ):
+            counts[LATENCY_REGRESSION] += 1
+            changes.append((*key, cur.service_type, LATENCY_REGRESSION, base.response_time_ms,
+                            cur.response_time_ms, f"+{cur.response_time_ms - base.response_time_ms}ms"))
+
+    for key, base in baseline.items():
+        if key not in current_index:
+            counts[ONLY_IN_BASELINE] += 1
+            changes.append((*key, base.service_type, ONLY_IN_BASELINE, _status(base), "", ""))
+
+    diff.baseline_latency = _build_histograms(base_latency)
+    diff.current_latency = _build_histograms(cur_latency)
+    return diff
+
+
+def _latency_list(by_service: Dict[str, List[int]], service: str) -> List[int]:
+    values = by_service.get(service)
+    if values is None:
+        values = by_service[service] = []
+    return values
+
+
+def _build_histograms(by_service: Dict[str, List[int]]) -> Dict[str, LatencyHistogram]:
+    """按服务批量构建延迟直方图（另含 "全部"）"""
+    histograms = {"全部": LatencyHistogram()}
+    for service, values in by_service.items():
+        hist = histograms[service] = LatencyHistogram()
+        hist.record_values(values)
+        histograms["全部"].merge(hist)
+    return histograms
+
+
+def latency_comparison(diff: RunDiff) -> List[Tuple]:
+    """按服务对比延迟分位数: (服务, 基线 p50/p90/p99, 本次 p50/p90/p99)"""
+    rows = []
+    services = ["全部"] + sorted((diff.baseline_latency.keys() | diff.current_latency.keys()) - {"全部"})
+    for service in services:
+        base = diff.baseline_latency.get(service, LatencyHistogram())
+        cur = diff.current_latency.get(service, LatencyHistogram())
+        rows.append((
+            service,
+            base.percentile(50), base.percentile(90), base.percentile(99),
+            cur.percentile(50), cur.percentile(90), cur.percentile(99),
+        ))
+    return rows
+
+
+def print_diff(diff: RunDiff, baseline_path: str, current_path: str, elapsed: float, limit: int = 20):
+    print(f"\n{'='*60}")
+    print(f"  运行对比")
+    print(f"  基线: {baseline_path} ({diff.baseline_rows} 条)")
+    print(f"  本次: {current_path} ({diff.current_rows} 条)")
+    print(f"  匹配: {diff.matched_rows} 条，对比耗时 {elapsed:.2f}s")
+    print(f"{'='*60}")
+    for kind in (PASS_TO_FAIL, NEW_RESULT_NAME, LATENCY_REGRESSION, FAIL_TO_PASS,
+                 ONLY_IN_BASELINE, ONLY_IN_CURRENT):
+        print(f"  {kind:<10} {diff.counts[kind]}")
+    if diff.new_names:
+        print(f"\n  基线中从未出现的校验项:")
+        for name, count in diff.new_names.most_common(limit):
+            print(f"    {name}: {count} 行")
+
+    print(f"\n  {'服务':<8} {'基线 p50/p90/p99':>20} {'本次 p50/p90/p99':>20}")
+    for service, b50, b90, b99, c50, c90, c99 in latency_comparison(diff):
+        print(f"  {service:<8} {f'{b50}/{b90}/{b99}':>20} {f'{c50}/{c90}/{c99}':>20}")
+
+    regressions = [c for c in diff.changes if c[3] in REGRESSION_KINDS]
+    if regressions:
+        print(f"\n  回归明细（前 {min(limit, len(regressions))} 条，共 {len(regressions)} 条）:")
+        for claim_id, item_id, service, kind, base, cur, detail in regressions[:limit]:
+            print(f"    [{kind}] {item_id}({service}) claimId={claim_id}: {base} → {cur} {detail}")
+    print()
+
+
+def write_diff(diff: RunDiff, output_path: str) -> str:
+    """写出对比明细：.json 或 .xlsx（按扩展名）"""
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    headers = ["claimId", "itemId", "serviceType", "change", "baseline", "current", "detail"]
+
+    if output_path.endswith(".json"):
+        data = {
+            "summary": dict(diff.counts),
+            "baseline_rows": diff.baseline_rows,
+            "current_rows": diff.current_rows,
+            "matched_rows": diff.matched_rows,
+            "new_result_names": dict(diff.new_names),
+            "latency": [
+                dict(zip(["service", "base_p50", "base_p90", "base_p99",
+                          "cur_p50", "cur_p90", "cur_p99"], row))
+                for row in latency_comparison(diff)
+            ],
+            "changes": [dict(zip(headers, c)) for c in diff.changes],
+        }
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return output_path
+
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title="变化明细")
+    ws.append(headers)
+    for change in diff.changes:
+        ws.append(list(change))
+
+    ws = wb.create_sheet(title="对比摘要")
+    ws.append(["变化类型", "行数"])
+    for kind, count in diff.counts.items():
+        ws.append([kind, count])
+    ws.append([])
+    ws.append(["服务", "基线 p50", "基线 p90", "基线 p99", "本次 p50", "本次 p90", "本次 p99"])
+    for row in latency_comparison(diff):
+        ws.append(list(row))
+    if diff.new_names:
+        ws.append([])
+        ws.append(["新增校验项", "行数"])
+        for name, count in diff.new_names.most_common():
+            ws.append([name, count])
+    wb.save(output_path)
+    return output_path
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="对比两次 submitValidate 批量测试结果",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("用法:")[1].split("检查项:")[0],
+    )
+    parser.add_argument("runs", nargs="*", help="基线与本次运行文件（.jsonl.gz / .jsonl / .xlsx）")
+    parser.add_argument("--store-dir", type=str, default=None,
+                        help="结果存储目录；未指定运行文件时对比其中最近两次运行")
+    parser.add_argument("--latency-threshold-ms", type=int, default=200,
+                        help="延迟回归判定：比基线慢的毫秒数下限（默认 200）")
+    parser.add_argument("--latency-ratio", type=float, default=1.5,
+                        help="延迟回归判定：与基线的倍数下限（默认 1.5）")
+    parser.add_argument("--output", "-o", type=str, default=None, help="写出对比明细（.xlsx 或 .json）")
+    parser.add_argument("--limit", type=int, default=20, help="控制台打印的回归明细条数（默认 20）")
+    parser.add_argument("--strict", action="store_true", help="存在回归时以退出码 1 结束")
+    args = parser.parse_args(argv)
+
+    if len(args.runs) == 2:
+        baseline_path, current_path = args.runs
+    elif not args.runs and args.store_dir:
+        runs = list_runs(args.store_dir)
+        if len(runs) < 2:
+            parser.error(f"{args.store_dir} 中的运行少于 2 次，无法对比")
+        baseline_path, current_path = runs[-2], runs[-1]
+    else:
+        parser.error("请指定 基线 与 本次 两个运行文件，或使用 --store-dir")
+
+    start = time.time()
+    baseline = load_run_index(baseline_path)
+    diff = diff_runs(
+        baseline,
+        iter_run_records(current_path),
+        DiffOptions(args.latency_threshold_ms, args.latency_ratio),
+    )
+    print_diff(diff, baseline_path, current_path, time.time() - start, args.limit)
+
+    if args.output:
+        print(f"  对比明细: {write_diff(diff, args.output)}\n")
+
+    return 1 if args.strict and diff.regression_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,21 @@
 """Excel 读写模块：读取测试输入、写出测试结果"""
 from __future__ import annotations
 
+import csv
 import json
 import logging
 import os
+from copy import copy
 from datetime import datetime
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional
 
 from openpyxl import Workbook, load_workbook
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import get_column_letter
 
 from .models import TestInput, TestResult
+from .result_stats import ResultSummary
 
 logger = logging.getLogger(__name__)
 
@@ -42,48 +46,102 @@ def read_test_inputs(
     Returns:
         TestInput 列表
     """
-    if not os.path.exists(excel_path):
-        raise FileNotFoundError(f"输入 Excel 文件不存在: {excel_path}")
+    inputs = list(iter_test_inputs(excel_path, sheet_name, claim_id_column, item_id_column))
+    logger.info(f"从 Excel 读取到 {len(inputs)} 条测试数据")
+    return inputs
 
-    wb = load_workbook(excel_path, read_only=True)
-    if sheet_name not in wb.sheetnames:
-        raise ValueError(f"Excel 中不存在工作表: {sheet_name}，可用: {wb.sheetnames}")
-
-    ws = wb[sheet_name]
-    rows = list(ws.iter_rows())
-    if not rows:
-        logger.warning("Excel 工作表为空")
-        return []
-
-    header = rows[0]
-    claim_id_idx = _find_column_index(header, claim_id_column)
-    item_id_idx = _find_column_index(header, item_id_column)
-
-    inputs: List[TestInput] = []
-    for row_num, row in enumerate(rows[1:], start=2):
-        claim_id_val = row[claim_id_idx - 1].value
-        item_id_val = row[item_id_idx - 1].value
-
-        if item_id_val is None or str(item_id_val).strip() == "":
-            logger.debug(f"跳过第 {row_num} 行：itemId 为空")
-            continue
 
-        if claim_id_val is None or str(claim_id_val).strip() == "":
-            logger.debug(f"跳过第 {row_num} 行：claimId 为空")
-            continue
+def iter_test_inputs(
+    excel_path: str,
+    sheet_name: str,
+    claim_id_column: str,
+    item_id_column: str,
+) -> Iterator[TestInput]:
+    """流式读取测试输入：边解析行边产出 TestInput，不在内存中保留整张表
 
-        try:
-            claim_id = int(claim_id_val)
-        except (ValueError, TypeError):
-            logger.warning(f"第 {row_num} 行 claimId 无法转为整数: {claim_id_val}，跳过")
-            continue
+    文件、工作表、表头列的校验在调用时立即执行（而非首次迭代时），
+    便于调用方在开始发送请求前发现配置错误。
+
+    Args:
+        excel_path: Excel 文件路径
+        sheet_name: 工作表名称
+        claim_id_column: claimId 列名
+        item_id_column: itemId 列名
 
-        item_id = str(item_id_val).strip().upper()
-        inputs.append(TestInput(claim_id=claim_id, item_id=item_id, row_index=row_num))
+    Returns:
+        TestInput 迭代器
+    """
+    if not os.path.exists(excel_path):
+        raise FileNotFoundError(f"输入 Excel 文件不存在: {excel_path}")
 
-    wb.close()
-    logger.info(f"从 Excel 读取到 {len(inputs)} 条测试数据")
-    return inputs
+    wb = load_workbook(excel_path, read_only=True)
+    try:
+        if sheet_name not in wb.sheetnames:
+            raise ValueError(f"Excel 中不存在工作表: {sheet_name}，可用: {wb.sheetnames}")
+
+        ws = wb[sheet_name]
+        header = next(ws.iter_rows(min_row=1, max_row=1), None)
+        if not header:
+            logger.warning("Excel 工作表为空")
+            wb.close()
+            return iter(())
+
+        claim_id_idx = _find_column_index(header, claim_id_column) - 1
+        item_id_idx = _find_column_index(header, item_id_column) - 1
+    except Exception:
+        wb.close()
+        raise
+
+    return _iter_rows(wb, ws, claim_id_idx, item_id_idx)
+
+
+def _iter_rows(wb, ws, claim_id_idx: int, item_id_idx: int) -> Iterator[TestInput]:
+    """逐行解析数据行（第 2 行起），迭代结束或被关闭时释放工作簿"""
+    count = 0
+    try:
+        for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
+            claim_id_val = row[claim_id_idx] if claim_id_idx < len(row) else None
+            item_id_val = row[item_id_idx] if item_id_idx < len(row) else None
+
+            if item_id_val is None or str(item_id_val).strip() == "":
+                logger.debug(f"跳过第 {row_num} 行：itemId 为空")
+                continue
+
+            if claim_id_val is None or str(claim_id_val).strip() == "":
+                logger.debug(f"跳过第 {row_num} 行：claimId 为空")
+                continue
+
+            try:
+                claim_id = int(claim_id_val)
+            except (ValueError, TypeError):
+                logger.warning(f"第 {row_num} 行 claimId 无法转为整数: {claim_id_val}，跳过")
+                continue
+
+            item_id = str(item_id_val).strip().upper()
+            count += 1
+            yield TestInput(claim_id=claim_id, item_id=item_id, row_index=row_num)
+    finally:
+        wb.close()
+        logger.debug(f"Excel 流式读取结束，共产出 {count} 条测试数据")
+
+
+def estimate_data_rows(excel_path: str, sheet_name: str) -> Optional[int]:
+    """根据工作表的 dimension 信息估算数据行数（不含表头），无法获取时返回 None
+
+    只读模式下 openpyxl 从 sheet XML 的 <dimension> 标签读取 max_row，
+    无需解析数据行，用于流式执行时的进度显示。
+    """
+    try:
+        wb = load_workbook(excel_path, read_only=True)
+    except Exception:
+        return None
+    try:
+        if sheet_name not in wb.sheetnames:
+            return None
+        max_row = wb[sheet_name].max_row
+        return max_row - 1 if max_row else None
+    finally:
+        wb.close()
 
 
 # ============================
@@ -117,18 +175,38 @@ _OUTPUT_COLUMNS = [
     ("traceId", 18),
     ("testTime", 22),
     ("responseTimeMs", 16),
+    ("connectMs", 12),
+    ("tlsMs", 10),
+    ("ttfbMs", 10),
+    ("transferMs", 12),
+    ("attempts", 10),
+    ("backoffMs", 12),
+    ("fromCache", 12),
 ]
 
 
 def write_test_results(
-    results: List[TestResult],
+    results: Iterable[TestResult],
     output_path: str,
+    latency_summary: Optional[dict] = None,
+    summary: Optional[ResultSummary] = None,
+    style: str = "styled",
 ) -> str:
     """将测试结果写入 Excel 文件
 
+    使用 openpyxl 的 write-only 模式逐行流式写出，内存占用与结果条数无关；
+    results 可以是列表，也可以是 checkpoint 文件的迭代器，只遍历一次。
+
     Args:
-        results: 测试结果列表
+        results: 测试结果（列表或迭代器）
         output_path: 输出文件路径（支持 {timestamp} 占位符）
+        latency_summary: LatencyRecorder.summary() 的结果，写入统计摘要 Sheet
+        summary: 预先构建的分组统计；为空时在写出过程中增量累计
+        style: 明细的写出方式
+            styled - 数据行加边框并按结论着色
+            plain  - 只写值，不设置单元格样式
+            csv    - 明细写入同名 .csv 文件（utf-8-sig，Excel 可直接打开），
+                     Excel 中只保留统计摘要；百万行级结果写出最快
 
     Returns:
         实际输出的文件路径
@@ -142,26 +220,38 @@ def write_test_results(
     if output_dir:
         os.makedirs(output_dir, exist_ok=True)
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "测试结果"
-
-    # 写入表头
-    for col_idx, (col_name, col_width) in enumerate(_OUTPUT_COLUMNS, start=1):
-        cell = ws.cell(row=1, column=col_idx, value=col_name)
-        cell.font = _HEADER_FONT
-        cell.fill = _HEADER_FILL
-        cell.alignment = _HEADER_ALIGNMENT
-        cell.border = _THIN_BORDER
-        ws.column_dimensions[get_column_letter(col_idx)].width = col_width
-
-    # 冻结首行
-    ws.freeze_panes = "A2"
-
-    # 写入数据
-    for row_idx, result in enumerate(results, start=2):
-        # 校验结果详情：转为 JSON 摘要
-        results_text = _format_results_text(result)
+    wb = Workbook(write_only=True)
+    csv_file = None
+    if style == "csv":
+        csv_path = results_csv_path(actual_path)
+        csv_file = open(csv_path, "w", encoding="utf-8-sig", newline="")
+        writer = csv.writer(csv_file)
+        writer.writerow([col_name for col_name, _ in _OUTPUT_COLUMNS])
+        append_row = writer.writerow
+    else:
+        ws = wb.create_sheet(title="测试结果")
+        styler = _CellStyler(ws)
+
+        # 列宽、冻结首行需在写入数据前设置
+        for col_idx, (_, col_width) in enumerate(_OUTPUT_COLUMNS, start=1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = col_width
+        ws.freeze_panes = "A2"
+
+        # 写入表头
+        ws.append([
+            styler.cell(col_name, font=_HEADER_FONT, fill=_HEADER_FILL, alignment=_HEADER_ALIGNMENT)
+            for col_name, _ in _OUTPUT_COLUMNS
+        ])
+        append_row = ws.append
+    styled = style == "styled"
+
+    # 写入数据（未传入统计时同时累计，避免再次遍历结果）
+    stats = summary
+    if stats is None:
+        stats = ResultSummary()
+    for result in results:
+        if summary is None:
+            stats.add(result)
 
         row_data = [
             result.claim_id,
@@ -171,29 +261,77 @@ def write_test_results(
             result.status_code,
             result.success,
             result.passed,
-            results_text,
+            _format_results_text(result),
             result.error or "",
             result.trace_id or "",
             result.test_time,
             result.response_time_ms,
+            result.connect_ms,
+            result.tls_ms,
+            result.ttfb_ms,
+            result.transfer_ms,
+            result.attempts,
+            result.backoff_ms,
+            result.from_cache,
         ]
 
-        for col_idx, value in enumerate(row_data, start=1):
-            cell = ws.cell(row=row_idx, column=col_idx, value=value)
-            cell.alignment = _CELL_ALIGNMENT
-            cell.border = _THIN_BORDER
-
+        if not styled:
+            append_row(row_data)
+            continue
         # 根据结果设置行颜色
-        _apply_row_color(ws, row_idx, result, len(_OUTPUT_COLUMNS))
+        fill = _row_fill(result)
+        append_row([
+            styler.cell(value, fill=fill, alignment=_CELL_ALIGNMENT)
+            for value in row_data
+        ])
+
+    if csv_file is not None:
+        csv_file.close()
+        logger.info(f"测试结果明细已写入: {csv_path}")
 
     # 写入统计摘要 Sheet
-    _write_summary_sheet(wb, results)
+    _write_summary_sheet(wb, stats, latency_summary)
 
     wb.save(actual_path)
     logger.info(f"测试结果已写入: {actual_path}")
     return actual_path
 
 
+def results_csv_path(report_path: str) -> str:
+    """report_style=csv 时明细 CSV 的路径（与报告同名）"""
+    return os.path.splitext(report_path)[0] + ".csv"
+
+
+class _CellStyler:
+    """构造带样式的 write-only 单元格（统一加细边框）
+
+    openpyxl 每次给单元格赋 font / fill / border 都要对样式对象求哈希并在工作簿样式表中查找，
+    百万行报告中这部分开销远超写值本身。这里每种样式组合只登记一次，
+    之后的单元格直接复制已登记的样式下标。
+    """
+
+    def __init__(self, ws) -> None:
+        self._ws = ws
+        self._styles = {}
+
+    def cell(self, value, font=None, fill=None, alignment=None) -> WriteOnlyCell:
+        key = (id(font), id(fill), id(alignment))
+        style = self._styles.get(key)
+        if style is None:
+            template = WriteOnlyCell(self._ws)
+            if font is not None:
+                template.font = font
+            if fill is not None:
+                template.fill = fill
+            if alignment is not None:
+                template.alignment = alignment
+            template.border = _THIN_BORDER
+            style = self._styles[key] = template._style
+        cell = WriteOnlyCell(self._ws, value=value)
+        cell._style = copy(style)
+        return cell
+
+
 def _format_results_text(result: TestResult) -> str:
     """格式化校验结果为可读文本"""
     if not result.results:
@@ -205,70 +343,109 @@ def _format_results_text(result: TestResult) -> str:
     return "\n".join(parts)
 
 
-def _apply_row_color(ws, row_idx: int, result: TestResult, col_count: int):
-    """根据测试结果给行设置背景色"""
+def _row_fill(result: TestResult) -> PatternFill:
+    """根据测试结果选择行背景色"""
     if result.error:
-        fill = _ERROR_FILL
-    elif result.passed:
-        fill = _PASS_FILL
-    else:
-        fill = _FAIL_FILL
-
-    for col_idx in range(1, col_count + 1):
-        ws.cell(row=row_idx, column=col_idx).fill = fill
+        return _ERROR_FILL
+    if result.passed:
+        return _PASS_FILL
+    return _FAIL_FILL
 
 
-def _write_summary_sheet(wb: Workbook, results: List[TestResult]):
+def _write_summary_sheet(
+    wb: Workbook, stats: ResultSummary, latency_summary: Optional[dict] = None
+):
     """写入统计摘要 Sheet"""
     ws = wb.create_sheet(title="统计摘要")
+    ws.column_dimensions["A"].width = 15
+    ws.column_dimensions["B"].width = 12
+    ws.column_dimensions["C"].width = 12
+    ws.column_dimensions["D"].width = 12
 
-    total = len(results)
-    success_count = sum(1 for r in results if r.success)
-    pass_count = sum(1 for r in results if r.passed)
-    fail_count = sum(1 for r in results if r.success and not r.passed)
-    error_count = sum(1 for r in results if r.error)
+    total = stats.total
+
+    def pct(count: int) -> str:
+        return f"{count / total * 100:.1f}%" if total else "0%"
 
     summary_data = [
         ("指标", "数量", "占比"),
         ("总测试数", total, "100%"),
-        ("请求成功", success_count, f"{success_count / total * 100:.1f}%" if total else "0%"),
-        ("校验通过", pass_count, f"{pass_count / total * 100:.1f}%" if total else "0%"),
-        ("校验不通过", fail_count, f"{fail_count / total * 100:.1f}%" if total else "0%"),
-        ("请求异常", error_count, f"{error_count / total * 100:.1f}%" if total else "0%"),
+        ("请求成功", stats.success_count, pct(stats.success_count)),
+        ("校验通过", stats.pass_count, pct(stats.pass_count)),
+        ("校验不通过", stats.fail_count, pct(stats.fail_count)),
+        ("请求异常", stats.error_count, pct(stats.error_count)),
+        ("复用结果（未请求）", stats.cache_count, pct(stats.cache_count)),
     ]
 
-    for row_idx, (label, value, pct) in enumerate(summary_data, start=1):
-        ws.cell(row=row_idx, column=1, value=label).font = Font(bold=(row_idx == 1))
-        ws.cell(row=row_idx, column=2, value=value).font = Font(bold=(row_idx == 1))
-        ws.cell(row=row_idx, column=3, value=pct).font = Font(bold=(row_idx == 1))
-
-    ws.column_dimensions["A"].width = 15
-    ws.column_dimensions["B"].width = 12
-    ws.column_dimensions["C"].width = 12
-
-    # 按 itemId 分组统计
-    item_stats = {}
-    for r in results:
-        if r.item_id not in item_stats:
-            item_stats[r.item_id] = {"total": 0, "pass": 0, "fail": 0, "error": 0}
-        item_stats[r.item_id]["total"] += 1
-        if r.passed:
-            item_stats[r.item_id]["pass"] += 1
-        elif r.error:
-            item_stats[r.item_id]["error"] += 1
-        else:
-            item_stats[r.item_id]["fail"] += 1
-
-    start_row = len(summary_data) + 3
-    ws.cell(row=start_row, column=1, value="按模板分组统计").font = Font(bold=True, size=12)
-
-    headers = ["itemId", "总数", "通过", "不通过", "异常"]
-    for col_idx, h in enumerate(headers, start=1):
-        ws.cell(row=start_row + 1, column=col_idx, value=h).font = Font(bold=True)
-
-    for i, (item_id, stats) in enumerate(sorted(item_stats.items()), start=start_row + 2):
-        ws.cell(row=i, column=1, value=item_id)
-        ws.cell(row=i, column=2, value=stats["total"])
-        ws.cell(row=i, column=3, value=stats["pass"])
-        ws.cell(row=i, column=4, value=stats["fail"])
-        ws.cell(row=i, column=5, value=stats["error"])
+    for row_idx, row in enumerate(summary_data, start=1):
+        font = Font(bold=(row_idx == 1))
+        ws.append([_plain_cell(ws, value, font) for value in row])
+
+    # 按服务、按 itemId 分组统计（与摘要之间空两行）
+    for title, key_name, table in (
+        ("按服务分组统计", "服务", stats.by_service()),
+        ("按模板分组统计", "itemId", stats.by_item()),
+    ):
+        ws.append([])
+        ws.append([])
+        ws.append([_plain_cell(ws, title, Font(bold=True, size=12))])
+        headers = [key_name, "总数", "通过", "不通过", "异常", "复用"]
+        ws.append([_plain_cell(ws, h, Font(bold=True)) for h in headers])
+        for key, row in table.items():
+            ws.append([key or "unknown", row["total"], row["pass"], row["fail"], row["error"], row["cached"]])
+
+    # 校验项统计：按严重级别、按 ValidateResult.name
+    severities = stats.by_severity()
+    if severities:
+        ws.append([])
+        ws.append([])
+        ws.append([_plain_cell(ws, "按严重级别统计（校验项条数）", Font(bold=True, size=12))])
+        ws.append([_plain_cell(ws, h, Font(bold=True)) for h in ("severity", "条数")])
+        for severity, count in severities.items():
+            ws.append([severity, count])
+
+        ws.append([])
+        ws.append([])
+        ws.append([_plain_cell(ws, "按校验项统计（ValidateResult.name）", Font(bold=True, size=12))])
+        headers = ["name", "severity", "条数", "涉及服务"]
+        ws.append([_plain_cell(ws, h, Font(bold=True)) for h in headers])
+        for row in stats.by_validate_name():
+            ws.append(list(row))
+
+    # 响应时间分位数（整体 + 按服务）
+    if latency_summary:
+        ws.append([])
+        ws.append([])
+        ws.append([_plain_cell(ws, "响应时间分位数（ms）", Font(bold=True, size=12))])
+        headers = ["服务", "请求数", "平均", "p50", "p90", "p99", "max"]
+        ws.append([_plain_cell(ws, h, Font(bold=True)) for h in headers])
+
+        rows = [("全部", latency_summary["overall"])]
+        rows.extend(latency_summary["services"].items())
+        for service, lat in rows:
+            ws.append([
+                service, lat["count"], lat["mean"],
+                lat["p50"], lat["p90"], lat["p99"], lat["max"],
+            ])
+
+    # 分阶段耗时：定位慢请求是建连、TLS、服务端处理（首字节）还是响应体传输
+    phases = (latency_summary or {}).get("phases")
+    if phases:
+        ws.append([])
+        ws.append([])
+        ws.append([_plain_cell(ws, "耗时分解（ms，每条结果各次尝试累加）", Font(bold=True, size=12))])
+        headers = ["阶段", "平均", "p50", "p90", "p99", "max"]
+        ws.append([_plain_cell(ws, h, Font(bold=True)) for h in headers])
+        for phase, lat in phases.items():
+            ws.append([phase, lat["mean"], lat["p50"], lat["p90"], lat["p99"], lat["max"]])
+
+        retries = latency_summary["retries"]
+        ws.append([])
+        ws.append(["总发送次数", retries["attempts"]])
+        ws.append(["发生重试的结果数", retries["retried"]])
+
+
+def _plain_cell(ws, value, font: Font) -> WriteOnlyCell:
+    cell = WriteOnlyCell(ws, value=value)
+    cell.font = font
+    return cell
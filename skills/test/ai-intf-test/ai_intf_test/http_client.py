@@ -1,18 +1,37 @@
 """HTTP 客户端模块：封装请求发送、认证、重试机制"""
 from __future__ import annotations
 
+import json
 import logging
+import os
+import random
 import time
 from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 from requests.auth import HTTPBasicAuth
 
+from .circuit_breaker import CircuitBreakerRegistry
 from .config_loader import AuthConfig, RetryConfig, RoutingConfig, ServerConfig
+from .login_handler import LoginHandler
 from .models import TestInput, TestResult, ValidateResult
+from .rate_limiter import AdaptiveConcurrencyController, TokenBucket
+from .response_cache import ResponseCache
+from .request_timing import TimedHTTPAdapter, reset_connect_timing, take_connect_timing
 
 logger = logging.getLogger(__name__)
 
+try:
+    # 可选依赖：安装 orjson 后响应体解析速度可提升数倍
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# raw_response 保留策略
+RAW_RESPONSE_MODES = ("all", "failed", "spill", "none")
+
 
 class HttpClient:
     """submitValidate 接口 HTTP 客户端
@@ -27,6 +46,14 @@ class HttpClient:
         retry_config: RetryConfig,
         url_template: str,
         routing_config: RoutingConfig = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        concurrency_controller: Optional[AdaptiveConcurrencyController] = None,
+        pool_maxsize: int = 10,
+        raw_response_mode: str = "all",
+        raw_spill_dir: str = "",
+        login_handler: Optional[LoginHandler] = None,
+        circuit_breakers: Optional[CircuitBreakerRegistry] = None,
+        response_cache: Optional[ResponseCache] = None,
     ) -> None:
         self._base_url = server_config.base_url
         self._timeout = (server_config.connect_timeout, server_config.timeout)
@@ -34,6 +61,18 @@ class HttpClient:
         self._retry_config = retry_config
         self._url_template = url_template
         self._routing_config = routing_config or RoutingConfig()
+        self._rate_limiter = rate_limiter
+        self._concurrency_controller = concurrency_controller
+        self._pool_maxsize = max(10, pool_maxsize)
+        if raw_response_mode not in RAW_RESPONSE_MODES:
+            raise ValueError(f"不支持的 raw_response 保留策略: {raw_response_mode}，可选: {RAW_RESPONSE_MODES}")
+        self._raw_response_mode = raw_response_mode
+        self._raw_spill_dir = raw_spill_dir
+        self._login_handler = login_handler
+        self._circuit_breakers = circuit_breakers
+        self._response_cache = response_cache
+        if raw_response_mode == "spill" and raw_spill_dir:
+            os.makedirs(raw_spill_dir, exist_ok=True)
         self._session = self._create_session()
 
     @property
@@ -41,10 +80,61 @@ class HttpClient:
         """获取内部 Session 实例（供 LoginHandler 注入 Cookie 使用）"""
         return self._session
 
+    @property
+    def timeout(self) -> Tuple[int, int]:
+        """(连接超时, 读取超时)，单位秒"""
+        return self._timeout
+
+    @property
+    def retry_config(self) -> RetryConfig:
+        """重试配置（供异步客户端复用相同的重试语义）"""
+        return self._retry_config
+
+    @property
+    def rate_limiter(self) -> Optional[TokenBucket]:
+        """共享令牌桶（未配置限速时为 None）"""
+        return self._rate_limiter
+
+    @property
+    def concurrency_controller(self) -> Optional[AdaptiveConcurrencyController]:
+        """自适应并发控制器（未启用时为 None）"""
+        return self._concurrency_controller
+
+    @property
+    def login_handler(self) -> Optional[LoginHandler]:
+        """登录处理器（auth.type=login 时用于 401 后刷新会话，否则为 None）"""
+        return self._login_handler
+
+    @property
+    def circuit_breakers(self) -> Optional[CircuitBreakerRegistry]:
+        """按服务的熔断器（未启用时为 None）"""
+        return self._circuit_breakers
+
+    @property
+    def response_cache(self) -> Optional[ResponseCache]:
+        """重复请求合并 / 缓存（未启用时为 None）"""
+        return self._response_cache
+
+    def retry_delay(self, attempt: int) -> float:
+        """第 attempt 次尝试失败后的退避时间（秒）"""
+        cfg = self._retry_config
+        delay = cfg.retry_interval
+        if cfg.backoff == "exponential":
+            delay = min(cfg.max_retry_interval, cfg.retry_interval * (2 ** (attempt - 1)))
+        if cfg.jitter and delay > 0:
+            delay = random.uniform(delay / 2, delay)
+        return delay
+
     def _create_session(self) -> requests.Session:
         """创建带认证配置的 requests Session"""
         session = requests.Session()
 
+        # 连接池大小需不小于并发线程数，否则多余连接用完即丢弃，无法 keep-alive 复用
+        # TimedHTTPAdapter 额外记录新建连接的 TCP / TLS 耗时
+        adapter = TimedHTTPAdapter(pool_maxsize=self._pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
         # 通用请求头
         session.headers.update({
             "Content-Type": "application/json",
@@ -105,88 +195,196 @@ class HttpClient:
 
         Returns:
             TestResult 包含完整测试结果
-        """
-        url = self.build_url(test_input.item_id)
-        payload = {"claimId": test_input.claim_id}
 
-        result = TestResult(
-            claim_id=test_input.claim_id,
-            item_id=test_input.item_id,
-            url=url,
-            service_type=self.resolve_service_name(test_input.item_id),
+        相同 (claimId, itemId) 的请求经 response_cache 合并，只发送一次。
+
+        Raises:
+            CircuitOpenError: 该服务熔断中，请求未发送（由调用方决定直接失败或延后重试）
+        """
+        if self._response_cache is None:
+            return self._execute_uncached(test_input)
+        return self._response_cache.get_or_execute(
+            (test_input.claim_id, test_input.item_id),
+            lambda: self._execute_uncached(test_input),
         )
 
-        response = self._send_with_retry(url, payload)
+    def _execute_uncached(self, test_input: TestInput) -> TestResult:
+        result = self.new_result(test_input)
+        payload = self.build_payload(test_input)
+
+        response = self._send_with_retry(result.url, payload, result)
 
         if response is None:
             result.error = "所有重试均失败，未获得响应"
             return result
 
-        result.status_code = response.status_code
+        self.fill_result(result, response.status_code, response.content)
+        return result
+
+    def new_result(self, test_input: TestInput) -> TestResult:
+        """根据测试输入创建尚未填充响应的 TestResult"""
+        return TestResult(
+            claim_id=test_input.claim_id,
+            item_id=test_input.item_id,
+            url=self.build_url(test_input.item_id),
+            service_type=self.resolve_service_name(test_input.item_id),
+        )
+
+    @staticmethod
+    def build_payload(test_input: TestInput) -> dict:
+        """构造 submitValidate 请求体"""
+        return {"claimId": test_input.claim_id}
+
+    def fill_result(self, result: TestResult, status_code: int, content: bytes):
+        """将 HTTP 状态码和响应体填充到 TestResult（同步/异步客户端共用）"""
+        result.status_code = status_code
 
         try:
-            body = response.json()
-            result.raw_response = body
+            body = _json_loads(content)
             self._parse_response(result, body)
         except Exception as e:
+            body = None
             result.error = f"响应解析失败: {e}"
-            logger.error(f"[{test_input.item_id}] claimId={test_input.claim_id} 响应解析失败: {e}")
+            logger.error(f"[{result.item_id}] claimId={result.claim_id} 响应解析失败: {e}")
 
-        return result
+        self._retain_raw_response(result, body, content)
+
+    def _retain_raw_response(self, result: TestResult, body: Optional[dict], content: bytes):
+        """按保留策略处理原始响应体
+
+        - all:    所有行都保留解析后的响应体（内存占用随行数线性增长）
+        - failed: 只保留 FAIL / ERROR 行的响应体
+        - spill:  FAIL / ERROR 行的原始响应写入磁盘，仅在结果中记录文件路径
+        - none:   不保留
+        """
+        mode = self._raw_response_mode
+        if mode == "none" or (mode != "all" and result.passed and not result.error):
+            return
+
+        if mode == "spill" and self._raw_spill_dir:
+            base = os.path.join(self._raw_spill_dir, f"{result.claim_id}_{result.item_id}")
+            try:
+                result.raw_response_path = _write_new_file(base, ".json", content)
+            except OSError as e:
+                logger.warning(f"原始响应写入磁盘失败 {base}.json: {e}")
+            return
+
+        result.raw_response = body
 
     def _send_with_retry(
-        self, url: str, payload: dict
+        self, url: str, payload: dict, result: Optional[TestResult] = None
     ) -> Optional[requests.Response]:
-        """带重试机制的 POST 请求"""
+        """带重试机制的 POST 请求
+
+        传入 result 时，每次尝试的 建连 / TLS / 首字节 / 传输 耗时以及重试等待时间
+        累加到 result 上。
+        """
         max_retries = self._retry_config.max_retries
-        retry_interval = self._retry_config.retry_interval
         retry_status_codes = set(self._retry_config.retry_on_status_codes)
 
         last_error = None
 
-        for attempt in range(1, max_retries + 1):
+        limiter = self._rate_limiter
+        controller = self._concurrency_controller
+        login_handler = self._login_handler
+        refreshed = False
+        breaker = None
+        if self._circuit_breakers and result is not None:
+            breaker = self._circuit_breakers.get(result.service_type)
+
+        attempt = 0
+        while attempt < max_retries:
+            attempt += 1
+            generation = login_handler.generation if login_handler else 0
+            if breaker:
+                breaker.before_request()
+            if limiter:
+                limiter.acquire()
+            if controller:
+                controller.acquire()
+
+            response = None
+            headers_at = None
+            reset_connect_timing()
+            start_time = time.time()
             try:
-                start_time = time.time()
-                response = self._session.post(
+                # stream=True：收到响应头即返回，便于区分首字节时间与响应体传输时间
+                resp = self._session.post(
                     url,
                     json=payload,
                     timeout=self._timeout,
+                    stream=True,
                 )
-                elapsed_ms = int((time.time() - start_time) * 1000)
-
+                headers_at = time.time()
+                resp.content  # 读取完整响应体后连接归还连接池
+                response = resp
+            except requests.exceptions.ConnectionError as e:
+                last_error = f"连接失败: {e}"
+                logger.warning(f"连接失败 [{attempt}/{max_retries}]: {e}")
+            except requests.exceptions.Timeout as e:
+                last_error = f"请求超时: {e}"
+                logger.warning(f"请求超时 [{attempt}/{max_retries}]: {e}")
+            except requests.exceptions.RequestException as e:
+                last_error = f"请求异常: {e}"
+                logger.warning(f"请求异常 [{attempt}/{max_retries}]: {e}")
+            finally:
+                end_time = time.time()
+                elapsed_ms = int((end_time - start_time) * 1000)
+                status_code = response.status_code if response is not None else None
+                if controller:
+                    controller.release(status_code, elapsed_ms)
+                if breaker:
+                    breaker.record(status_code)
+                connect_ms, tls_ms = take_connect_timing()
+                if headers_at is not None:
+                    ttfb_ms = max(0, int((headers_at - start_time) * 1000) - connect_ms - tls_ms)
+                    transfer_ms = int((end_time - headers_at) * 1000)
+                else:
+                    ttfb_ms, transfer_ms = 0, 0
+                if result is not None:
+                    result.add_attempt_timing(connect_ms, tls_ms, ttfb_ms, transfer_ms)
+
+            if response is not None:
                 logger.debug(
                     f"请求完成 [{attempt}/{max_retries}] {url} "
-                    f"status={response.status_code} elapsed={elapsed_ms}ms"
+                    f"status={response.status_code} elapsed={elapsed_ms}ms "
+                    f"(connect={connect_ms} tls={tls_ms} ttfb={ttfb_ms} transfer={transfer_ms})"
                 )
 
+                # 会话过期：刷新一次后重发（不占用重试次数）
+                if response.status_code == 401 and login_handler and not refreshed:
+                    refreshed = True
+                    if login_handler.refresh(self._session, generation):
+                        attempt -= 1
+                        continue
+
                 # 如果状态码在重试列表中且还有重试机会，则重试
                 if response.status_code in retry_status_codes and attempt < max_retries:
+                    delay = self.retry_delay(attempt)
                     logger.warning(
-                        f"HTTP {response.status_code}，{retry_interval}秒后重试 "
+                        f"HTTP {response.status_code}，{delay:.1f}秒后重试 "
                         f"[{attempt}/{max_retries}]"
                     )
-                    time.sleep(retry_interval)
+                    self._backoff(delay, result)
                     continue
 
                 return response
 
-            except requests.exceptions.ConnectionError as e:
-                last_error = f"连接失败: {e}"
-                logger.warning(f"连接失败 [{attempt}/{max_retries}]: {e}")
-            except requests.exceptions.Timeout as e:
-                last_error = f"请求超时: {e}"
-                logger.warning(f"请求超时 [{attempt}/{max_retries}]: {e}")
-            except requests.exceptions.RequestException as e:
-                last_error = f"请求异常: {e}"
-                logger.warning(f"请求异常 [{attempt}/{max_retries}]: {e}")
-
             if attempt < max_retries:
-                logger.info(f"{retry_interval}秒后重试...")
-                time.sleep(retry_interval)
+                delay = self.retry_delay(attempt)
+                logger.info(f"{delay:.1f}秒后重试...")
+                self._backoff(delay, result)
 
         logger.error(f"所有 {max_retries} 次重试均失败: {last_error}")
         return None
 
+    @staticmethod
+    def _backoff(seconds: float, result: Optional[TestResult]) -> None:
+        """重试前等待，并将等待时间计入 result.backoff_ms"""
+        time.sleep(seconds)
+        if result is not None:
+            result.backoff_ms += int(seconds * 1000)
+
     def _parse_response(self, result: TestResult, body: dict):
         """解析接口返回的 JSON 数据
 
@@ -234,3 +432,24 @@ class HttpClient:
         if self._session:
             self._session.close()
             logger.debug("HTTP Session 已关闭")
+
+
+def _write_new_file(base: str, ext: str, content: bytes) -> str:
+    """写入 base + ext；文件已存在时依次尝试 base_1 + ext、base_2 + ext ...，不覆盖已有文件
+
+    重复的 (claimId, itemId)、熔断后重新排队的请求、续跑与分片进程都可能写同一个键，
+    以独占方式创建文件，多线程 / 多进程同时写入也不会互相覆盖。
+
+    Returns:
+        实际写入的文件路径
+    """
+    path = f"{base}{ext}"
+    n = 0
+    while True:
+        try:
+            with open(path, "xb") as f:
+                f.write(content)
+            return path
+        except FileExistsError:
+            n += 1
+            path = f"{base}_{n}{ext}"
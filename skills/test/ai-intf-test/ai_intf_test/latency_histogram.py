@@ -0,0 +1,191 @@
+"""延迟直方图模块：低开销的流式分位数统计
+
+LatencyHistogram 采用 HDR 风格的对数-线性分桶：小于 128ms 的值精确计数，
+更大的值保留最高 7 个有效二进制位（相对误差 < 1.6%）。记录一次只需一次
+位运算和一次字典累加，内存占用与样本数无关，且可合并（用于多进程分片汇总）。
+"""
+from __future__ import annotations
+
+import json
+import os
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+_SUB_BUCKET_BITS = 7
+_SUB_BUCKET_COUNT = 1 << _SUB_BUCKET_BITS          # 128
+_HALF_SUB_BUCKET_COUNT = _SUB_BUCKET_COUNT >> 1    # 64
+
+REPORT_PERCENTILES = (50, 90, 99)
+
+# 分阶段耗时（与 TestResult 字段对应）
+PHASES = ("connect", "tls", "ttfb", "transfer", "backoff")
+
+
+def _bucket_index(value: int) -> int:
+    if value < _SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - _SUB_BUCKET_BITS
+    return (shift + 1) * _HALF_SUB_BUCKET_COUNT + (value >> shift) - _HALF_SUB_BUCKET_COUNT
+
+
+def _bucket_upper_bound(index: int) -> int:
+    """桶内可能的最大值（分位数按桶上界报告，保证不低估尾延迟）"""
+    if index < _SUB_BUCKET_COUNT:
+        return index
+    shift = index // _HALF_SUB_BUCKET_COUNT - 1
+    mantissa = index - shift * _HALF_SUB_BUCKET_COUNT
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """单维度延迟直方图（单位：毫秒）"""
+
+    def __init__(self) -> None:
+        self._counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max = 0
+
+    def record(self, value_ms: int) -> None:
+        value = max(0, int(value_ms))
+        idx = _bucket_index(value)
+        self._counts[idx] = self._counts.get(idx, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def record_values(self, values: Iterable[int]) -> None:
+        """批量记录样本：先按取值计数再分桶，大批量时比逐个 record 快一个数量级"""
+        for value, n in Counter(values).items():
+            value = max(0, int(value))
+            idx = _bucket_index(value)
+            self._counts[idx] = self._counts.get(idx, 0) + n
+            self.count += n
+            self.total += value * n
+            if self.min is None or value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """合并另一个直方图的样本"""
+        for idx, c in other._counts.items():
+            self._counts[idx] = self._counts.get(idx, 0) + c
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> int:
+        """返回第 p 百分位延迟（0 < p <= 100）"""
+        if not self.count:
+            return 0
+        rank = max(1, int(round(p / 100.0 * self.count)))
+        seen = 0
+        for idx in sorted(self._counts):
+            seen += self._counts[idx]
+            if seen >= rank:
+                return min(_bucket_upper_bound(idx), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, float]:
+        data = {"count": self.count, "mean": round(self.mean, 1), "min": self.min or 0}
+        for p in REPORT_PERCENTILES:
+            data[f"p{p}"] = self.percentile(p)
+        data["max"] = self.max
+        return data
+
+    def to_state(self) -> Dict:
+        """导出完整分桶状态（可跨进程传递后用 from_state 还原并合并）"""
+        return {
+            "counts": self._counts,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "LatencyHistogram":
+        hist = cls()
+        hist._counts = {int(k): v for k, v in state["counts"].items()}
+        hist.count = state["count"]
+        hist.total = state["total"]
+        hist.min = state["min"]
+        hist.max = state["max"]
+        return hist
+
+
+class LatencyRecorder:
+    """整体 + 按服务（eer / ptp / claim ...）分组的延迟统计"""
+
+    def __init__(self) -> None:
+        self.overall = LatencyHistogram()
+        self.by_service: Dict[str, LatencyHistogram] = {}
+        # 分阶段耗时与重试统计（只有 record_phases 调用过才出现在摘要中）
+        self.phases: Dict[str, LatencyHistogram] = {}
+        self.attempts = 0
+        self.retried = 0
+
+    def record(self, service: str, value_ms: int) -> None:
+        self.overall.record(value_ms)
+        hist = self.by_service.get(service)
+        if hist is None:
+            hist = self.by_service[service] = LatencyHistogram()
+        hist.record(value_ms)
+
+    def record_phases(self, attempts: int, **phase_ms: int) -> None:
+        """记录单条结果的分阶段耗时，如 record_phases(2, connect=3, tls=0, ttfb=120, ...)"""
+        for phase, value in phase_ms.items():
+            hist = self.phases.get(phase)
+            if hist is None:
+                hist = self.phases[phase] = LatencyHistogram()
+            hist.record(value)
+        self.attempts += attempts
+        self.retried += attempts > 1
+
+    def merge(self, other: "LatencyRecorder") -> None:
+        self.overall.merge(other.overall)
+        for service, hist in other.by_service.items():
+            self.by_service.setdefault(service, LatencyHistogram()).merge(hist)
+        for phase, hist in other.phases.items():
+            self.phases.setdefault(phase, LatencyHistogram()).merge(hist)
+        self.attempts += other.attempts
+        self.retried += other.retried
+
+    def summary(self) -> Dict[str, Dict]:
+        """{"overall": {...}, "services": {"eer": {...}, ...}}
+
+        记录过分阶段耗时时额外包含 "phases"（按 PHASES 顺序）与 "retries"。
+        """
+        data = {
+            "overall": self.overall.to_dict(),
+            "services": {
+                service: hist.to_dict()
+                for service, hist in sorted(self.by_service.items())
+            },
+        }
+        if self.phases:
+            data["phases"] = {
+                phase: self.phases[phase].to_dict() for phase in PHASES if phase in self.phases
+            }
+            data["retries"] = {"attempts": self.attempts, "retried": self.retried}
+        return data
+
+    def write_json(self, path: str) -> str:
+        """将分位数摘要写为 JSON 文件，便于不同运行之间对比"""
+        output_dir = os.path.dirname(path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        return path
@@ -0,0 +1,288 @@
+"""压测模块：按目标到达率（开环）驱动 submitValidate 请求
+
+与 TestPipeline 的闭环模式（提交全部数据后等待完成）不同，压测模式按预定时间表
+发出请求，不受服务端响应快慢影响，用于回答"validate 服务在 200 req/s 下持续
+10 分钟表现如何"这类问题：
+- 负载曲线由若干阶段组成，每段可恒定速率或线性爬坡
+- 从 Excel 读取的 claimId 循环回放
+- 按时间窗口统计吞吐、错误率与延迟分位数；延迟从计划发送时刻起算，
+  避免客户端排队掩盖服务端变慢（coordinated omission）
+- 为反映服务端真实表现，压测请求不做重试
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+
+from .config_loader import AppConfig
+from .excel_io import read_test_inputs
+from .http_client import HttpClient
+from .latency_histogram import LatencyHistogram, LatencyRecorder
+from .login_handler import LoginHandler
+from .models import TestInput, TestResult
+
+logger = logging.getLogger(__name__)
+
+# (起始速率, 结束速率, 持续秒数)
+LoadStage = Tuple[float, float, float]
+
+
+def parse_load_profile(profile: str) -> List[LoadStage]:
+    """解析负载曲线
+
+    格式: 逗号分隔的阶段，每段为 "速率:秒数"（恒定）或 "起始-结束:秒数"（线性爬坡）
+    例如 "10-200:120,200:600" 表示 2 分钟内从 10 爬升到 200 req/s，再保持 10 分钟。
+    """
+    stages: List[LoadStage] = []
+    for part in profile.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            rate_spec, duration = part.split(":")
+            if "-" in rate_spec:
+                start_rate, end_rate = (float(x) for x in rate_spec.split("-"))
+            else:
+                start_rate = end_rate = float(rate_spec)
+            stages.append((start_rate, end_rate, float(duration)))
+        except ValueError:
+            raise ValueError(f"负载曲线格式错误: {part}（应为 速率:秒数 或 起始-结束:秒数）")
+    if not stages:
+        raise ValueError(f"负载曲线为空: {profile}")
+    return stages
+
+
+def iter_arrival_offsets(stages: List[LoadStage]) -> Iterator[float]:
+    """按负载曲线生成每个请求相对开始时刻的计划发送时间（秒）"""
+    base = 0.0
+    for start_rate, end_rate, duration in stages:
+        t = 0.0
+        while t < duration:
+            rate = start_rate + (end_rate - start_rate) * t / duration
+            if rate <= 0:
+                t += 0.1
+                continue
+            yield base + t
+            t += 1.0 / rate
+        base += duration
+
+
+class _WindowStats:
+    """单个时间窗口的统计"""
+
+    def __init__(self) -> None:
+        self.sent = 0
+        self.completed = 0
+        self.errors = 0
+        self.dropped = 0
+        self.latency = LatencyHistogram()
+
+    def to_dict(self, index: int, window_seconds: int) -> Dict:
+        data = {
+            "window": index,
+            "start_s": index * window_seconds,
+            "sent": self.sent,
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "throughput": round(self.completed / window_seconds, 1),
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.completed, 4) if self.completed else 0.0,
+        }
+        data.update(self.latency.to_dict())
+        return data
+
+
+class LoadGenerator:
+    """开环压测执行器"""
+
+    def __init__(self, config: AppConfig) -> None:
+        self.config = config
+        load = config.load
+        self._stages = (
+            parse_load_profile(load.profile)
+            if load.profile
+            else [(load.rate, load.rate, float(load.duration))]
+        )
+        self._window_seconds = max(1, load.window_seconds)
+        self._max_in_flight = max(1, load.max_in_flight)
+        self._login_handler = None
+        if config.auth.type.lower() == "login" and config.login.enabled:
+            self._login_handler = LoginHandler(login_config=config.login, server_config=config.server)
+        self.http_client = HttpClient(
+            server_config=config.server,
+            auth_config=config.auth,
+            retry_config=replace(config.retry, max_retries=1),
+            url_template=config.url.template,
+            routing_config=config.routing,
+            pool_maxsize=self._max_in_flight,
+            raw_response_mode="none",
+            login_handler=self._login_handler,
+        )
+
+        self._lock = threading.Lock()
+        self._windows: Dict[int, _WindowStats] = {}
+        self._latency = LatencyRecorder()
+        self._in_flight = 0
+
+    def run(self) -> Dict:
+        """执行压测并返回报告（同时打印并写出 JSON）"""
+        cfg = self.config
+        os.makedirs(cfg.output.output_dir, exist_ok=True)
+
+        if self._login_handler is not None:
+            if not self._login_handler.login_and_inject(self.http_client.session):
+                print("\n  登录失败，压测终止\n")
+                logger.error("登录失败，压测终止")
+                return {}
+
+        inputs = read_test_inputs(
+            excel_path=cfg.excel.input_path,
+            sheet_name=cfg.excel.sheet_name,
+            claim_id_column=cfg.excel.columns.claim_id,
+            item_id_column=cfg.excel.columns.item_id,
+        )
+        if not inputs:
+            logger.warning("未读取到测试数据，压测结束")
+            return {}
+
+        total_duration = sum(stage[2] for stage in self._stages)
+        print(f"\n{'='*60}")
+        print(f"  submitValidate 压测（开环）")
+        print(f"  目标服务器: {cfg.server.base_url}")
+        print(f"  负载曲线:   {self._describe_stages()}")
+        print(f"  总时长:     {total_duration:.0f}s，回放 {len(inputs)} 条 claimId")
+        print(f"  最大在途:   {self._max_in_flight}")
+        print(f"{'='*60}\n")
+
+        start = time.monotonic()
+        self._dispatch(inputs, start)
+        elapsed = time.monotonic() - start
+
+        report = self._build_report(elapsed)
+        output_path = cfg.load.output_path.replace(
+            "{timestamp}", datetime.now().strftime("%Y%m%d_%H%M%S")
+        )
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        self._print_report(report, output_path)
+        self.http_client.close()
+        return report
+
+    def _dispatch(self, inputs: List[TestInput], start: float) -> None:
+        """按计划时间表发出请求；在途请求超过 max_in_flight 的 4 倍时丢弃并计数"""
+        max_backlog = self._max_in_flight * 4
+        last_report_window = 0
+
+        with ThreadPoolExecutor(max_workers=self._max_in_flight) as executor:
+            for seq, offset in enumerate(iter_arrival_offsets(self._stages)):
+                scheduled = start + offset
+                delay = scheduled - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+                window_idx = int(offset // self._window_seconds)
+                if window_idx > last_report_window:
+                    last_report_window = window_idx
+                    print(f"  [{offset:>6.0f}s] 已发送 {seq} 个请求，在途 {self._in_flight}")
+
+                with self._lock:
+                    window = self._window(window_idx)
+                    if self._in_flight >= max_backlog:
+                        window.dropped += 1
+                        continue
+                    window.sent += 1
+                    self._in_flight += 1
+
+                test_input = inputs[seq % len(inputs)]
+                executor.submit(self._fire, test_input, scheduled, window_idx)
+
+    def _fire(self, test_input: TestInput, scheduled: float, window_idx: int) -> None:
+        try:
+            result = self.http_client.execute(test_input)
+        except Exception as e:
+            result = TestResult(
+                claim_id=test_input.claim_id,
+                item_id=test_input.item_id,
+                url="",
+                service_type=self.http_client.resolve_service_name(test_input.item_id),
+                error=str(e),
+            )
+        latency_ms = int((time.monotonic() - scheduled) * 1000)
+        is_error = bool(result.error) or result.status_code >= 500 or result.status_code == 429
+
+        with self._lock:
+            self._in_flight -= 1
+            window = self._window(window_idx)
+            window.completed += 1
+            window.errors += is_error
+            window.latency.record(latency_ms)
+            self._latency.record(result.service_type, latency_ms)
+
+    def _window(self, idx: int) -> _WindowStats:
+        window = self._windows.get(idx)
+        if window is None:
+            window = self._windows[idx] = _WindowStats()
+        return window
+
+    def _describe_stages(self) -> str:
+        parts = []
+        for start_rate, end_rate, duration in self._stages:
+            rate = f"{start_rate:g}" if start_rate == end_rate else f"{start_rate:g}→{end_rate:g}"
+            parts.append(f"{rate} req/s × {duration:g}s")
+        return "，".join(parts)
+
+    def _build_report(self, elapsed: float) -> Dict:
+        windows = [
+            self._windows[idx].to_dict(idx, self._window_seconds)
+            for idx in sorted(self._windows)
+        ]
+        completed = sum(w["completed"] for w in windows)
+        errors = sum(w["errors"] for w in windows)
+        return {
+            "target": self.config.server.base_url,
+            "stages": [
+                {"start_rate": s, "end_rate": e, "duration_s": d} for s, e, d in self._stages
+            ],
+            "window_seconds": self._window_seconds,
+            "elapsed_s": round(elapsed, 1),
+            "sent": sum(w["sent"] for w in windows),
+            "completed": completed,
+            "dropped": sum(w["dropped"] for w in windows),
+            "throughput": round(completed / elapsed, 1) if elapsed else 0.0,
+            "error_rate": round(errors / completed, 4) if completed else 0.0,
+            "latency": self._latency.summary(),
+            "windows": windows,
+        }
+
+    @staticmethod
+    def _print_report(report: Dict, output_path: str) -> None:
+        overall = report["latency"]["overall"]
+        print(f"\n{'='*60}")
+        print(f"  压测完成！")
+        print(f"  总耗时:   {report['elapsed_s']}s")
+        print(f"  发送/完成/丢弃: {report['sent']}/{report['completed']}/{report['dropped']}")
+        print(f"  吞吐:     {report['throughput']} req/s")
+        print(f"  错误率:   {report['error_rate']:.2%}")
+        print(
+            f"  延迟分位: p50={overall['p50']}ms p90={overall['p90']}ms "
+            f"p99={overall['p99']}ms max={overall['max']}ms"
+        )
+        print(f"\n  {'窗口':>8} {'吞吐':>8} {'错误率':>8} {'p50':>7} {'p90':>7} {'p99':>7} {'max':>7}")
+        for w in report["windows"]:
+            print(
+                f"  {w['start_s']:>7}s {w['throughput']:>8} {w['error_rate']:>8.2%} "
+                f"{w['p50']:>7} {w['p90']:>7} {w['p99']:>7} {w['max']:>7}"
+            )
+        print(f"\n  报告文件: {output_path}")
+        print(f"{'='*60}\n")
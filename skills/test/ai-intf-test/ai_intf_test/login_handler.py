@@ -1,7 +1,17 @@
-"""登录处理模块：调用登录接口获取 Cookie，注入到 HTTP Session 中"""
+"""登录处理模块：调用登录接口获取 Cookie，注入到 HTTP Session 中
+
+配置了 login.cache_path 时，登录得到的 Cookie / Token 会缓存到本地文件（权限 0600），
+有效期内的后续运行直接复用，不再重复登录；运行中遇到 HTTP 401 时由 refresh() 统一
+重新登录一次，其他并发 worker 等待该次刷新完成后复用新会话；重新登录失败后本次运行
+不再尝试登录（避免凭据失效时每个 401 都触发一次登录导致账号被锁定）。
+"""
 from __future__ import annotations
 
+import json
 import logging
+import os
+import threading
+import time
 from http.cookiejar import CookieJar
 from typing import Dict, Optional
 
@@ -19,15 +29,29 @@ class LoginHandler:
     并将其注入到指定的 requests.Session 中，供后续接口调用使用。
     """
 
+    # 会话中由登录流程写入、需要缓存的请求头
+    _SESSION_HEADERS = ("Cookie", "Authorization")
+
     def __init__(self, login_config: LoginConfig, server_config: ServerConfig) -> None:
         self._config = login_config
         self._server_config = server_config
-
-    def login_and_inject(self, session: requests.Session) -> bool:
+        # 401 刷新的 single-flight 控制：generation 每完成一次刷新加 1
+        self._refresh_lock = threading.Lock()
+        self._generation = 0
+        # 重新登录失败后置位，本次运行内后续的 401 不再触发登录
+        self._refresh_failed = False
+
+    @property
+    def generation(self) -> int:
+        """会话代数：发送请求前记录，遇到 401 时传给 refresh() 判断是否已被其他 worker 刷新"""
+        return self._generation
+
+    def login_and_inject(self, session: requests.Session, use_cache: bool = True) -> bool:
         """执行登录并将获取到的 Cookie 注入到 session 中
 
         Args:
             session: 需要注入 Cookie 的 requests.Session 实例
+            use_cache: 是否优先复用本地缓存中未过期的会话
 
         Returns:
             True 表示登录成功，False 表示登录失败
@@ -36,6 +60,45 @@ class LoginHandler:
             logger.info("登录未启用，跳过")
             return True
 
+        if use_cache and self._restore_cached_session(session):
+            return True
+
+        if not self._login(session):
+            return False
+        self._save_cached_session(session)
+        return True
+
+    def refresh(self, session: requests.Session, seen_generation: int) -> bool:
+        """会话失效（HTTP 401）时重新登录，同一时刻只有一个 worker 真正执行登录
+
+        Args:
+            session: 需要重新注入 Cookie 的 Session
+            seen_generation: 发出收到 401 的请求前读取的 generation
+
+        Returns:
+            True 表示会话已刷新（本线程或其他线程完成），可以重发请求；
+            本次运行中重新登录已失败过时直接返回 False
+        """
+        if self._refresh_failed:
+            return False
+        with self._refresh_lock:
+            if self._refresh_failed:
+                return False
+            if self._generation != seen_generation:
+                # 等待期间其他 worker 已完成刷新，直接复用
+                return True
+
+            logger.warning("收到 HTTP 401，会话已失效，重新登录")
+            self._clear_cached_session()
+            if not self.login_and_inject(session, use_cache=False):
+                self._refresh_failed = True
+                logger.error("重新登录失败，本次运行不再重试登录，后续收到 401 的请求直接记为失败")
+                return False
+            self._generation += 1
+            return True
+
+    def _login(self, session: requests.Session) -> bool:
+        """调用登录接口并将 Cookie / Token 注入 session"""
         login_url = self._config.url
         if not login_url:
             logger.error("登录 URL 为空，无法登录")
@@ -113,6 +176,78 @@ class LoginHandler:
             logger.error(f"登录异常: {e}", exc_info=True)
             return False
 
+    def _cache_key(self) -> str:
+        """缓存键：登录地址 + 用户名（不包含密码）"""
+        return f"{self._config.url}|{self._config.usernum}"
+
+    def _restore_cached_session(self, session: requests.Session) -> bool:
+        """从缓存文件恢复未过期的会话，成功返回 True"""
+        path = self._config.cache_path
+        if not path or self._config.cache_ttl_seconds <= 0:
+            return False
+
+        entry = _read_cache_file(path).get(self._cache_key())
+        if not entry:
+            return False
+        remaining = entry.get("expires_at", 0) - time.time()
+        if remaining <= 0:
+            logger.info("缓存的登录会话已过期，重新登录")
+            return False
+
+        for cookie in entry.get("cookies", []):
+            session.cookies.set(
+                cookie["name"], cookie["value"],
+                domain=cookie.get("domain", ""), path=cookie.get("path", "/"),
+            )
+        session.headers.update(entry.get("headers", {}))
+
+        print(f"  复用缓存的登录会话 (用户: {self._config.usernum}，剩余有效期 {remaining:.0f}s)")
+        logger.info(f"复用缓存的登录会话: {path}，剩余有效期 {remaining:.0f}s")
+        return True
+
+    def _save_cached_session(self, session: requests.Session) -> None:
+        """将当前会话写入缓存文件
+
+        有效期取 cache_ttl_seconds 与 Cookie 自身过期时间中较早者。
+        """
+        path = self._config.cache_path
+        if not path or self._config.cache_ttl_seconds <= 0:
+            return
+
+        now = time.time()
+        expires_at = now + self._config.cache_ttl_seconds
+        cookies = []
+        for cookie in session.cookies:
+            cookies.append({
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+            })
+            if cookie.expires:
+                expires_at = min(expires_at, cookie.expires)
+
+        data = _read_cache_file(path)
+        data[self._cache_key()] = {
+            "headers": {
+                k: session.headers[k] for k in self._SESSION_HEADERS if k in session.headers
+            },
+            "cookies": cookies,
+            "saved_at": now,
+            "expires_at": expires_at,
+        }
+        _write_cache_file(path, data)
+        logger.debug(f"登录会话已缓存: {path}")
+
+    def _clear_cached_session(self) -> None:
+        """删除缓存中当前用户的会话"""
+        path = self._config.cache_path
+        if not path:
+            return
+        data = _read_cache_file(path)
+        if data.pop(self._cache_key(), None) is not None:
+            _write_cache_file(path, data)
+
     def _extract_token_from_body(self, response: requests.Response) -> Optional[str]:
         """尝试从响应体 JSON 中提取 Token
 
@@ -165,3 +300,33 @@ class LoginHandler:
             logger.info(f"登录响应: success={success}, code={code}, message={message}")
         except Exception:
             logger.debug(f"登录响应体非 JSON: {response.text[:200]}")
+
+
+def _read_cache_file(path: str) -> Dict[str, dict]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"登录缓存文件读取失败，忽略: {path} ({e})")
+        return {}
+
+
+def _write_cache_file(path: str, data: Dict[str, dict]) -> None:
+    """先写临时文件再替换，避免多进程分片同时写入时读到半个文件
+
+    文件包含明文 Cookie / Authorization，创建时即设为仅当前用户可读写（0600）。
+    """
+    cache_dir = os.path.dirname(path)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"登录缓存文件写入失败: {path} ({e})")
@@ -59,6 +59,21 @@ def main():
   # 直接指定输入 Excel（覆盖配置文件中的设置）
   python -m ai_intf_test.main --input ./excel/my_test.xlsx
 
+  # 异步模式批量运行（需 pip install aiohttp）
+  python -m ai_intf_test.main --mode async
+
+  # 多进程分片：数十万行的大工作簿拆给 4 个进程并行（每进程各自登录、各自并发）
+  python -m ai_intf_test.main --processes 4 --mode async
+
+  # 中断后续跑（跳过 checkpoint 中已完成的 claimId，需配置 output.checkpoint_path）
+  python -m ai_intf_test.main --resume
+
+  # 压测：200 req/s 持续 10 分钟（可先启动本地桩服务 python -m ai_intf_test.stub_server）
+  python -m ai_intf_test.main --load-rate 200 --load-duration 600
+
+  # 发布后与上一次运行对比（pass→fail、新增校验项、延迟回归；需配置 output.result_store_dir）
+  python -m ai_intf_test.diff --store-dir ./output/runs
+
   # 指定服务器地址（覆盖配置文件中的设置）
   python -m ai_intf_test.main --base-url http://10.60.137.24:8080
 
@@ -97,12 +112,68 @@ def main():
         default=None,
         help="启用并发模式",
     )
+    parser.add_argument(
+        "--mode",
+        type=str,
+        choices=["thread", "async"],
+        default=None,
+        help="并发模式：thread（线程池）/ async（asyncio，需要 aiohttp），指定即启用并发",
+    )
     parser.add_argument(
         "--workers", "-w",
         type=int,
         default=None,
         help="并发工作线程数",
     )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=None,
+        help="全局限速（每秒请求数，所有 worker 共享）",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        default=None,
+        help="启用自适应并发（根据延迟与 429/503 等背压状态码自动调整并发数）",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="分片进程数：>1 时按行拆分到多个子进程执行，结果合并为一份报告",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=None,
+        help="断点续跑：跳过 checkpoint 中已有结果的 claimId，报告包含历史结果",
+    )
+    parser.add_argument(
+        "--report-style",
+        type=str,
+        choices=["styled", "plain", "csv"],
+        default=None,
+        help="报告明细写出方式：styled（着色）/ plain（不设样式）/ csv（明细写 .csv，百万行级推荐）",
+    )
+    parser.add_argument(
+        "--load-rate",
+        type=float,
+        default=None,
+        help="压测模式：恒定目标速率（req/s）",
+    )
+    parser.add_argument(
+        "--load-duration",
+        type=int,
+        default=None,
+        help="压测模式：持续时间（秒）",
+    )
+    parser.add_argument(
+        "--load-profile",
+        type=str,
+        default=None,
+        help='压测模式：负载曲线，如 "10-200:120,200:600"',
+    )
     parser.add_argument(
         "--usernum",
         type=str,
@@ -138,9 +209,32 @@ def main():
         config.auth.token = args.token
     if args.concurrent:
         config.concurrency.enabled = True
+    if args.mode:
+        config.concurrency.mode = args.mode
+        config.concurrency.enabled = True
     if args.workers:
         config.concurrency.max_workers = args.workers
         config.concurrency.enabled = True
+    if args.rate_limit is not None:
+        config.concurrency.rate_limit = args.rate_limit
+    if args.adaptive:
+        config.concurrency.adaptive = True
+        config.concurrency.enabled = True
+    if args.processes:
+        config.concurrency.processes = max(1, args.processes)
+    if args.resume:
+        config.output.resume = True
+    if args.report_style:
+        config.output.report_style = args.report_style
+    if args.load_rate is not None:
+        config.load.rate = args.load_rate
+        config.load.enabled = True
+    if args.load_duration is not None:
+        config.load.duration = args.load_duration
+        config.load.enabled = True
+    if args.load_profile:
+        config.load.profile = args.load_profile
+        config.load.enabled = True
     if args.usernum:
         config.login.usernum = args.usernum
         config.login.enabled = True
@@ -159,6 +253,18 @@ def main():
         console_output=config.log.console_output,
     )
 
+    # 压测模式
+    if config.load.enabled:
+        from .load_generator import LoadGenerator
+        LoadGenerator(config).run()
+        return
+
+    # 多进程分片模式
+    if config.concurrency.processes > 1:
+        from .sharded_runner import ShardedRunner
+        ShardedRunner(config).run()
+        return
+
     # 运行测试
     from .pipeline import TestPipeline
     pipeline = TestPipeline(config)
@@ -6,7 +6,7 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class TestInput:
     """从 Excel 读取的单条测试输入"""
     claim_id: int
@@ -14,7 +14,7 @@ class TestInput:
     row_index: int  # Excel 中的行号（用于回写）
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidateResult:
     """单条校验结果项"""
     name: str
@@ -22,8 +22,25 @@ class ValidateResult:
     severity: str  # PASS / ERROR / WARNING
     args: Optional[List[Any]] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "message": self.message,
+            "severity": self.severity,
+            "args": self.args,
+        }
 
-@dataclass
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ValidateResult":
+        return cls(
+            name=data.get("name", ""),
+            message=data.get("message", ""),
+            severity=data.get("severity", "UNKNOWN"),
+            args=data.get("args"),
+        )
+
+
+@dataclass(slots=True)
 class TestResult:
     """单条测试完整结果"""
     claim_id: int
@@ -38,12 +55,82 @@ class TestResult:
     trace_id: Optional[str] = None
     test_time: str = ""
     response_time_ms: int = 0
+    # 分阶段耗时（毫秒，多次尝试累加）：TCP 建连 / TLS 握手 / 首字节 / 响应体传输
+    connect_ms: int = 0
+    tls_ms: int = 0
+    ttfb_ms: int = 0
+    transfer_ms: int = 0
+    attempts: int = 0  # 实际发送次数（含重试）
+    backoff_ms: int = 0  # 重试前等待的总时长
+    from_cache: bool = False  # 是否复用了相同 (claimId, itemId) 请求的结果（未发送网络请求）
     raw_response: Optional[Dict[str, Any]] = None
+    raw_response_path: Optional[str] = None  # raw_response 落盘时的文件路径
 
     def __post_init__(self):
         if not self.test_time:
             self.test_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化为可写入 JSON 的字典（用于断点续跑的 checkpoint 文件）"""
+        return {
+            "claimId": self.claim_id,
+            "itemId": self.item_id,
+            "url": self.url,
+            "serviceType": self.service_type,
+            "statusCode": self.status_code,
+            "success": self.success,
+            "pass": self.passed,
+            "results": [r.to_dict() for r in self.results],
+            "error": self.error,
+            "traceId": self.trace_id,
+            "testTime": self.test_time,
+            "responseTimeMs": self.response_time_ms,
+            "connectMs": self.connect_ms,
+            "tlsMs": self.tls_ms,
+            "ttfbMs": self.ttfb_ms,
+            "transferMs": self.transfer_ms,
+            "attempts": self.attempts,
+            "backoffMs": self.backoff_ms,
+            "fromCache": self.from_cache,
+            "rawResponsePath": self.raw_response_path,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TestResult":
+        """从 to_dict() 的输出还原 TestResult（不含 raw_response）"""
+        return cls(
+            claim_id=data["claimId"],
+            item_id=data["itemId"],
+            url=data.get("url", ""),
+            service_type=data.get("serviceType", ""),
+            status_code=data.get("statusCode", 0),
+            success=data.get("success", False),
+            passed=data.get("pass", False),
+            results=[ValidateResult.from_dict(r) for r in data.get("results") or []],
+            error=data.get("error"),
+            trace_id=data.get("traceId"),
+            test_time=data.get("testTime", ""),
+            response_time_ms=data.get("responseTimeMs", 0),
+            connect_ms=data.get("connectMs", 0),
+            tls_ms=data.get("tlsMs", 0),
+            ttfb_ms=data.get("ttfbMs", 0),
+            transfer_ms=data.get("transferMs", 0),
+            attempts=data.get("attempts", 0),
+            backoff_ms=data.get("backoffMs", 0),
+            from_cache=data.get("fromCache", False),
+            raw_response_path=data.get("rawResponsePath"),
+        )
+
+    def add_attempt_timing(
+        self, connect_ms: int, tls_ms: int, ttfb_ms: int, transfer_ms: int
+    ) -> None:
+        """累加一次发送尝试的分阶段耗时"""
+        self.attempts += 1
+        self.connect_ms += connect_ms
+        self.tls_ms += tls_ms
+        self.ttfb_ms += ttfb_ms
+        self.transfer_ms += transfer_ms
+
     @property
     def results_summary(self) -> str:
         """校验结果摘要"""
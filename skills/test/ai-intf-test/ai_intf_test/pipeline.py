@@ -1,18 +1,30 @@
 """流程编排模块：串联 Excel读取 → HTTP请求 → 结果写出"""
 from __future__ import annotations
 
+import asyncio
+import heapq
+import itertools
 import logging
 import os
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import List
+from typing import Iterable, List, Optional, Tuple
 
+from .async_http_client import AsyncHttpClient
+from .circuit_breaker import CircuitOpenError, create_circuit_breakers
+from .checkpoint import CheckpointWriter, iter_checkpoint, load_completed_keys, skip_completed
 from .config_loader import AppConfig
-from .excel_io import read_test_inputs, write_test_results
+from .excel_io import estimate_data_rows, iter_test_inputs, results_csv_path, write_test_results
 from .http_client import HttpClient
+from .latency_histogram import LatencyRecorder
 from .login_handler import LoginHandler
 from .models import TestInput, TestResult
+from .rate_limiter import create_concurrency_controller, create_rate_limiter
+from .response_cache import create_response_cache
+from .result_stats import ResultSummary
+from .result_store import save_run
 
 logger = logging.getLogger(__name__)
 
@@ -22,13 +34,35 @@ class TestPipeline:
 
     def __init__(self, config: AppConfig) -> None:
         self.config = config
+        self._login_handler: Optional[LoginHandler] = None
+        if config.auth.type.lower() == "login" and config.login.enabled:
+            self._login_handler = LoginHandler(
+                login_config=config.login,
+                server_config=config.server,
+            )
+        self._circuit_breakers = create_circuit_breakers(config.circuit_breaker)
+        self._requeued = 0
         self.http_client = HttpClient(
             server_config=config.server,
             auth_config=config.auth,
             retry_config=config.retry,
             url_template=config.url.template,
             routing_config=config.routing,
+            rate_limiter=create_rate_limiter(config.concurrency),
+            concurrency_controller=create_concurrency_controller(
+                config.concurrency, config.retry
+            ),
+            pool_maxsize=config.concurrency.max_workers,
+            raw_response_mode=config.output.keep_raw_response,
+            raw_spill_dir=config.output.raw_response_dir,
+            login_handler=self._login_handler,
+            circuit_breakers=self._circuit_breakers,
+            response_cache=create_response_cache(config.response_cache),
         )
+        self._checkpoint: Optional[CheckpointWriter] = None
+        self._latency = LatencyRecorder()
+        # 进度行前缀（分片模式下标注分片号）
+        self._progress_prefix = ""
 
     def _ensure_dirs(self) -> None:
         """确保输出和日志目录存在"""
@@ -47,138 +81,432 @@ class TestPipeline:
         cfg = self.config
 
         # 0. 登录流程（当 auth.type=login 时）
-        if cfg.auth.type.lower() == "login" and cfg.login.enabled:
-            login_handler = LoginHandler(
-                login_config=cfg.login,
-                server_config=cfg.server,
-            )
-            login_ok = login_handler.login_and_inject(self.http_client.session)
-            if not login_ok:
-                print("\n  登录失败，测试终止\n")
-                logger.error("登录失败，测试终止")
-                return []
-
-        # 1. 读取测试输入
-        logger.info(f"正在读取 Excel: {cfg.excel.input_path}")
-        inputs = read_test_inputs(
-            excel_path=cfg.excel.input_path,
-            sheet_name=cfg.excel.sheet_name,
-            claim_id_column=cfg.excel.columns.claim_id,
-            item_id_column=cfg.excel.columns.item_id,
-        )
-
-        if not inputs:
-            logger.warning("未读取到测试数据，流程结束")
+        if not self.login():
             return []
 
-        logger.info(f"读取到 {len(inputs)} 条测试数据，开始执行...")
+        # 1. 流式读取测试输入（边读边发送，不预先加载整张表）
+        inputs, total_hint, done_keys = self._open_inputs()
+
         print(f"\n{'='*60}")
         print(f"  submitValidate 批量测试")
         print(f"  目标服务器: {cfg.server.base_url}")
-        print(f"  测试数据: {len(inputs)} 条")
-        print(f"  并发模式: {'开启 (max_workers={})'.format(cfg.concurrency.max_workers) if cfg.concurrency.enabled else '关闭（顺序执行）'}")
+        print(f"  测试数据: {'约 {} 行'.format(total_hint) if total_hint else '未知'}（流式读取）")
+        print(f"  并发模式: {self._describe_concurrency()}")
         print(f"{'='*60}\n")
 
         # 2. 执行测试
         start_time = time.time()
-        if cfg.concurrency.enabled:
-            results = self._run_concurrent(inputs)
-        else:
-            results = self._run_sequential(inputs)
+        results = self._execute(inputs, total_hint)
         elapsed = time.time() - start_time
 
-        # 3. 写出结果
-        output_path = write_test_results(
-            results=results,
-            output_path=cfg.output.output_path,
-        )
+        if self._checkpoint:
+            self._checkpoint.close()
+            if done_keys:
+                # 续跑时报告包含 checkpoint 中的历史结果与本次新结果
+                results = list(iter_checkpoint(cfg.output.checkpoint_path))
+                self.rebuild_latency(results)
+
+        if not results:
+            logger.warning("未读取到测试数据，流程结束")
+            self.http_client.close()
+            return []
+        logger.info(f"共执行 {len(results)} 条测试数据")
 
-        # 4. 打印统计
-        self._print_summary(results, elapsed, output_path)
+        # 3. 写出结果并打印统计
+        self.write_report(results, elapsed)
+        self._print_circuit_summary()
 
-        # 5. 关闭资源
+        # 4. 关闭资源
         self.http_client.close()
 
         return results
 
-    def _run_sequential(self, inputs: List[TestInput]) -> List[TestResult]:
+    def run_shard(self, shard_index: int, shard_count: int) -> int:
+        """分片模式下在子进程中执行：只处理第 shard_index 片数据
+
+        结果仅写入本分片的 checkpoint（config.output.checkpoint_path），
+        由父进程合并后统一生成报告。
+
+        Returns:
+            本次执行的测试条数；登录失败时返回 -1
+        """
+        self._ensure_dirs()
+        try:
+            if not self.login():
+                return -1
+            inputs, total_hint, _ = self._open_inputs(shard_index, shard_count)
+            if total_hint:
+                total_hint = (total_hint - shard_index + shard_count - 1) // shard_count
+            self._progress_prefix = f"[分片 {shard_index + 1}/{shard_count}] "
+            results = self._execute(inputs, total_hint)
+            return len(results)
+        finally:
+            if self._checkpoint:
+                self._checkpoint.close()
+            self.http_client.close()
+
+    def login(self) -> bool:
+        """auth.type=login 时登录（或复用缓存会话）并注入 HttpClient；无需登录时直接返回 True"""
+        if self._login_handler is None:
+            return True
+        if not self._login_handler.login_and_inject(self.http_client.session):
+            print("\n  登录失败，测试终止\n")
+            logger.error("登录失败，测试终止")
+            return False
+        return True
+
+    def _open_inputs(
+        self, shard_index: int = 0, shard_count: int = 1
+    ) -> Tuple[Iterable[TestInput], Optional[int], Counter]:
+        """打开测试输入迭代器，按需分片、跳过已完成结果并打开 checkpoint
+
+        Returns:
+            (输入迭代器, 估算行数, checkpoint 中各键的已完成次数)
+        """
+        cfg = self.config
+        logger.info(f"正在读取 Excel: {cfg.excel.input_path}")
+        inputs = iter_test_inputs(
+            excel_path=cfg.excel.input_path,
+            sheet_name=cfg.excel.sheet_name,
+            claim_id_column=cfg.excel.columns.claim_id,
+            item_id_column=cfg.excel.columns.item_id,
+        )
+        total_hint = estimate_data_rows(cfg.excel.input_path, cfg.excel.sheet_name)
+
+        # 按行序号取模分片：先分片再过滤，保证续跑时每行仍落在同一分片
+        if shard_count > 1:
+            inputs = itertools.islice(inputs, shard_index, None, shard_count)
+
+        # checkpoint：每条结果完成即落盘；--resume 时按已完成次数跳过 (claimId, itemId)
+        checkpoint_path = cfg.output.checkpoint_path
+        done_keys = Counter()
+        if cfg.output.resume and not checkpoint_path:
+            logger.warning("未配置 output.checkpoint_path，无法续跑，将执行全部数据")
+        if checkpoint_path and cfg.output.resume:
+            done_keys = load_completed_keys(checkpoint_path)
+            if done_keys:
+                done_count = sum(done_keys.values())
+                print(f"  续跑: checkpoint 中已有 {done_count} 条结果，将跳过")
+                logger.info(f"续跑: 从 {checkpoint_path} 读取到 {done_count} 条已完成结果")
+                inputs = skip_completed(inputs, done_keys)
+        if checkpoint_path:
+            self._checkpoint = CheckpointWriter(checkpoint_path, resume=cfg.output.resume)
+
+        return inputs, total_hint, done_keys
+
+    def _execute(
+        self, inputs: Iterable[TestInput], total_hint: Optional[int]
+    ) -> List[TestResult]:
+        """按并发配置选择执行方式"""
+        cc = self.config.concurrency
+        if cc.enabled and cc.mode == "async":
+            return self._run_async(inputs, total_hint)
+        if cc.enabled:
+            return self._run_concurrent(inputs, total_hint)
+        return self._run_sequential(inputs, total_hint)
+
+    def rebuild_latency(self, results: Iterable[TestResult]) -> None:
+        """从已有结果重建延迟统计（续跑 / 分片合并时使用）"""
+        self._latency = LatencyRecorder()
+        for r in results:
+            self._record_latency(r)
+
+    def write_report(self, results: List[TestResult], elapsed: float) -> str:
+        """写出 Excel 报告与延迟分位数 JSON，并打印统计摘要
+
+        Returns:
+            Excel 报告路径
+        """
+        latency_summary = self._latency.summary()
+        # 分组统计只构建一次，报告统计摘要 Sheet 与控制台摘要共用
+        summary = ResultSummary.from_results(results)
+        output_path = write_test_results(
+            results=results,
+            output_path=self.config.output.output_path,
+            latency_summary=latency_summary,
+            summary=summary,
+            style=self.config.output.report_style,
+        )
+        latency_path = self._latency.write_json(
+            os.path.splitext(output_path)[0] + "_latency.json"
+        )
+        logger.info(f"延迟分位数已写入: {latency_path}")
+
+        store_path = None
+        if self.config.output.result_store_dir:
+            store_path = save_run(results, self.config.output.result_store_dir)
+
+        self._print_summary(summary, elapsed, output_path, latency_summary)
+        if self.config.output.report_style == "csv":
+            print(f"  结果明细:   {results_csv_path(output_path)}")
+        if store_path:
+            print(f"  运行存档:   {store_path}（python -m ai_intf_test.diff 可与上次运行对比）\n")
+        return output_path
+
+    def _run_sequential(
+        self, inputs: Iterable[TestInput], total_hint: Optional[int] = None
+    ) -> List[TestResult]:
         """顺序执行所有测试"""
-        results: List[TestResult] = []
-        total = len(inputs)
+        results: List[Optional[TestResult]] = []
+        total = total_hint or "?"
         interval = self.config.concurrency.request_interval
+        feeder = _InputFeeder(inputs)
+        i = 0
+
+        while True:
+            item = feeder.next_ready()
+            if item is None:
+                if feeder.done:
+                    break
+                # 只剩熔断延后的行，等待最近一个到期
+                time.sleep(feeder.wait_time())
+                continue
+            idx, test_input = item
+            if idx == len(results):
+                results.append(None)
+
+            # 请求间隔
+            if i > 0 and interval > 0:
+                time.sleep(interval)
 
-        for i, test_input in enumerate(inputs, start=1):
             logger.info(
-                f"[{i}/{total}] 测试 {test_input.item_id} claimId={test_input.claim_id}"
+                f"[{i + 1}/{total}] 测试 {test_input.item_id} claimId={test_input.claim_id}"
             )
             service_name = self.http_client.resolve_service_name(test_input.item_id)
-            print(f"  [{i}/{total}] {test_input.item_id}({service_name}) claimId={test_input.claim_id} ... ", end="", flush=True)
+            print(f"  {self._progress_prefix}[{i + 1}/{total}] {test_input.item_id}({service_name}) claimId={test_input.claim_id} ... ", end="", flush=True)
 
             start = time.time()
-            result = self.http_client.execute(test_input)
-            result.response_time_ms = int((time.time() - start) * 1000)
-            results.append(result)
+            try:
+                result = self.http_client.execute(test_input)
+            except CircuitOpenError as e:
+                if self._should_requeue(e):
+                    print(f"熔断中，{e.retry_after:.1f}s 后重试")
+                    feeder.defer(idx, test_input, e.retry_after)
+                    continue
+                result = self._error_result(test_input, e)
+            if not result.from_cache:
+                result.response_time_ms = int((time.time() - start) * 1000)
+            results[idx] = result
+            self._record(result)
+            i += 1
 
             status = self._format_status(result)
             print(f"{status} ({result.response_time_ms}ms)")
 
-            # 请求间隔
-            if i < total and interval > 0:
-                time.sleep(interval)
-
         return results
 
-    def _run_concurrent(self, inputs: List[TestInput]) -> List[TestResult]:
-        """并发执行测试"""
+    def _run_concurrent(
+        self, inputs: Iterable[TestInput], total_hint: Optional[int] = None
+    ) -> List[TestResult]:
+        """并发执行测试
+
+        按滑动窗口（2 × max_workers）从输入迭代器取数提交，读取 Excel 与发送请求重叠进行，
+        同时避免一次性为所有行创建 Future。
+        """
         max_workers = self.config.concurrency.max_workers
-        results: List[TestResult] = [None] * len(inputs)
-        total = len(inputs)
+        window = max_workers * 2
+        results: List[Optional[TestResult]] = []
+        total = total_hint or "?"
         completed = 0
+        feeder = _InputFeeder(inputs)
 
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_idx = {}
-            for idx, test_input in enumerate(inputs):
-                future = executor.submit(self._execute_single, test_input)
-                future_to_idx[future] = idx
-
-            for future in as_completed(future_to_idx):
-                idx = future_to_idx[future]
-                test_input = inputs[idx]
-                completed += 1
-
-                try:
-                    result = future.result()
-                    results[idx] = result
-                    status = self._format_status(result)
-                    print(
-                        f"  [{completed}/{total}] {test_input.item_id}"
-                        f"({self.http_client.resolve_service_name(test_input.item_id)}) "
-                        f"claimId={test_input.claim_id} ... {status} "
-                        f"({result.response_time_ms}ms)"
-                    )
-                except Exception as e:
-                    error_result = TestResult(
-                        claim_id=test_input.claim_id,
-                        item_id=test_input.item_id,
-                        url=self.http_client.build_url(test_input.item_id),
-                        error=str(e),
-                    )
-                    results[idx] = error_result
-                    print(
-                        f"  [{completed}/{total}] {test_input.item_id}"
-                        f"({self.http_client.resolve_service_name(test_input.item_id)}) "
-                        f"claimId={test_input.claim_id} ... ERROR: {e}"
-                    )
+            pending = {}
+            while True:
+                while len(pending) < window:
+                    item = feeder.next_ready()
+                    if item is None:
+                        break
+                    if item[0] == len(results):
+                        results.append(None)
+                    pending[executor.submit(self._execute_single, item[1])] = item
+
+                if not pending:
+                    if feeder.done:
+                        break
+                    time.sleep(feeder.wait_time())
+                    continue
+
+                done, _ = wait(pending, timeout=feeder.wait_time(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx, test_input = pending.pop(future)
+                    try:
+                        result, exc = future.result(), None
+                    except Exception as e:
+                        result, exc = None, e
+                    if self._should_requeue(exc):
+                        feeder.defer(idx, test_input, exc.retry_after)
+                        continue
+                    completed += 1
+                    results[idx] = self._collect(completed, total, test_input, result, exc)
 
         return results
 
+    def _run_async(
+        self, inputs: Iterable[TestInput], total_hint: Optional[int] = None
+    ) -> List[TestResult]:
+        """异步执行测试（asyncio + aiohttp）"""
+        return asyncio.run(self._run_async_main(inputs, total_hint))
+
+    async def _run_async_main(
+        self, inputs: Iterable[TestInput], total_hint: Optional[int]
+    ) -> List[TestResult]:
+        cc = self.config.concurrency
+        window = cc.max_in_flight * 2
+        results: List[Optional[TestResult]] = []
+        total = total_hint or "?"
+        completed = 0
+        feeder = _InputFeeder(inputs)
+
+        async def run_one(idx: int, test_input: TestInput):
+            try:
+                return idx, test_input, await client.execute(test_input), None
+            except Exception as e:
+                return idx, test_input, None, e
+
+        async with AsyncHttpClient(
+            self.http_client,
+            max_in_flight=cc.max_in_flight,
+            pool_size=cc.pool_size,
+            keepalive_timeout=cc.keepalive_timeout,
+        ) as client:
+            pending = set()
+            while True:
+                while len(pending) < window:
+                    item = feeder.next_ready()
+                    if item is None:
+                        break
+                    if item[0] == len(results):
+                        results.append(None)
+                    pending.add(asyncio.ensure_future(run_one(*item)))
+
+                if not pending:
+                    if feeder.done:
+                        break
+                    await asyncio.sleep(feeder.wait_time())
+                    continue
+
+                done, pending = await asyncio.wait(
+                    pending, timeout=feeder.wait_time(), return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    idx, test_input, result, exc = task.result()
+                    if self._should_requeue(exc):
+                        feeder.defer(idx, test_input, exc.retry_after)
+                        continue
+                    completed += 1
+                    results[idx] = self._collect(completed, total, test_input, result, exc)
+
+        return results
+
+    def _should_requeue(self, exc: Optional[Exception]) -> bool:
+        """熔断拒绝且配置为 requeue 时，该行延后重新执行"""
+        if isinstance(exc, CircuitOpenError) and self._circuit_breakers.requeue:
+            self._requeued += 1
+            return True
+        return False
+
+    def _collect(
+        self,
+        completed: int,
+        total,
+        test_input: TestInput,
+        result: Optional[TestResult],
+        exc: Optional[Exception],
+    ) -> TestResult:
+        """处理单条完成的测试：打印进度、写入 checkpoint；执行异常时构造错误结果"""
+        service_name = self.http_client.resolve_service_name(test_input.item_id)
+        if exc is None:
+            print(
+                f"  {self._progress_prefix}[{completed}/{total}] {test_input.item_id}({service_name}) "
+                f"claimId={test_input.claim_id} ... {self._format_status(result)} "
+                f"({result.response_time_ms}ms)"
+            )
+        else:
+            print(
+                f"  {self._progress_prefix}[{completed}/{total}] {test_input.item_id}({service_name}) "
+                f"claimId={test_input.claim_id} ... ERROR: {exc}"
+            )
+            result = self._error_result(test_input, exc)
+
+        self._record(result)
+        return result
+
+    def _error_result(self, test_input: TestInput, exc: Exception) -> TestResult:
+        """执行异常（含熔断拒绝）时构造的错误结果"""
+        return TestResult(
+            claim_id=test_input.claim_id,
+            item_id=test_input.item_id,
+            url=self.http_client.build_url(test_input.item_id),
+            service_type=self.http_client.resolve_service_name(test_input.item_id),
+            error=str(exc),
+        )
+
+    def _record(self, result: TestResult) -> None:
+        """记录单条完成的结果：更新延迟直方图并追加到 checkpoint"""
+        self._record_latency(result)
+        if self._checkpoint:
+            self._checkpoint.append(result)
+
+    def _record_latency(self, r: TestResult) -> None:
+        if r.from_cache:
+            # 复用结果的行没有发送请求，不计入延迟统计
+            return
+        self._latency.record(r.service_type, r.response_time_ms)
+        self._latency.record_phases(
+            r.attempts,
+            connect=r.connect_ms,
+            tls=r.tls_ms,
+            ttfb=r.ttfb_ms,
+            transfer=r.transfer_ms,
+            backoff=r.backoff_ms,
+        )
+
+    def _describe_concurrency(self) -> str:
+        """并发模式描述（用于启动信息）"""
+        cc = self.config.concurrency
+        if not cc.enabled:
+            desc = "关闭（顺序执行）"
+        elif cc.mode == "async":
+            desc = f"异步 (max_in_flight={cc.max_in_flight}, pool_size={cc.pool_size})"
+        else:
+            desc = f"开启 (max_workers={cc.max_workers})"
+        if self.http_client.concurrency_controller:
+            desc += f"，自适应并发 (min={cc.min_workers})"
+        if cc.rate_limit > 0:
+            desc += f"，限速 {cc.rate_limit:g} req/s"
+        cache = self.http_client.response_cache
+        if cache:
+            desc += "，重复请求合并" if self.config.response_cache.ttl_seconds <= 0 else (
+                f"，重复请求合并 + 缓存 {self.config.response_cache.ttl_seconds:g}s"
+            )
+        if self._circuit_breakers:
+            desc += f"，按服务熔断 ({self.config.circuit_breaker.open_action})"
+        return desc
+
     def _execute_single(self, test_input: TestInput) -> TestResult:
         """执行单个测试（供并发调用）"""
         start = time.time()
         result = self.http_client.execute(test_input)
-        result.response_time_ms = int((time.time() - start) * 1000)
+        if not result.from_cache:
+            result.response_time_ms = int((time.time() - start) * 1000)
         return result
 
+    def _print_circuit_summary(self) -> None:
+        """打印运行期间打开过的熔断器"""
+        if not self._circuit_breakers:
+            return
+        tripped = self._circuit_breakers.summary()
+        if not tripped:
+            return
+        print(f"  熔断统计（延后重试 {self._requeued} 次）:")
+        for service, info in tripped.items():
+            print(
+                f"    {service:<8} 打开 {info['open_count']} 次，拒绝 {info['rejected']} 次，"
+                f"当前状态 {info['state']}"
+            )
+        print()
+
     @staticmethod
     def _format_status(result: TestResult) -> str:
         """格式化测试结果状态标签"""
@@ -190,24 +518,98 @@ class TestPipeline:
 
     @staticmethod
     def _print_summary(
-        results: List[TestResult], elapsed: float, output_path: str
+        summary: ResultSummary,
+        elapsed: float,
+        output_path: str,
+        latency_summary: dict,
     ):
         """打印测试统计摘要"""
-        total = len(results)
-        success = sum(1 for r in results if r.success)
-        passed = sum(1 for r in results if r.passed)
-        failed = sum(1 for r in results if r.success and not r.passed)
-        errors = sum(1 for r in results if r.error)
-        avg_time = sum(r.response_time_ms for r in results) / total if total else 0
+        cached = summary.cache_count
+        overall = latency_summary["overall"]
 
         print(f"\n{'='*60}")
         print(f"  测试完成！")
         print(f"  总耗时:     {elapsed:.1f}s")
-        print(f"  总测试数:   {total}")
-        print(f"  请求成功:   {success}")
-        print(f"  校验通过:   {passed}")
-        print(f"  校验不通过: {failed}")
-        print(f"  请求异常:   {errors}")
-        print(f"  平均响应:   {avg_time:.0f}ms")
+        print(f"  总测试数:   {summary.total}")
+        print(f"  请求成功:   {summary.success_count}")
+        print(f"  校验通过:   {summary.pass_count}")
+        print(f"  校验不通过: {summary.fail_count}")
+        print(f"  请求异常:   {summary.error_count}")
+        if cached:
+            print(f"  复用结果:   {cached}（重复 claimId+itemId，未发送请求）")
+        services = summary.by_service()
+        if len(services) > 1:
+            for service, row in services.items():
+                print(
+                    f"    {service or 'unknown':<8} 通过={row['pass']} 不通过={row['fail']} "
+                    f"异常={row['error']}"
+                )
+        top_names = summary.by_validate_name(limit=5)
+        if top_names:
+            print("  高频校验项: " + ", ".join(
+                f"[{severity}] {name}×{count}" for name, severity, count, _ in top_names
+            ))
+        print(f"  平均响应:   {overall['mean']:.0f}ms")
+        print(
+            f"  响应分位:   p50={overall['p50']}ms p90={overall['p90']}ms "
+            f"p99={overall['p99']}ms max={overall['max']}ms"
+        )
+        for service, stats in latency_summary["services"].items():
+            print(
+                f"    {service:<8} n={stats['count']:<6} p50={stats['p50']}ms "
+                f"p90={stats['p90']}ms p99={stats['p99']}ms max={stats['max']}ms"
+            )
+        phases = latency_summary.get("phases")
+        if phases:
+            print(
+                "  耗时分解:   " + " ".join(
+                    f"{phase}={stats['mean']:.0f}/{stats['p99']}ms" for phase, stats in phases.items()
+                ) + "（平均/p99）"
+            )
+            retries = latency_summary["retries"]
+            print(f"  发送次数:   {retries['attempts']}（{retries['retried']} 条发生重试）")
         print(f"  结果文件:   {output_path}")
         print(f"{'='*60}\n")
+
+
+class _InputFeeder:
+    """测试输入迭代器 + 熔断延后队列
+
+    新读取的行按顺序分配结果下标；因熔断被延后的行保留原下标，到期后优先于新行取出，
+    报告中的结果顺序仍与输入一致。
+    """
+
+    def __init__(self, inputs: Iterable[TestInput]) -> None:
+        self._iter = iter(inputs)
+        self._exhausted = False
+        self._next_index = 0
+        self._deferred: List[Tuple[float, int, TestInput]] = []
+
+    def next_ready(self) -> Optional[Tuple[int, TestInput]]:
+        """取下一条可执行的 (结果下标, 输入)；暂无可执行的行时返回 None"""
+        if self._deferred and self._deferred[0][0] <= time.monotonic():
+            _, idx, test_input = heapq.heappop(self._deferred)
+            return idx, test_input
+        if not self._exhausted:
+            test_input = next(self._iter, None)
+            if test_input is not None:
+                idx = self._next_index
+                self._next_index += 1
+                return idx, test_input
+            self._exhausted = True
+        return None
+
+    def defer(self, idx: int, test_input: TestInput, delay: float) -> None:
+        """delay 秒后重新执行该行"""
+        heapq.heappush(self._deferred, (time.monotonic() + delay, idx, test_input))
+
+    def wait_time(self) -> Optional[float]:
+        """距最近一个延后行到期的秒数；没有延后行时返回 None"""
+        if not self._deferred:
+            return None
+        return max(0.0, self._deferred[0][0] - time.monotonic())
+
+    @property
+    def done(self) -> bool:
+        """输入已读完且没有延后的行"""
+        return self._exhausted and not self._deferred
@@ -0,0 +1,233 @@
+"""限流模块：令牌桶限速 + 自适应并发控制
+
+- TokenBucket: 所有 worker 共享的令牌桶，限制整体请求速率（req/s）
+- AdaptiveConcurrencyController: 按观测到的延迟与背压状态码（复用
+  RetryConfig.retry_on_status_codes，如 429/503）以 AIMD 方式动态调整在途并发数
+
+两者均同时支持线程（acquire）与 asyncio（acquire_async）调用方。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Iterable, List, Optional, Tuple
+
+from .config_loader import ConcurrencyConfig, RetryConfig
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """线程安全的令牌桶
+
+    令牌按 rate 个/秒匀速补充，桶容量为 burst。取令牌时若桶已空，
+    则预约下一个令牌并返回需要等待的秒数，保证多 worker 间公平排队。
+    """
+
+    def __init__(self, rate: float, burst: int = 0) -> None:
+        if rate <= 0:
+            raise ValueError(f"令牌桶速率必须大于 0: {rate}")
+        self._rate = float(rate)
+        self._capacity = float(burst if burst > 0 else max(1, int(rate)))
+        self._tokens = self._capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def reserve(self) -> float:
+        """取出一个令牌，返回调用方需要等待的秒数（0 表示立即可用）"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._last) * self._rate)
+            self._last = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self._rate
+
+    def acquire(self) -> None:
+        """阻塞直到获得令牌（线程模式）"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """等待直到获得令牌（asyncio 模式）"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class AdaptiveConcurrencyController:
+    """自适应并发控制器（AIMD）
+
+    limit 默认从上限（配置的静态并发数）开始，每收集 window_size 个请求样本评估一次：
+    - 出现背压状态码（或连接异常）的比例超过 backpressure_threshold，
+      或窗口内 p90 延迟超过 latency_target_ms 时，limit 乘以 decrease_factor
+    - 否则若窗口内在途请求曾触达 limit，则 limit + 1
+
+    asyncio 等待方挂在各自事件循环的 Future 上，由 release() / limit 上调时按空闲名额唤醒，
+    不轮询。
+    """
+
+    def __init__(
+        self,
+        min_limit: int,
+        max_limit: int,
+        backpressure_codes: Iterable[int],
+        latency_target_ms: int = 0,
+        initial_limit: Optional[int] = None,
+        window_size: int = 20,
+        backpressure_threshold: float = 0.05,
+        decrease_factor: float = 0.7,
+    ) -> None:
+        self._min_limit = max(1, min_limit)
+        self._max_limit = max(self._min_limit, max_limit)
+        self._limit = min(self._max_limit, max(self._min_limit, initial_limit or self._max_limit))
+        self._backpressure_codes = set(backpressure_codes)
+        self._latency_target_ms = latency_target_ms
+        self._window_size = max(1, window_size)
+        self._backpressure_threshold = backpressure_threshold
+        self._decrease_factor = decrease_factor
+
+        self._in_flight = 0
+        self._saturated = False
+        self._latencies: List[int] = []
+        self._backpressure_count = 0
+        self._cond = threading.Condition()
+        # asyncio 等待方：(事件循环, Future)，按到达顺序唤醒
+        self._async_waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        # 已唤醒、尚未重新检查名额的 asyncio 等待方数量（为它们预留名额，避免重复唤醒）
+        self._waking = 0
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> None:
+        """阻塞直到在途请求数低于当前 limit（线程模式）"""
+        with self._cond:
+            while self._in_flight >= self._limit:
+                self._cond.wait()
+            self._take_slot()
+
+    async def acquire_async(self) -> None:
+        """等待直到在途请求数低于当前 limit（asyncio 模式）"""
+        loop = asyncio.get_running_loop()
+        woken = False
+        while True:
+            with self._cond:
+                if woken:
+                    self._waking -= 1
+                if self._in_flight < self._limit:
+                    self._take_slot()
+                    return
+                waiter = (loop, loop.create_future())
+                self._async_waiters.append(waiter)
+            try:
+                await waiter[1]
+                woken = True
+            except asyncio.CancelledError:
+                with self._cond:
+                    try:
+                        self._async_waiters.remove(waiter)
+                    except ValueError:
+                        # 已被唤醒但不再需要名额，把唤醒让给下一个等待方
+                        self._waking -= 1
+                        self._wake_async_waiters()
+                raise
+
+    def _wake_async_waiters(self) -> None:
+        """按空闲名额唤醒 asyncio 等待方（调用方持有锁）；被唤醒者重新检查名额"""
+        free = self._limit - self._in_flight - self._waking
+        while free > 0 and self._async_waiters:
+            loop, future = self._async_waiters.popleft()
+            loop.call_soon_threadsafe(_resolve_waiter, future)
+            self._waking += 1
+            free -= 1
+
+    def _take_slot(self) -> None:
+        self._in_flight += 1
+        if self._in_flight >= self._limit:
+            self._saturated = True
+
+    def release(self, status_code: Optional[int], latency_ms: int) -> None:
+        """释放在途名额并记录本次请求结果
+
+        Args:
+            status_code: HTTP 状态码；连接失败/超时传 None，视为背压
+            latency_ms: 本次请求耗时（毫秒）
+        """
+        with self._cond:
+            self._in_flight -= 1
+            self._latencies.append(latency_ms)
+            if status_code is None or status_code in self._backpressure_codes:
+                self._backpressure_count += 1
+            if len(self._latencies) >= self._window_size:
+                self._adjust()
+            self._cond.notify_all()
+            self._wake_async_waiters()
+
+    def _adjust(self) -> None:
+        """评估窗口样本并调整 limit（调用方持有锁）"""
+        samples = sorted(self._latencies)
+        p90 = samples[min(len(samples) - 1, int(len(samples) * 0.9))]
+        backpressure_ratio = self._backpressure_count / len(samples)
+        old_limit = self._limit
+
+        if backpressure_ratio > self._backpressure_threshold or (
+            self._latency_target_ms > 0 and p90 > self._latency_target_ms
+        ):
+            self._limit = max(self._min_limit, int(self._limit * self._decrease_factor))
+        elif self._saturated:
+            self._limit = min(self._max_limit, self._limit + 1)
+
+        if self._limit != old_limit:
+            logger.info(
+                f"自适应并发调整: {old_limit} -> {self._limit} "
+                f"(背压比例={backpressure_ratio:.0%}, p90={p90}ms)"
+            )
+
+        self._latencies = []
+        self._backpressure_count = 0
+        self._saturated = self._in_flight >= self._limit
+
+
+def _resolve_waiter(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def create_rate_limiter(config: ConcurrencyConfig) -> Optional[TokenBucket]:
+    """根据并发配置创建共享令牌桶，未配置 rate_limit 时返回 None"""
+    if config.rate_limit <= 0:
+        return None
+    return TokenBucket(rate=config.rate_limit, burst=config.burst)
+
+
+def create_concurrency_controller(
+    config: ConcurrencyConfig, retry_config: RetryConfig
+) -> Optional[AdaptiveConcurrencyController]:
+    """根据并发配置创建自适应并发控制器，未启用时返回 None
+
+    上限取当前并发模式的静态并发数（thread: max_workers，async: max_in_flight）。
+    """
+    if not (config.enabled and config.adaptive):
+        return None
+    max_limit = config.max_in_flight if config.mode == "async" else config.max_workers
+    return AdaptiveConcurrencyController(
+        min_limit=config.min_workers,
+        max_limit=max_limit,
+        backpressure_codes=retry_config.retry_on_status_codes,
+        latency_target_ms=config.latency_target_ms,
+    )
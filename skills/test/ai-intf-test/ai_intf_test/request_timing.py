@@ -0,0 +1,102 @@
+"""请求分阶段计时模块：记录每次请求的建连、TLS 握手耗时
+
+同步客户端（requests / urllib3）：
+    TimedHTTPAdapter 替换连接池使用的连接类，在 _new_conn()（TCP 建连）与
+    connect()（TCP + TLS 握手）处计时，结果写入当前线程的 thread-local，
+    由 HttpClient 在每次尝试结束后通过 take_connect_timing() 取出。
+    keep-alive 复用已有连接时两者均为 0。
+
+异步客户端（aiohttp）：
+    create_trace_config() 返回的 TraceConfig 在新建连接前后计时，写入请求时传入的
+    trace_request_ctx 字典。aiohttp 不单独暴露 TLS 握手事件，TLS 耗时计入 connect_ms。
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Tuple
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+_local = threading.local()
+
+
+def reset_connect_timing() -> None:
+    """清零当前线程的建连计时（每次尝试发送前调用）"""
+    _local.tcp_ms = 0.0
+    _local.connect_ms = 0.0
+
+
+def take_connect_timing() -> Tuple[int, int]:
+    """取出当前线程本次尝试的 (TCP 建连耗时, TLS 握手耗时)，单位毫秒"""
+    tcp_ms = getattr(_local, "tcp_ms", 0.0)
+    connect_ms = getattr(_local, "connect_ms", 0.0)
+    reset_connect_timing()
+    return int(tcp_ms), int(max(0.0, connect_ms - tcp_ms))
+
+
+class _TimedConnectionMixin:
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            _local.tcp_ms = getattr(_local, "tcp_ms", 0.0) + (time.perf_counter() - start) * 1000
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            _local.connect_ms = getattr(_local, "connect_ms", 0.0) + (time.perf_counter() - start) * 1000
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """连接池使用带计时连接类的 HTTPAdapter"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def create_trace_config(aiohttp):
+    """创建记录建连耗时的 aiohttp TraceConfig
+
+    请求时需传入 trace_request_ctx={"connect_ms": 0.0}，建连耗时累加到该字典。
+    """
+
+    async def on_connection_create_start(session, ctx, params):
+        ctx.connect_start = time.perf_counter()
+
+    async def on_connection_create_end(session, ctx, params):
+        phases = ctx.trace_request_ctx
+        if isinstance(phases, dict) and hasattr(ctx, "connect_start"):
+            phases["connect_ms"] = (
+                phases.get("connect_ms", 0.0) + (time.perf_counter() - ctx.connect_start) * 1000
+            )
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    return trace_config
@@ -0,0 +1,157 @@
+"""响应去重模块：相同 (claimId, itemId) 的请求合并为一次网络调用
+
+- 在途合并（coalesce）：某个键的请求尚未返回时，后续相同键的请求等待并共享该结果
+- TTL 缓存：请求成功返回后在 ttl_seconds 内，相同键直接复用结果（0 表示不缓存）
+
+共享得到的结果是原结果的副本，from_cache=True，分阶段耗时与发送次数清零
+（未产生网络请求）。请求异常（error 非空）的结果不进入 TTL 缓存。
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import replace
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from .config_loader import ResponseCacheConfig
+from .models import TestResult
+
+CacheKey = Tuple[int, str]
+
+
+def _shared_copy(result: TestResult) -> TestResult:
+    """为复用结果的行构造独立副本"""
+    return replace(
+        result,
+        results=list(result.results),
+        test_time="",
+        response_time_ms=0,
+        connect_ms=0,
+        tls_ms=0,
+        ttfb_ms=0,
+        transfer_ms=0,
+        attempts=0,
+        backoff_ms=0,
+        from_cache=True,
+    )
+
+
+class ResponseCache:
+    """线程 / asyncio 通用的请求合并与 TTL 缓存"""
+
+    def __init__(self, ttl_seconds: float = 0.0, max_entries: int = 100000, coalesce: bool = True) -> None:
+        self._ttl = ttl_seconds
+        self._max_entries = max(1, max_entries)
+        self._coalesce = coalesce
+        self._lock = threading.Lock()
+        self._entries: Dict[CacheKey, Tuple[float, TestResult]] = {}
+        self._inflight: Dict[CacheKey, Future] = {}
+        self._inflight_async: Dict[CacheKey, asyncio.Future] = {}
+        # 统计
+        self.hits = 0
+        self.coalesced = 0
+
+    def get_or_execute(self, key: CacheKey, fn: Callable[[], TestResult]) -> TestResult:
+        """线程模式：命中缓存或合并到在途请求，否则调用 fn() 发送请求"""
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached
+            future = self._inflight.get(key) if self._coalesce else None
+            owner = future is None
+            if owner and self._coalesce:
+                future = self._inflight[key] = Future()
+
+        if not owner:
+            # 等待在途的相同请求（其异常同样向上抛出）
+            shared = _shared_copy(future.result())
+            with self._lock:
+                self.coalesced += 1
+            return shared
+
+        try:
+            result = fn()
+        except BaseException as e:
+            if future is not None:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                future.set_exception(e)
+            raise
+
+        with self._lock:
+            # 先写入缓存再移除在途记录，期间到达的相同请求总能命中其中之一
+            self._store(key, result)
+            if future is not None:
+                self._inflight.pop(key, None)
+        if future is not None:
+            future.set_result(result)
+        return result
+
+    async def get_or_execute_async(
+        self, key: CacheKey, fn: Callable[[], Awaitable[TestResult]]
+    ) -> TestResult:
+        """asyncio 模式：语义同 get_or_execute"""
+        with self._lock:
+            cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        future = self._inflight_async.get(key) if self._coalesce else None
+        if future is not None:
+            shared = _shared_copy(await asyncio.shield(future))
+            self.coalesced += 1
+            return shared
+
+        if self._coalesce:
+            future = self._inflight_async[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except BaseException as e:
+            if future is not None:
+                self._inflight_async.pop(key, None)
+                future.set_exception(e)
+                # 没有等待者时避免 "exception was never retrieved" 警告
+                future.exception()
+            raise
+
+        with self._lock:
+            self._store(key, result)
+            if future is not None:
+                self._inflight_async.pop(key, None)
+        if future is not None:
+            future.set_result(result)
+        return result
+
+    def _lookup(self, key: CacheKey) -> Optional[TestResult]:
+        """查找未过期的缓存结果（调用方持有锁）"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self.hits += 1
+        return _shared_copy(result)
+
+    def _store(self, key: CacheKey, result: TestResult) -> None:
+        """写入 TTL 缓存（调用方持有锁）"""
+        if self._ttl <= 0 or result.error:
+            return
+        if len(self._entries) >= self._max_entries:
+            # 淘汰最早写入的条目
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (time.monotonic() + self._ttl, result)
+
+
+def create_response_cache(config: ResponseCacheConfig) -> Optional[ResponseCache]:
+    """根据配置创建响应缓存，合并与 TTL 缓存都未启用时返回 None"""
+    if not config.coalesce and config.ttl_seconds <= 0:
+        return None
+    return ResponseCache(
+        ttl_seconds=config.ttl_seconds,
+        max_entries=config.max_entries,
+        coalesce=config.coalesce,
+    )
@@ -0,0 +1,142 @@
+"""结果统计模块：按列聚合测试结果，供统计摘要 Sheet 与控制台摘要共用
+
+百万行结果逐行、逐指标地多次遍历 TestResult 对象代价很高。ResultSummary 只遍历一次：
+先按列取出 itemId / serviceType / 结论 / success / fromCache 等字段，
+再用 Counter 按组合键聚合为一张很小的分组计数表（行数 ≈ 模板数 × 服务数 × 结论数），
+之后所有总数、按模板 / 按服务的分组统计都在这张表上计算，与结果条数无关。
+
+ValidateResult 按 (serviceType, severity, name) 另行聚合，只遍历有校验项的行。
+"""
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import TestResult
+
+PASS = "PASS"
+FAIL = "FAIL"
+ERROR = "ERROR"
+
+# 分组计数表的键: (itemId, serviceType, 结论, success, fromCache)
+GroupKey = Tuple[str, str, str, bool, bool]
+# 校验项计数表的键: (serviceType, severity, name)
+ValidateKey = Tuple[str, str, str]
+
+
+def outcome_of(result: TestResult) -> str:
+    """单条结果的结论：ERROR（请求异常）/ PASS / FAIL"""
+    if result.error:
+        return ERROR
+    return PASS if result.passed else FAIL
+
+
+class ResultSummary:
+    """测试结果的分组统计"""
+
+    def __init__(self) -> None:
+        self.groups: Counter = Counter()
+        self.validate: Counter = Counter()
+
+    @classmethod
+    def from_results(cls, results: List[TestResult]) -> "ResultSummary":
+        """从结果列表一次性构建（按列提取后整体聚合）"""
+        summary = cls()
+        summary.groups = Counter(zip(
+            [r.item_id for r in results],
+            [r.service_type for r in results],
+            [ERROR if r.error else (PASS if r.passed else FAIL) for r in results],
+            [bool(r.success) for r in results],
+            [bool(r.from_cache) for r in results],
+        ))
+        summary.validate = Counter(
+            (r.service_type, v.severity, v.name) for r in results if r.results for v in r.results
+        )
+        return summary
+
+    def add(self, result: TestResult) -> None:
+        """增量累计单条结果（结果以迭代器流式给出时使用）"""
+        self.groups[(
+            result.item_id,
+            result.service_type,
+            outcome_of(result),
+            bool(result.success),
+            bool(result.from_cache),
+        )] += 1
+        for v in result.results:
+            self.validate[(result.service_type, v.severity, v.name)] += 1
+
+    # ---------- 总数 ----------
+
+    def _count(self, predicate) -> int:
+        return sum(n for key, n in self.groups.items() if predicate(key))
+
+    @property
+    def total(self) -> int:
+        return sum(self.groups.values())
+
+    @property
+    def success_count(self) -> int:
+        return self._count(lambda k: k[3])
+
+    @property
+    def pass_count(self) -> int:
+        return self._count(lambda k: k[2] == PASS)
+
+    @property
+    def fail_count(self) -> int:
+        """请求成功但校验不通过"""
+        return self._count(lambda k: k[3] and k[2] != PASS)
+
+    @property
+    def error_count(self) -> int:
+        return self._count(lambda k: k[2] == ERROR)
+
+    @property
+    def cache_count(self) -> int:
+        return self._count(lambda k: k[4])
+
+    # ---------- 分组统计 ----------
+
+    def _breakdown(self, field: int) -> Dict[str, Dict[str, int]]:
+        table: Dict[str, Dict[str, int]] = {}
+        for key, n in self.groups.items():
+            row = table.get(key[field])
+            if row is None:
+                row = table[key[field]] = {"total": 0, "pass": 0, "fail": 0, "error": 0, "cached": 0}
+            row["total"] += n
+            row[key[2].lower()] += n
+            if key[4]:
+                row["cached"] += n
+        return dict(sorted(table.items()))
+
+    def by_item(self) -> Dict[str, Dict[str, int]]:
+        """{itemId: {"total", "pass", "fail", "error", "cached"}}"""
+        return self._breakdown(0)
+
+    def by_service(self) -> Dict[str, Dict[str, int]]:
+        """{serviceType: {"total", "pass", "fail", "error", "cached"}}"""
+        return self._breakdown(1)
+
+    def by_severity(self) -> Dict[str, int]:
+        """{severity: 校验项条数}，按条数降序"""
+        counts: Counter = Counter()
+        for (_, severity, _), n in self.validate.items():
+            counts[severity] += n
+        return dict(counts.most_common())
+
+    def by_validate_name(self, limit: Optional[int] = None) -> List[Tuple[str, str, int, str]]:
+        """按 ValidateResult.name 统计: [(name, severity, 条数, 涉及服务)]，按条数降序
+
+        涉及服务按条数降序列出，如 "eer(120), ptp(3)"。
+        """
+        grouped: Dict[Tuple[str, str], Counter] = {}
+        for (service, severity, name), n in self.validate.items():
+            grouped.setdefault((name, severity), Counter())[service or "unknown"] += n
+        rows = [
+            (name, severity, sum(services.values()),
+             ", ".join(f"{s}({c})" for s, c in services.most_common()))
+            for (name, severity), services in grouped.items()
+        ]
+        rows.sort(key=lambda row: (-row[2], row[0], row[1]))
+        return rows[:limit] if limit else rows
@@ -0,0 +1,177 @@
+"""运行结果存储模块：每次运行的结果保存为压缩 JSONL，供跨运行对比（diff）
+
+存储文件为 <result_store_dir>/run_<时间戳>.jsonl.gz，每行一条 TestResult.to_dict()。
+对比时只提取比较所需的字段（RunRecord），不还原完整的 TestResult，
+50 万行的运行可在数秒内载入。
+
+load_run_index() 同时支持三种来源：
+- 结果存储文件（.jsonl.gz）
+- checkpoint 文件（.jsonl）
+- 输出的 Excel 报告（.xlsx，"测试结果" Sheet）
+"""
+from __future__ import annotations
+
+import glob
+import gzip
+import io
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+from .models import TestResult
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+RunKey = Tuple[int, str]
+
+_RUN_FILE_PREFIX = "run_"
+_RUN_FILE_SUFFIX = ".jsonl.gz"
+# Excel 报告 results 列中每行的格式: "[SEVERITY] name: message"
+_RESULT_LINE_RE = re.compile(r"^\[[^\]]*\] ([^:]*):")
+
+
+class RunRecord(NamedTuple):
+    """对比所需的单行结果摘要"""
+    service_type: str
+    status_code: int
+    passed: bool
+    error: bool
+    names: Tuple[str, ...]
+    response_time_ms: int
+    # 复用了相同 (claimId, itemId) 请求的结果，未发送网络请求（响应时间为 0，不参与延迟对比）
+    from_cache: bool = False
+
+
+def save_run(results: Iterable[TestResult], store_dir: str) -> str:
+    """将本次运行结果写入结果存储目录
+
+    Returns:
+        存储文件路径
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(store_dir, f"{_RUN_FILE_PREFIX}{timestamp}{_RUN_FILE_SUFFIX}")
+    count = 0
+    # compresslevel=1：压缩率与 6 相差不大，写入速度快数倍
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=1) as f:
+        for r in results:
+            f.write(json.dumps(r.to_dict(), ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    logger.info(f"运行结果已存储: {path} ({count} 条)")
+    return path
+
+
+def list_runs(store_dir: str) -> List[str]:
+    """按时间先后列出存储目录中的运行文件"""
+    return sorted(glob.glob(os.path.join(store_dir, f"{_RUN_FILE_PREFIX}*{_RUN_FILE_SUFFIX}")))
+
+
+def load_run_index(path: str) -> Dict[RunKey, RunRecord]:
+    """载入一次运行并按 (claimId, itemId) 建立哈希索引（重复键的取舍见 index_run_records）"""
+    return index_run_records(iter_run_records(path))
+
+
+def index_run_records(records: Iterable[Tuple[RunKey, RunRecord]]) -> Dict[RunKey, RunRecord]:
+    """按 (claimId, itemId) 建立哈希索引
+
+    重复键保留第一条实际发送了请求的行；全部为复用结果时保留第一行。
+    复用行只是同一请求结果的副本，且响应时间为 0，优先保留真实请求，
+    基线与本次使用同一规则，两次相同的运行不会因取舍不同产生差异。
+    """
+    index: Dict[RunKey, RunRecord] = {}
+    for key, rec in records:
+        add_run_record(index, key, rec)
+    return index
+
+
+def add_run_record(index: Dict[RunKey, RunRecord], key: RunKey, rec: RunRecord) -> None:
+    """将一行加入索引（index_run_records 的重复键规则）"""
+    prev = index.get(key)
+    if prev is None or (prev.from_cache and not rec.from_cache):
+        index[key] = rec
+
+
+def iter_run_records(path: str) -> Iterator[Tuple[RunKey, RunRecord]]:
+    """按来源类型逐行读取 ((claimId, itemId), RunRecord)"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"运行结果文件不存在: {path}")
+    if path.endswith(".xlsx"):
+        return _iter_excel_records(path)
+    return _iter_jsonl_records(path)
+
+
+def _iter_jsonl_records(path: str) -> Iterator[Tuple[RunKey, RunRecord]]:
+    if path.endswith(".gz"):
+        # 外包一层大缓冲的 BufferedReader，按行读取走 C 实现，比直接迭代 GzipFile 快数倍
+        f = io.BufferedReader(gzip.open(path, "rb"), buffer_size=1 << 20)
+    else:
+        f = open(path, "rb")
+    with f:
+        for line_no, line in enumerate(f, start=1):
+            try:
+                d = _json_loads(line)
+                key = (d["claimId"], d["itemId"])
+            except (ValueError, KeyError) as e:
+                if line.strip():
+                    logger.warning(f"{path} 第 {line_no} 行无法解析，已跳过: {e}")
+                continue
+            results = d.get("results")
+            get = d.get
+            yield key, RunRecord(
+                get("serviceType") or "",
+                get("statusCode") or 0,
+                bool(get("pass")),
+                bool(get("error")),
+                tuple([r.get("name", "") for r in results]) if results else (),
+                get("responseTimeMs") or 0,
+                bool(get("fromCache")),
+            )
+
+
+def _iter_excel_records(path: str) -> Iterator[Tuple[RunKey, RunRecord]]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb["测试结果"] if "测试结果" in wb.sheetnames else wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = [str(h) if h is not None else "" for h in next(rows, ())]
+        col = {name: idx for idx, name in enumerate(header)}
+        missing = {"claimId", "itemId", "pass"} - col.keys()
+        if missing:
+            raise KeyError(f"{path} 不是测试结果报告，缺少列: {sorted(missing)}")
+
+        def get(row, name, default=None):
+            idx = col.get(name)
+            return row[idx] if idx is not None and idx < len(row) else default
+
+        for row in rows:
+            claim_id = get(row, "claimId")
+            if claim_id is None:
+                continue
+            text = get(row, "results") or ""
+            names = tuple(
+                m.group(1) for m in map(_RESULT_LINE_RE.match, str(text).split("\n")) if m
+            )
+            yield (int(claim_id), str(get(row, "itemId"))), RunRecord(
+                service_type=get(row, "serviceType") or "",
+                status_code=int(get(row, "statusCode") or 0),
+                passed=bool(get(row, "pass")),
+                error=bool(get(row, "error")),
+                names=names,
+                response_time_ms=int(get(row, "responseTimeMs") or 0),
+                from_cache=bool(get(row, "fromCache")),
+            )
+    finally:
+        wb.close()
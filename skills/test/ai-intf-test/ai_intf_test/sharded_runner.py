@@ -0,0 +1,146 @@
+"""多进程分片执行模块：超大工作簿按行拆分到多个子进程并行测试
+
+单进程内即使线程 / 协程调优充分，JSON 解析与结果处理仍受 GIL 限制。分片模式下：
+- 输入按行号取模拆成 N 片，第 i 个子进程只处理 行号 % N == i 的数据
+- 每个子进程拥有独立的 HttpClient、登录会话与连接池，结果写入各自的 checkpoint
+- 父进程合并各分片 checkpoint，按输入顺序生成一份报告（单个汇总 Sheet）
+
+续跑（--resume）时需保持相同的分片数，每个分片只读取自己的 checkpoint。
+"""
+from __future__ import annotations
+
+import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+from typing import Dict, List, Tuple
+
+from .checkpoint import iter_checkpoint, result_key
+from .config_loader import AppConfig
+from .excel_io import estimate_data_rows, iter_test_inputs
+from .models import TestResult
+from .pipeline import TestPipeline
+
+logger = logging.getLogger(__name__)
+
+
+def shard_checkpoint_path(config: AppConfig, shard_index: int, shard_count: int) -> str:
+    """第 shard_index 个分片的 checkpoint 路径，如 checkpoint.shard1of4.jsonl"""
+    base = config.output.checkpoint_path or os.path.join(
+        config.output.output_dir, "checkpoint.jsonl"
+    )
+    root, ext = os.path.splitext(base)
+    return f"{root}.shard{shard_index + 1}of{shard_count}{ext or '.jsonl'}"
+
+
+def _shard_config(config: AppConfig, shard_index: int, shard_count: int) -> AppConfig:
+    """生成分片子进程使用的配置：独立 checkpoint，全局限速平均分摊"""
+    cc = config.concurrency
+    concurrency = replace(
+        cc,
+        rate_limit=cc.rate_limit / shard_count if cc.rate_limit > 0 else 0.0,
+        burst=math.ceil(cc.burst / shard_count) if cc.burst > 0 else 0,
+        processes=1,
+    )
+    output = replace(
+        config.output,
+        checkpoint_path=shard_checkpoint_path(config, shard_index, shard_count),
+    )
+    return replace(config, concurrency=concurrency, output=output)
+
+
+def _run_shard(config: AppConfig, shard_index: int, shard_count: int) -> Tuple[int, int]:
+    """子进程入口：执行单个分片，返回 (分片号, 执行条数)"""
+    if not logging.getLogger().handlers:
+        # spawn 启动方式下子进程不继承父进程的日志配置
+        from .main import setup_logging
+        setup_logging(
+            level=config.log.level,
+            log_file=config.log.log_file,
+            console_output=config.log.console_output,
+        )
+    pipeline = TestPipeline(_shard_config(config, shard_index, shard_count))
+    return shard_index, pipeline.run_shard(shard_index, shard_count)
+
+
+class ShardedRunner:
+    """多进程分片测试执行器"""
+
+    def __init__(self, config: AppConfig) -> None:
+        self.config = config
+        self.processes = max(1, config.concurrency.processes)
+
+    def run(self) -> List[TestResult]:
+        """启动各分片子进程，等待完成后合并结果并生成报告
+
+        Returns:
+            合并后的测试结果列表（按输入顺序）
+        """
+        cfg = self.config
+        n = self.processes
+        os.makedirs(cfg.output.output_dir, exist_ok=True)
+        total_hint = estimate_data_rows(cfg.excel.input_path, cfg.excel.sheet_name)
+
+        # 父进程只负责合并与写报告，复用 TestPipeline 的报告逻辑（不发送请求）
+        reporter = TestPipeline(cfg)
+
+        print(f"\n{'='*60}")
+        print(f"  submitValidate 批量测试（多进程分片）")
+        print(f"  目标服务器: {cfg.server.base_url}")
+        print(f"  测试数据: {'约 {} 行'.format(total_hint) if total_hint else '未知'}（流式读取）")
+        print(f"  分片进程: {n}")
+        print(f"  每进程并发: {reporter._describe_concurrency()}")
+        print(f"{'='*60}\n")
+
+        start_time = time.time()
+        executed: Dict[int, int] = {}
+        with ProcessPoolExecutor(max_workers=n) as executor:
+            futures = [executor.submit(_run_shard, cfg, i, n) for i in range(n)]
+            for future in as_completed(futures):
+                shard_index, count = future.result()
+                executed[shard_index] = count
+                if count < 0:
+                    logger.error(f"分片 {shard_index + 1}/{n} 登录失败")
+                else:
+                    logger.info(f"分片 {shard_index + 1}/{n} 完成，本次执行 {count} 条")
+        elapsed = time.time() - start_time
+
+        if any(count < 0 for count in executed.values()):
+            print("\n  存在登录失败的分片，测试终止\n")
+            reporter.http_client.close()
+            return []
+
+        results = self._merge_results()
+        if not results:
+            logger.warning("未读取到测试数据，流程结束")
+            reporter.http_client.close()
+            return []
+        logger.info(f"共合并 {len(results)} 条测试结果（{n} 个分片）")
+
+        reporter.rebuild_latency(results)
+        reporter.write_report(results, elapsed)
+        reporter.http_client.close()
+        return results
+
+    def _merge_results(self) -> List[TestResult]:
+        """读取全部分片 checkpoint，并按输入 Excel 中的行序排序"""
+        cfg = self.config
+        results: List[TestResult] = []
+        for i in range(self.processes):
+            results.extend(iter_checkpoint(shard_checkpoint_path(cfg, i, self.processes)))
+
+        # 分片内结果按完成顺序落盘，这里恢复为输入顺序
+        order = {
+            result_key(t.claim_id, t.item_id): idx
+            for idx, t in enumerate(iter_test_inputs(
+                excel_path=cfg.excel.input_path,
+                sheet_name=cfg.excel.sheet_name,
+                claim_id_column=cfg.excel.columns.claim_id,
+                item_id_column=cfg.excel.columns.item_id,
+            ))
+        }
+        tail = len(order)
+        results.sort(key=lambda r: order.get(result_key(r.claim_id, r.item_id), tail))
+        return results
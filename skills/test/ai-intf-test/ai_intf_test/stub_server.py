@@ -0,0 +1,216 @@
+"""本地桩服务：模拟 submitValidate 与登录接口，用于压测与基准测试
+
+- POST .../submitValidate  按配置的延迟分布与错误率返回校验结果
+- POST .../login           返回 Set-Cookie，配合 auth.type=login 使用；
+                           设置 --session-ttl 后会话过期的请求返回 401
+
+用法:
+  python -m ai_intf_test.stub_server --port 18080 --latency-ms 20 --error-rate 0.01
+  # 然后将 server.base_url 指向 http://127.0.0.1:18080
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+@dataclass
+class StubBehavior:
+    """桩服务行为配置"""
+    latency_ms: float = 20.0
+    # 延迟分布: fixed（固定）/ uniform（0~2 倍均值）/ exponential（指数分布，长尾）
+    latency_dist: str = "fixed"
+    # 返回 HTTP 503 的概率
+    error_rate: float = 0.0
+    # 返回 pass=false（校验不通过）的概率
+    fail_rate: float = 0.1
+    # 登录会话有效期（秒），>0 时校验 Cookie 中的 SESSION，过期或缺失返回 401
+    session_ttl: float = 0.0
+
+    def sample_latency(self) -> float:
+        """按分布采样一次延迟（秒）"""
+        mean = self.latency_ms / 1000.0
+        if mean <= 0:
+            return 0.0
+        if self.latency_dist == "uniform":
+            return random.uniform(0, 2 * mean)
+        if self.latency_dist == "exponential":
+            return random.expovariate(1.0 / mean)
+        return mean
+
+
+class _SessionStore:
+    """桩服务签发的登录会话"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._issued = {}
+        self.login_count = 0
+
+    def issue(self) -> str:
+        token = f"stub-{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self._issued[token] = time.monotonic()
+            self.login_count += 1
+        return token
+
+    def is_valid(self, cookie_header: str, ttl: float) -> bool:
+        for part in (cookie_header or "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "SESSION":
+                issued = self._issued.get(value)
+                return issued is not None and time.monotonic() - issued < ttl
+        return False
+
+
+def _make_handler(behavior: StubBehavior, sessions: _SessionStore):
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # 响应头与响应体分两次写出，不关闭 Nagle 时会与客户端延迟 ACK 叠加出约 40ms 的传输耗时
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+
+            if self.path.rstrip("/").endswith("login"):
+                self._send_json(
+                    200,
+                    {"success": True, "code": 200, "message": "ok"},
+                    extra_headers={"Set-Cookie": f"SESSION={sessions.issue()}; Path=/"},
+                )
+                return
+
+            if behavior.session_ttl > 0 and not sessions.is_valid(
+                self.headers.get("Cookie"), behavior.session_ttl
+            ):
+                self._send_json(401, {"success": False, "code": 401, "message": "session expired"})
+                return
+
+            delay = behavior.sample_latency()
+            if delay > 0:
+                time.sleep(delay)
+
+            if behavior.error_rate > 0 and random.random() < behavior.error_rate:
+                self._send_json(503, {"success": False, "code": 503, "message": "stub unavailable"})
+                return
+
+            try:
+                claim_id = json.loads(raw or b"{}").get("claimId")
+            except ValueError:
+                claim_id = None
+
+            passed = random.random() >= behavior.fail_rate
+            results = [] if passed else [{
+                "name": "StubRule",
+                "message": f"claimId={claim_id} 校验不通过",
+                "severity": "ERROR",
+                "args": None,
+            }]
+            self._send_json(200, {
+                "success": True,
+                "code": 200,
+                "message": "",
+                "traceId": f"stub-{claim_id}",
+                "data": {"pass": passed, "results": results},
+            })
+
+        def _send_json(self, status: int, body: dict, extra_headers: Optional[dict] = None):
+            content = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            for key, value in (extra_headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            # 压测时不打印访问日志
+            pass
+
+    return _Handler
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 压测时并发连接较多，放大 listen backlog
+    request_queue_size = 1024
+
+
+class StubValidateServer:
+    """可在后台线程中启动的桩服务（供压测 / 基准测试脚本使用）"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, behavior: StubBehavior = None) -> None:
+        self.behavior = behavior or StubBehavior()
+        self._sessions = _SessionStore()
+        self._server = _StubHTTPServer((host, port), _make_handler(self.behavior, self._sessions))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def login_count(self) -> int:
+        """已处理的登录请求数"""
+        return self._sessions.login_count
+
+    def start(self) -> "StubValidateServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="submitValidate 本地桩服务")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="监听地址（默认 127.0.0.1）")
+    parser.add_argument("--port", type=int, default=18080, help="监听端口（默认 18080）")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="平均响应延迟（毫秒）")
+    parser.add_argument(
+        "--latency-dist",
+        type=str,
+        choices=["fixed", "uniform", "exponential"],
+        default="fixed",
+        help="延迟分布（默认 fixed）",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 503 的概率（0~1）")
+    parser.add_argument("--fail-rate", type=float, default=0.1, help="返回校验不通过的概率（0~1）")
+    parser.add_argument("--session-ttl", type=float, default=0.0, help="登录会话有效期（秒），0 表示不校验会话")
+    args = parser.parse_args()
+
+    behavior = StubBehavior(
+        latency_ms=args.latency_ms,
+        latency_dist=args.latency_dist,
+        error_rate=args.error_rate,
+        fail_rate=args.fail_rate,
+        session_ttl=args.session_ttl,
+    )
+    server = StubValidateServer(args.host, args.port, behavior)
+    print(f"桩服务已启动: {server.base_url} (latency={args.latency_ms}ms/{args.latency_dist}, "
+          f"error_rate={args.error_rate}, fail_rate={args.fail_rate}, session_ttl={args.session_ttl})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+端到端基准：对本地桩服务运行 TestPipeline，对比各执行模式的吞吐、内存与尾延迟
+
+1. 用 gen_sample_excel.generate_bench_excel 生成指定行数 / itemId 分布 / 重复比例的工作簿
+2. 在本进程后台线程中启动 StubValidateServer（延迟分布、503 比例、校验不通过比例可配）
+3. 每个模式在独立的 spawn 子进程中运行完整 TestPipeline（含报告写出），
+   子进程各自统计峰值 RSS，互不影响
+4. 输出每个模式的 rows/s、峰值 RSS 与 p50/p99 响应时间
+
+模式:
+  sequential  顺序执行（request_interval=0）
+  thread      线程池（--workers）
+  async       asyncio（--workers 并发，需 aiohttp）
+  sharded     多进程分片（--processes 个进程，每进程 thread 模式）
+
+用法:
+  python benchmarks/bench_pipeline.py
+  python benchmarks/bench_pipeline.py --rows 20000 --modes thread,async --workers 50 \\
+      --latency-ms 20 --latency-dist exponential --error-rate 0.01 --duplicate-ratio 0.1
+  python benchmarks/bench_pipeline.py --json ./output/bench.json
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ai_intf_test.config_loader import AppConfig  # noqa: E402
+from ai_intf_test.latency_histogram import LatencyHistogram  # noqa: E402
+from ai_intf_test.stub_server import StubBehavior, StubValidateServer  # noqa: E402
+from gen_sample_excel import generate_bench_excel  # noqa: E402
+
+MODES = ("sequential", "thread", "async", "sharded")
+
+
+def build_config(mode: str, base_url: str, input_path: str, work_dir: str, args) -> AppConfig:
+    """按模式构造基准测试配置，所有输出写入临时目录"""
+    config = AppConfig()
+    config.server.base_url = base_url
+    config.excel.input_path = input_path
+    out_dir = os.path.join(work_dir, mode)
+    config.output.output_dir = out_dir
+    config.output.output_path = os.path.join(out_dir, "result.xlsx")
+    config.output.checkpoint_path = os.path.join(out_dir, "checkpoint.jsonl")
+    config.output.raw_response_dir = os.path.join(out_dir, "raw")
+    config.output.result_store_dir = os.path.join(out_dir, "runs")
+    config.log.log_file = os.path.join(out_dir, "bench.log")
+    config.log.level = "WARNING"
+    config.log.console_output = False
+    config.retry.max_retries = args.max_retries
+    config.retry.retry_interval = args.retry_interval
+    config.response_cache.coalesce = not args.no_coalesce
+    config.output.report_style = args.report_style
+
+    cc = config.concurrency
+    cc.request_interval = 0.0
+    cc.max_workers = args.workers
+    cc.max_in_flight = args.workers
+    cc.pool_size = args.workers
+    if mode == "sequential":
+        cc.enabled = False
+    elif mode == "sharded":
+        cc.enabled = True
+        cc.mode = "thread"
+        cc.processes = args.processes
+    else:
+        cc.enabled = True
+        cc.mode = mode
+    return config
+
+
+def _run_mode(mode: str, config: AppConfig) -> dict:
+    """子进程入口：运行一次完整流程，返回统计"""
+    from ai_intf_test.main import setup_logging
+
+    setup_logging(config.log.level, config.log.log_file, config.log.console_output)
+    # 逐行进度输出会显著拖慢顺序模式，基准时丢弃；在文件描述符层面重定向，
+    # 分片模式的孙进程同样生效（本进程专用于单个模式，无需恢复）
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    sys.stdout.flush()
+    os.dup2(devnull, sys.stdout.fileno())
+
+    start = time.perf_counter()
+    if mode == "sharded":
+        from ai_intf_test.sharded_runner import ShardedRunner
+        results = ShardedRunner(config).run()
+    else:
+        from ai_intf_test.pipeline import TestPipeline
+        results = TestPipeline(config).run()
+    elapsed = time.perf_counter() - start
+
+    hist = LatencyHistogram()
+    hist.record_values(r.response_time_ms for r in results if not r.error and not r.from_cache)
+    # ru_maxrss 在 Linux 上单位为 KB；分片模式取父进程与最大子进程中的较大者
+    peak_kb = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return {
+        "mode": mode,
+        "rows": len(results),
+        "errors": sum(1 for r in results if r.error),
+        "reused": sum(1 for r in results if r.from_cache),
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(len(results) / elapsed, 1) if elapsed > 0 else 0.0,
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+        "p50_ms": hist.percentile(50),
+        "p99_ms": hist.percentile(99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TestPipeline 端到端基准")
+    parser.add_argument("--rows", type=int, default=2000, help="工作簿行数（默认 2000）")
+    parser.add_argument("--item-mix", type=str, default=None, help='itemId / 模块权重，如 "eer:3,ptp:1"')
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0, help="重复行比例（默认 0）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子（默认 0）")
+    parser.add_argument(
+        "--modes",
+        type=str,
+        default="thread,async",
+        help=f"逗号分隔的执行模式，可选 {','.join(MODES)}（默认 thread,async）",
+    )
+    parser.add_argument("--workers", "-w", type=int, default=20, help="并发数（默认 20）")
+    parser.add_argument("--processes", type=int, default=2, help="sharded 模式的进程数（默认 2）")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="桩服务平均延迟（默认 20ms）")
+    parser.add_argument(
+        "--latency-dist",
+        type=str,
+        choices=["fixed", "uniform", "exponential"],
+        default="exponential",
+        help="桩服务延迟分布（默认 exponential）",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="桩服务返回 503 的概率")
+    parser.add_argument("--fail-rate", type=float, default=0.1, help="桩服务返回校验不通过的概率")
+    parser.add_argument("--max-retries", type=int, default=1, help="重试次数（默认 1）")
+    parser.add_argument("--retry-interval", type=float, default=0.05, help="重试基础间隔秒数（默认 0.05）")
+    parser.add_argument("--no-coalesce", action="store_true", help="关闭相同 (claimId, itemId) 请求合并")
+    parser.add_argument(
+        "--report-style",
+        type=str,
+        choices=["styled", "plain", "csv"],
+        default="styled",
+        help="报告明细写出方式（默认 styled）",
+    )
+    parser.add_argument("--keep", action="store_true", help="保留临时目录（工作簿与各模式报告）")
+    parser.add_argument("--json", type=str, default=None, help="将结果另存为 JSON 文件")
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"未知模式: {', '.join(sorted(unknown))}")
+
+    work_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    input_path = os.path.join(work_dir, "input.xlsx")
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        generate_bench_excel(input_path, args.rows, args.item_mix, args.duplicate_ratio, args.seed)
+
+    behavior = StubBehavior(
+        latency_ms=args.latency_ms,
+        latency_dist=args.latency_dist,
+        error_rate=args.error_rate,
+        fail_rate=args.fail_rate,
+    )
+    server = StubValidateServer(behavior=behavior).start()
+    print(f"行数={args.rows}  重复比例={args.duplicate_ratio}  并发={args.workers}  "
+          f"桩服务延迟={args.latency_ms}ms/{args.latency_dist}  503 比例={args.error_rate}")
+    print(f"  {'mode':<12}{'rows/s':>10}{'elapsed':>10}{'peak RSS':>12}{'p50':>8}{'p99':>8}"
+          f"{'errors':>8}{'reused':>8}")
+
+    # spawn：每个模式都从干净的解释器启动，峰值 RSS 不受父进程与前一模式影响
+    ctx = multiprocessing.get_context("spawn")
+    reports = []
+    try:
+        for mode in modes:
+            config = build_config(mode, server.base_url, input_path, work_dir, args)
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+                report = executor.submit(_run_mode, mode, config).result()
+            reports.append(report)
+            print(f"  {mode:<12}{report['rows_per_s']:>10.1f}{report['elapsed_s']:>9.2f}s"
+                  f"{report['peak_rss_mb']:>10.1f}MB{report['p50_ms']:>6}ms{report['p99_ms']:>6}ms"
+                  f"{report['errors']:>8}{report['reused']:>8}")
+    finally:
+        server.stop()
+
+    if args.json:
+        json_dir = os.path.dirname(args.json)
+        if json_dir:
+            os.makedirs(json_dir, exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": reports}, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入: {args.json}")
+
+    if args.keep:
+        print(f"临时目录: {work_dir}")
+    else:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,21 @@
 根据 BPM 实现清单，生成包含所有继承 BaseClaimWebApi 的 Controller
 对应 itemId 的测试输入模板。用户只需填入实际的 claimId 即可使用。
 
+指定 --rows 时改为生成基准测试用的大工作簿（write-only 模式流式写出，内存占用恒定）：
+claimId 自动填充，itemId 按 --item-mix 权重抽样，--duplicate-ratio 比例的行
+重复此前出现过的 (claimId, itemId)，用于测量请求合并 / 缓存的效果。
+
 用法:
   python gen_sample_excel.py
   python gen_sample_excel.py --output ./excel/test_input.xlsx
+
+  # 10 万行，eer 与 ptp 各占一半，5% 重复行
+  python gen_sample_excel.py --rows 100000 --item-mix eer:1,ptp:1 --duplicate-ratio 0.05 -o ./excel/bench.xlsx
 """
 import argparse
 import os
+import random
+from typing import List, Optional, Tuple
 
 from openpyxl import Workbook
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
@@ -160,6 +169,92 @@ def generate_sample_excel(output_path: str):
     print(f"包含 {len(CONTROLLERS)} 个模板，请在 claimId 列填入实际数据后使用")
 
 
+def parse_item_mix(spec: Optional[str]) -> Tuple[List[str], List[float]]:
+    """解析 itemId 权重，如 "T001:5,T010:1" 或按模块 "eer:3,ptp:1"
+
+    模块名展开为该模块下全部模板，权重在其中均分；为空时全部模板等权。
+
+    Returns:
+        (itemId 列表, 对应权重列表)
+    """
+    if not spec:
+        return [c[0] for c in CONTROLLERS], [1.0] * len(CONTROLLERS)
+
+    by_module = {}
+    for item_id, _, module in CONTROLLERS:
+        by_module.setdefault(module, []).append(item_id)
+
+    weights = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition(":")
+        weight = float(weight) if weight else 1.0
+        if weight < 0:
+            raise ValueError(f"权重不能为负数: {part}")
+        members = by_module.get(name.lower()) or [name.upper()]
+        for item_id in members:
+            weights[item_id] = weights.get(item_id, 0.0) + weight / len(members)
+    if not weights or sum(weights.values()) <= 0:
+        raise ValueError(f"item-mix 无有效权重: {spec}")
+    return list(weights), list(weights.values())
+
+
+def generate_bench_excel(
+    output_path: str,
+    rows: int,
+    item_mix: Optional[str] = None,
+    duplicate_ratio: float = 0.0,
+    seed: int = 0,
+    start_claim_id: int = 100000,
+) -> str:
+    """生成基准测试用输入 Excel（claimId 已填充）
+
+    Args:
+        output_path: 输出文件路径
+        rows: 数据行数
+        item_mix: itemId / 模块权重，见 parse_item_mix()
+        duplicate_ratio: 重复此前某一行 (claimId, itemId) 的行所占比例（0~1）
+        seed: 随机种子，相同参数生成的文件内容一致
+        start_claim_id: 起始 claimId
+    """
+    if not 0 <= duplicate_ratio < 1:
+        raise ValueError(f"duplicate_ratio 需在 [0, 1) 之间: {duplicate_ratio}")
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    item_ids, weights = parse_item_mix(item_mix)
+    rng = random.Random(seed)
+    # 按块抽样 itemId，避免逐行调用 choices()
+    chunk = 10000
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title="Sheet1")
+    ws.append(["claimId", "itemId"])
+
+    written = []
+    claim_id = start_claim_id
+    remaining = rows
+    while remaining > 0:
+        n = min(chunk, remaining)
+        for item_id in rng.choices(item_ids, weights=weights, k=n):
+            if written and rng.random() < duplicate_ratio:
+                row = written[rng.randrange(len(written))]
+            else:
+                row = (claim_id, item_id)
+                claim_id += 1
+                written.append(row)
+            ws.append(row)
+        remaining -= n
+
+    wb.save(output_path)
+    print(f"基准测试 Excel 已生成: {output_path}")
+    print(f"共 {rows} 行，{len(item_ids)} 个模板，不同 (claimId, itemId) {len(written)} 个")
+    return output_path
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="生成示例输入 Excel")
     parser.add_argument(
@@ -168,5 +263,33 @@ if __name__ == "__main__":
         default="./excel/test_input.xlsx",
         help="输出文件路径（默认: ./excel/test_input.xlsx）",
     )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=0,
+        help="生成基准测试用的大工作簿（claimId 自动填充），指定数据行数",
+    )
+    parser.add_argument(
+        "--item-mix",
+        type=str,
+        default=None,
+        help='itemId 或模块权重，如 "T001:5,T010:1" / "eer:3,ptp:1"（默认全部模板等权）',
+    )
+    parser.add_argument(
+        "--duplicate-ratio",
+        type=float,
+        default=0.0,
+        help="重复 (claimId, itemId) 行所占比例（0~1，默认 0）",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="随机种子（默认 0）")
     args = parser.parse_args()
-    generate_sample_excel(args.output)
+    if args.rows > 0:
+        generate_bench_excel(
+            args.output,
+            rows=args.rows,
+            item_mix=args.item_mix,
+            duplicate_ratio=args.duplicate_ratio,
+            seed=args.seed,
+        )
+    else:
+        generate_sample_excel(args.output)
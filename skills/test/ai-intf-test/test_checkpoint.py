@@ -0,0 +1,45 @@
+"""测试断点续跑 checkpoint"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_intf_test import models
+from ai_intf_test.checkpoint import CheckpointWriter, iter_checkpoint, load_completed_keys, skip_completed
+
+
+def _input(claim_id, item_id, row_index):
+    return models.TestInput(claim_id=claim_id, item_id=item_id, row_index=row_index)
+
+
+def _write(path, keys, resume=False):
+    writer = CheckpointWriter(path, resume=resume)
+    for claim_id, item_id in keys:
+        writer.append(models.TestResult(claim_id=claim_id, item_id=item_id, url=""))
+    writer.close()
+
+
+def test_resume_runs_remaining_duplicates(tmp_path):
+    """重复行只完成了一部分时，续跑只跳过已完成的次数"""
+    path = str(tmp_path / "checkpoint.jsonl")
+    _write(path, [(1, "A"), (2, "B")])
+
+    completed = load_completed_keys(path)
+    assert completed[(1, "A")] == 1
+
+    inputs = [_input(1, "A", 2), _input(1, "A", 3), _input(1, "A", 4), _input(2, "B", 5), _input(3, "C", 6)]
+    remaining = list(skip_completed(inputs, completed))
+    assert [t.row_index for t in remaining] == [3, 4, 6]
+    # 不修改传入的计数
+    assert completed[(1, "A")] == 1
+
+
+def test_resume_appends_and_skips_partial_line(tmp_path):
+    """崩溃留下的半行被跳过，续跑的结果追加在新行"""
+    path = str(tmp_path / "checkpoint.jsonl")
+    _write(path, [(1, "A")])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"claimId": 2, "itemId"')
+
+    _write(path, [(2, "B")], resume=True)
+    assert [(r.claim_id, r.item_id) for r in iter_checkpoint(path)] == [(1, "A"), (2, "B")]
@@ -0,0 +1,83 @@
+"""测试按服务熔断"""
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_intf_test import circuit_breaker
+from ai_intf_test.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+)
+from ai_intf_test.config_loader import CircuitBreakerConfig
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def _fail(breaker, times, status=None):
+    for _ in range(times):
+        breaker.before_request()
+        breaker.record(status)
+
+
+def test_opens_after_consecutive_failures(clock):
+    """连续失败达到阈值才打开；中间的成功请求清零计数，4xx 不算失败"""
+    breaker = CircuitBreaker("eer", failure_threshold=3, reset_timeout=10)
+    _fail(breaker, 2)
+    _fail(breaker, 1, status=200)
+    _fail(breaker, 2, status=503)
+    _fail(breaker, 5, status=404)
+    assert breaker.state == CLOSED
+
+    _fail(breaker, 3, status=500)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.before_request()
+    assert exc_info.value.retry_after == pytest.approx(10)
+    assert breaker.rejected == 1
+
+
+def test_half_open_probe_closes_or_reopens(clock):
+    breaker = CircuitBreaker("ptp", failure_threshold=1, reset_timeout=10, half_open_max_calls=1)
+    _fail(breaker, 1)
+    assert breaker.state == OPEN
+
+    clock[0] += 10
+    breaker.before_request()
+    assert breaker.state == HALF_OPEN
+    # 探测请求未返回前，其它请求仍被拒绝
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    breaker.record(None)
+    assert breaker.state == OPEN
+    assert breaker.open_count == 2
+
+    clock[0] += 10
+    breaker.before_request()
+    breaker.record(200)
+    assert breaker.state == CLOSED
+    breaker.before_request()
+
+
+def test_registry_isolates_services(clock):
+    config = CircuitBreakerConfig(enabled=True, failure_threshold=1, open_action="fail_fast")
+    registry = CircuitBreakerRegistry(config)
+    _fail(registry.get("eer"), 1)
+
+    assert registry.get("eer").state == OPEN
+    assert registry.get("ptp").state == CLOSED
+    assert registry.get("eer") is registry.get("eer")
+    assert not registry.requeue
+    assert registry.summary() == {"eer": {"state": OPEN, "open_count": 1, "rejected": 0}}
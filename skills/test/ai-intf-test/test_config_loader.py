@@ -0,0 +1,38 @@
+"""测试配置加载与校验"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_intf_test.config_loader import _build_concurrency_config, _build_output_config
+
+
+def test_concurrency_mode():
+    """并发模式不区分大小写，写错时报错而不是退化为顺序执行"""
+    assert _build_concurrency_config({}).mode == "thread"
+    assert _build_concurrency_config({"concurrency": {"mode": "Async"}}).mode == "async"
+    with pytest.raises(ValueError, match="concurrency.mode"):
+        _build_concurrency_config({"concurrency": {"mode": "asyncio"}})
+
+
+def test_report_style():
+    """报告样式写错时报错而不是退化为无样式输出"""
+    assert _build_output_config({}).report_style == "styled"
+    assert _build_output_config({"output": {"report_style": "CSV"}}).report_style == "csv"
+    with pytest.raises(ValueError, match="output.report_style"):
+        _build_output_config({"output": {"report_style": "fancy"}})
+
+
+def test_checkpoint_opt_in():
+    """checkpoint 默认不记录，避免不带 --resume 的重跑覆盖可续跑的文件"""
+    assert _build_output_config({}).checkpoint_path == ""
+    path = "./output/checkpoint.jsonl"
+    assert _build_output_config({"output": {"checkpoint_path": path}}).checkpoint_path == path
+
+
+def test_result_store_opt_in():
+    """运行存档默认不保存，避免每次运行都新增文件"""
+    assert _build_output_config({}).result_store_dir == ""
+    assert _build_output_config({"output": {"result_store_dir": "./runs"}}).result_store_dir == "./runs"
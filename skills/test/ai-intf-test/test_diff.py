@@ -0,0 +1,79 @@
+"""测试跨运行对比（diff）"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_intf_test.diff import LATENCY_REGRESSION, PASS_TO_FAIL, diff_runs
+from ai_intf_test import models
+from ai_intf_test.result_store import RunRecord, iter_run_records, load_run_index, save_run
+
+
+def _result(item_id, response_time_ms, passed=True, from_cache=False):
+    return models.TestResult(
+        claim_id=1,
+        item_id=item_id,
+        url="http://stub/validate",
+        service_type="eer",
+        status_code=200,
+        success=True,
+        passed=passed,
+        response_time_ms=response_time_ms,
+        from_cache=from_cache,
+    )
+
+
+def _record(response_time_ms, passed=True, from_cache=False):
+    return RunRecord("eer", 200, passed, False, (), response_time_ms, from_cache)
+
+
+def test_identical_runs_with_cached_duplicates_have_no_regression(tmp_path):
+    """重复键中包含复用结果（0ms）时，两次相同的运行不应报告延迟回归"""
+    results = [
+        _result("A", 300),
+        _result("A", 0, from_cache=True),
+        _result("B", 0, from_cache=True),
+        _result("B", 280),
+    ]
+    baseline_path = save_run(results, str(tmp_path / "base"))
+    current_path = save_run(results, str(tmp_path / "cur"))
+
+    diff = diff_runs(load_run_index(baseline_path), iter_run_records(current_path))
+
+    assert diff.current_rows == 4
+    assert diff.matched_rows == 2
+    assert diff.regression_count == 0
+    assert diff.changes == []
+
+
+def test_duplicates_resolved_the_same_way_on_both_sides(tmp_path):
+    """基线与本次的重复键都保留实际发送了请求的行，与行的先后顺序无关"""
+    results = [_result("A", 0, from_cache=True), _result("A", 300)]
+    baseline = load_run_index(save_run(results, str(tmp_path / "base")))
+    assert baseline[(1, "A")].response_time_ms == 300
+    assert baseline[(1, "A")].from_cache is False
+
+    current_path = save_run(list(reversed(results)), str(tmp_path / "cur"))
+    diff = diff_runs(baseline, iter_run_records(current_path))
+    assert diff.counts[LATENCY_REGRESSION] == 0
+
+
+def test_cached_rows_excluded_from_latency():
+    """复用结果不计入延迟分位数，也不参与延迟回归判定"""
+    baseline = {(1, "A"): _record(500), (1, "B"): _record(0, from_cache=True)}
+    current = [((1, "A"), _record(500)), ((1, "B"), _record(400))]
+
+    diff = diff_runs(baseline, current)
+    assert diff.baseline_latency["全部"].count == 1
+    assert diff.current_latency["全部"].count == 2
+    assert diff.counts[LATENCY_REGRESSION] == 0
+
+
+def test_latency_and_pass_regressions_detected():
+    """真实请求之间的延迟回归与 pass→fail 仍会报告"""
+    baseline = {(1, "A"): _record(100), (1, "B"): _record(100)}
+    current = [((1, "A"), _record(500)), ((1, "B"), _record(100, passed=False))]
+
+    diff = diff_runs(baseline, current)
+    assert diff.counts[LATENCY_REGRESSION] == 1
+    assert diff.counts[PASS_TO_FAIL] == 1
@@ -0,0 +1,32 @@
+"""测试 HTTP 客户端的原始响应落盘"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_intf_test import models
+from ai_intf_test.config_loader import AuthConfig, RetryConfig, ServerConfig
+from ai_intf_test.http_client import HttpClient
+
+
+def test_spilled_responses_not_overwritten(tmp_path):
+    """重复的 (claimId, itemId) 各自落盘，不互相覆盖"""
+    spill_dir = str(tmp_path / "raw")
+    client = HttpClient(
+        ServerConfig(),
+        AuthConfig(),
+        RetryConfig(),
+        url_template="{base_url}/{item_id}",
+        raw_response_mode="spill",
+        raw_spill_dir=spill_dir,
+    )
+    paths = []
+    for i in range(3):
+        result = client.new_result(models.TestInput(claim_id=7, item_id="X", row_index=i + 2))
+        client.fill_result(result, 200, b'{"data": {"pass": false}, "n": %d}' % i)
+        paths.append(result.raw_response_path)
+    client.close()
+
+    assert len(set(paths)) == 3
+    assert os.path.basename(paths[0]) == "7_X.json"
+    assert [open(p, "rb").read()[-2:-1] for p in paths] == [b"0", b"1", b"2"]
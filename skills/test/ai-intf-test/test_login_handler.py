@@ -0,0 +1,60 @@
+"""测试登录会话缓存文件与 401 重新登录"""
+import os
+import stat
+import sys
+import threading
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_intf_test import login_handler
+from ai_intf_test.config_loader import LoginConfig, ServerConfig
+from ai_intf_test.login_handler import LoginHandler, _read_cache_file, _write_cache_file
+
+
+def test_cache_disabled_by_default():
+    """登录会话缓存默认关闭"""
+    assert LoginConfig().cache_path == ""
+
+
+def test_cache_file_is_private(tmp_path):
+    """缓存文件包含明文凭据，只允许当前用户读写"""
+    path = str(tmp_path / "session" / ".login_session.json")
+    old_umask = os.umask(0o022)
+    try:
+        _write_cache_file(path, {"k": {"headers": {"Authorization": "Bearer x"}}})
+    finally:
+        os.umask(old_umask)
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert _read_cache_file(path)["k"]["headers"]["Authorization"] == "Bearer x"
+    assert os.listdir(os.path.dirname(path)) == [".login_session.json"]
+
+
+def test_failed_refresh_is_not_retried(monkeypatch):
+    """重新登录失败后，后续并发的 401 不再触发登录"""
+    attempts = []
+
+    def post(*args, **kwargs):
+        attempts.append(1)
+        raise requests.exceptions.ConnectionError("refused")
+
+    monkeypatch.setattr(login_handler.requests, "post", post)
+    handler = LoginHandler(LoginConfig(enabled=True, url="http://login", usernum="u"), ServerConfig())
+    session = requests.Session()
+    seen = handler.generation
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(handler.refresh(session, seen)))
+        for _ in range(20)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == [False] * 20
+    assert len(attempts) == 1
+    assert handler.refresh(session, handler.generation) is False
+    assert len(attempts) == 1
@@ -0,0 +1,92 @@
+"""测试令牌桶与自适应并发控制"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_intf_test import rate_limiter
+from ai_intf_test.rate_limiter import AdaptiveConcurrencyController, TokenBucket
+
+
+def _controller(**kwargs):
+    options = dict(min_limit=1, max_limit=8, backpressure_codes=[429, 503], window_size=4)
+    options.update(kwargs)
+    return AdaptiveConcurrencyController(**options)
+
+
+def test_token_bucket_burst_then_wait():
+    """桶内令牌用完后按速率预约后续令牌"""
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert 0.09 < bucket.reserve() <= 0.1
+    assert 0.19 < bucket.reserve() <= 0.2
+
+
+def test_controller_starts_at_max_limit():
+    """默认从并发上限开始，而不是从下限逐步爬升"""
+    assert _controller().limit == 8
+    assert _controller(initial_limit=3).limit == 3
+
+
+def test_controller_decreases_on_backpressure_and_grows_when_saturated():
+    controller = _controller(max_limit=10)
+    for _ in range(4):
+        controller.acquire()
+    for _ in range(4):
+        controller.release(503, 10)
+    assert controller.limit == 7
+
+    for _ in range(7):
+        controller.acquire()
+    for _ in range(4):
+        controller.release(200, 10)
+    assert controller.limit == 8
+
+
+def test_async_waiters_woken_by_release_without_polling(monkeypatch):
+    """asyncio 等待方由 release() 唤醒，唤醒次数与释放次数同量级，且在途数不超过 limit"""
+    wakeups = []
+    original = rate_limiter._resolve_waiter
+
+    def counting_resolve(future):
+        wakeups.append(1)
+        original(future)
+
+    monkeypatch.setattr(rate_limiter, "_resolve_waiter", counting_resolve)
+    controller = _controller(max_limit=2, window_size=1000)
+    peak = 0
+
+    async def worker():
+        nonlocal peak
+        await controller.acquire_async()
+        peak = max(peak, controller.in_flight)
+        await asyncio.sleep(0.01)
+        controller.release(200, 10)
+
+    async def main():
+        await asyncio.gather(*(worker() for _ in range(50)))
+
+    asyncio.run(main())
+    assert peak == 2
+    assert controller.in_flight == 0
+    assert len(wakeups) <= 50
+
+
+def test_cancelled_waiter_passes_wakeup_on():
+    """已被唤醒的等待方被取消时，名额让给下一个等待方"""
+    controller = _controller(max_limit=1)
+
+    async def main():
+        await controller.acquire_async()
+        first = asyncio.ensure_future(controller.acquire_async())
+        second = asyncio.ensure_future(controller.acquire_async())
+        await asyncio.sleep(0)
+        controller.release(200, 10)
+        # first 已被唤醒但尚未运行，此时取消
+        first.cancel()
+        await asyncio.wait_for(second, timeout=1)
+        assert controller.in_flight == 1
+
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+"""测试重复请求合并与 TTL 缓存"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_intf_test import models, response_cache
+from ai_intf_test.response_cache import ResponseCache
+
+
+def _result(error=None):
+    return models.TestResult(
+        claim_id=1, item_id="A", url="", status_code=200, passed=True,
+        response_time_ms=250, attempts=1, error=error,
+    )
+
+
+def test_concurrent_duplicates_coalesced_into_one_call():
+    """在途的相同请求只发送一次，其余线程共享结果副本"""
+    cache = ResponseCache()
+    calls = []
+    release = threading.Event()
+
+    def send():
+        calls.append(1)
+        release.wait(1)
+        return _result()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_execute((1, "A"), send)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert sorted(r.from_cache for r in results) == [False, True, True, True, True]
+    shared = [r for r in results if r.from_cache]
+    assert all(r.response_time_ms == 0 and r.attempts == 0 for r in shared)
+    assert cache.coalesced == 4
+
+
+def test_waiters_see_owner_exception():
+    cache = ResponseCache()
+    started = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        # 等待方在此期间合并到本次在途请求
+        time.sleep(0.1)
+        raise ConnectionError("down")
+
+    def waiter():
+        started.wait(1)
+        try:
+            cache.get_or_execute((1, "A"), lambda: _result())
+        except ConnectionError as e:
+            errors.append(e)
+
+    t = threading.Thread(target=waiter)
+    t.start()
+    with pytest.raises(ConnectionError):
+        cache.get_or_execute((1, "A"), failing)
+    t.join()
+    assert len(errors) == 1
+
+
+def test_ttl_cache_hit_and_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(response_cache, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    cache = ResponseCache(ttl_seconds=10)
+    calls = []
+
+    def send():
+        calls.append(1)
+        return _result()
+
+    cache.get_or_execute((1, "A"), send)
+    assert cache.get_or_execute((1, "A"), send).from_cache
+    now[0] += 10
+    assert not cache.get_or_execute((1, "A"), send).from_cache
+    assert len(calls) == 2
+    assert cache.hits == 1
+
+
+def test_result_cached_before_inflight_entry_removed():
+    """在途记录移除前结果已写入缓存，期间到达的相同请求不会重复发送"""
+    cache = ResponseCache(ttl_seconds=60)
+    store = cache._store
+    seen = []
+
+    def checked_store(key, result):
+        seen.append(key in cache._inflight)
+        store(key, result)
+
+    cache._store = checked_store
+    cache.get_or_execute((1, "A"), lambda: _result())
+    assert seen == [True]
+    assert cache._inflight == {}
+    assert cache.get_or_execute((1, "A"), lambda: _result()).from_cache
+
+
+def test_error_results_not_cached():
+    cache = ResponseCache(ttl_seconds=60)
+    cache.get_or_execute((1, "A"), lambda: _result(error="超时"))
+    assert not cache.get_or_execute((1, "A"), lambda: _result()).from_cache
+
+
+def test_async_duplicates_coalesced():
+    cache = ResponseCache()
+    calls = []
+
+    async def send():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return _result()
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_execute_async((1, "A"), send) for _ in range(4)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert sum(r.from_cache for r in results) == 3
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import List, Optional
+
+from .case_model import ModelRequest, ModelResponse
+from .vision_model_client import BatchUnsupportedError, InferItem, VisionModelClient
+
+
+class AsyncVisionModelClient:
+    """VisionModelClient 的异步版本（asyncio + aiohttp），适合一次提交大量截图。
+
+    复用 VisionModelClient 的地址、鉴权、超时、缓存、响应解析与退化规则，仅替换网络层：
+    - aiohttp.TCPConnector 复用 keep-alive 连接（连接数上限 pool_size）
+    - asyncio.Semaphore 限制在途请求数（max_in_flight）
+    - infer_batch 按 batch_size 把多张截图合并为一次请求（服务端不支持时逐张请求）
+    - 读取截图、计算缓存指纹、查询 / 写入 SQLite 缓存在线程池中执行，不阻塞事件循环
+
+    用法：
+        async with AsyncVisionModelClient(client) as async_client:
+            responses = await asyncio.gather(*(async_client.infer(r) for r in model_requests))
+    """
+
+    def __init__(self, client: VisionModelClient) -> None:
+        self._client = client
+        self._session = None
+        self._aiohttp = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncVisionModelClient":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        if self._session is not None:
+            return
+
+        try:
+            import aiohttp
+        except ImportError as e:
+            raise ImportError("异步推理需要安装 aiohttp: pip install aiohttp") from e
+
+        self._aiohttp = aiohttp
+        connect_timeout, read_timeout = self._client.timeout
+        headers = {"Accept": "application/json"}
+        if self._client.api_key:
+            headers["Authorization"] = f"Bearer {self._client.api_key}"
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self._client.pool_size),
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout, sock_read=read_timeout),
+        )
+        self._semaphore = asyncio.Semaphore(self._client.max_in_flight)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def infer(self, request: ModelRequest) -> ModelResponse:
+        return (await self.infer_batch([request]))[0]
+
+    async def infer_batch(self, model_requests: List[ModelRequest]) -> List[ModelResponse]:
+        """推理多张截图：先查缓存，未命中的按 batch_size 分批并发请求，结果与输入顺序一致。"""
+
+        client = self._client
+        responses, pending = await asyncio.to_thread(client.lookup_cached, model_requests)
+
+        chunks = [pending[start:start + client.batch_size] for start in range(0, len(pending), client.batch_size)]
+        results = await asyncio.gather(*(
+            self._call_many([(b, model_requests[i].prompt) for i, b, _ in chunk]) for chunk in chunks
+        ))
+        for chunk, chunk_results in zip(chunks, results):
+            for (i, _, _), response in zip(chunk, chunk_results):
+                responses[i] = response
+
+        return await asyncio.to_thread(client.finish_batch, model_requests, responses, pending)
+
+    async def _call_many(self, items: List[InferItem]) -> List[Optional[ModelResponse]]:
+        client = self._client
+        if len(items) > 1 and client.batch_supported:
+            try:
+                return await self._call_model_batch(items)
+            except BatchUnsupportedError:
+                if client.batch_supported:
+                    client.batch_supported = False
+                    print("视觉模型服务不支持批量推理，改为逐张请求")
+        return list(await asyncio.gather(*(self._call_model(b, prompt) for b, prompt in items)))
+
+    async def _post(self, url: str, form):
+        """返回 (状态码, JSON 或 None)。"""
+        async with self._semaphore:
+            async with self._session.post(url, data=form) as resp:
+                data = await resp.json(content_type=None) if resp.status == 200 else None
+                return resp.status, data
+
+    async def _call_model(self, image_bytes: bytes, prompt: str) -> Optional[ModelResponse]:
+        if self._session is None:
+            await self.open()
+        form = self._aiohttp.FormData()
+        form.add_field("image", image_bytes, filename="screenshot.png", content_type="image/png")
+        form.add_field("payload", json.dumps({"prompt": prompt}))
+        try:
+            status, data = await self._post(self._client.endpoint, form)
+            if status != 200 or not isinstance(data, dict):
+                return None
+            return self._client.build_response(data)
+        except Exception:
+            return None
+
+    async def _call_model_batch(self, items: List[InferItem]) -> List[Optional[ModelResponse]]:
+        if self._session is None:
+            await self.open()
+        form = self._aiohttp.FormData()
+        for i, (image_bytes, _) in enumerate(items):
+            form.add_field("images", image_bytes, filename=f"screenshot_{i}.png", content_type="image/png")
+        form.add_field("payload", json.dumps({"prompts": [prompt for _, prompt in items]}))
+        try:
+            status, data = await self._post(self._client.batch_endpoint, form)
+        except Exception:
+            return [None] * len(items)
+        return self._client.parse_batch(status, data, len(items))
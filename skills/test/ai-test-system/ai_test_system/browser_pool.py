@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .case_model import TestCase
+from .login_handler import LoginHandler
+from .screenshot_captor import ScreenshotCaptor
+from .tracing import span
+
+CaseHandler = Callable[[ScreenshotCaptor, TestCase], TestCase]
+
+
+def is_driver_alive(captor: ScreenshotCaptor) -> bool:
+    """探测浏览器会话是否仍可用（进程崩溃、会话失效时返回 False）。"""
+
+    driver = captor.get_driver()
+    if driver is None:
+        return False
+    try:
+        driver.execute_script("return 1")
+        return True
+    except Exception:
+        return False
+
+
+class BrowserWorker:
+    """浏览器池中的单个工作者：持有一个 ScreenshotCaptor，启动时登录一次，之后在多条用例间复用。"""
+
+    def __init__(
+        self,
+        index: int,
+        captor_factory: Callable[[], ScreenshotCaptor],
+        login_handler: Optional[LoginHandler] = None,
+    ) -> None:
+        self.index = index
+        self._captor_factory = captor_factory
+        self._login_handler = login_handler
+        self.captor: Optional[ScreenshotCaptor] = None
+        self.restarts = 0
+        # 距上次成功处理用例以来的连续重启次数，偶发崩溃不会累积到整个运行
+        self.consecutive_restarts = 0
+
+    def start(self) -> None:
+        """启动浏览器并登录（登录失败仅提示，与单浏览器模式一致）。"""
+
+        self.captor = self._captor_factory()
+        with span("browser.start", worker=self.index):
+            self.captor.open()
+        if self._login_handler is not None:
+            try:
+                with span("browser.login", worker=self.index):
+                    self._login_handler.execute(self.captor.get_driver())
+            except Exception as e:
+                print(f"[浏览器 {self.index}] 登录失败: {e}，继续执行...")
+
+    def restart(self) -> None:
+        """关闭已崩溃的浏览器并重新启动、重新登录。"""
+
+        self.restarts += 1
+        self.consecutive_restarts += 1
+        self.close()
+        self.start()
+
+    def close(self) -> None:
+        if self.captor is None:
+            return
+        try:
+            self.captor.close()
+        except Exception:
+            # 浏览器进程已退出时 quit() 也可能失败，忽略即可
+            pass
+        self.captor = None
+
+
+class _RunState:
+    """一次 run() 中各浏览器线程共享的状态。"""
+
+    # 队列暂时为空、但其它浏览器仍有用例在处理（可能因崩溃交还）时的等待间隔
+    _POLL_SECONDS = 0.05
+
+    def __init__(
+        self, alive: int, total: int, done: "queue.Queue[Tuple[TestCase, Optional[Exception]]]"
+    ) -> None:
+        self.lock = threading.Lock()
+        self.alive = alive
+        self.unfinished = total
+        self.done = done
+        self.stopped = threading.Event()
+        self._crashes: Dict[int, int] = {}
+
+    def record_crash(self, case: TestCase) -> int:
+        """记录用例导致浏览器崩溃一次（跨浏览器累计），返回该用例的累计崩溃次数。"""
+
+        with self.lock:
+            count = self._crashes.get(id(case), 0) + 1
+            self._crashes[id(case)] = count
+            return count
+
+    def next_case(self, tasks: "queue.Queue[TestCase]") -> Optional[TestCase]:
+        """领取下一条用例；所有用例都已完成或运行被中止时返回 None。"""
+
+        while not self.stopped.is_set():
+            try:
+                return tasks.get(timeout=self._POLL_SECONDS)
+            except queue.Empty:
+                with self.lock:
+                    if self.unfinished <= 0:
+                        return None
+        return None
+
+    def finish(self, case: TestCase, error: Optional[Exception]) -> None:
+        with self.lock:
+            self.unfinished -= 1
+        self.done.put((case, error))
+
+
+class BrowserPool:
+    """N 个无头浏览器并行处理用例。
+
+    - 用例放入共享队列，空闲的浏览器依次领取，处理快的浏览器自然多领
+    - 每个浏览器启动时登录一次，之后复用会话
+    - 处理用例时浏览器崩溃（会话不可用）会自动重启、重新登录并重试该用例；
+      成功处理一条用例后连续重启计数清零，连续重启达到 max_restarts 后仍崩溃的浏览器退出，
+      它正在处理的用例与剩余用例由其它浏览器继续处理（只剩这一个浏览器时该用例记为失败）
+    - 同一用例累计导致 max_case_attempts 次崩溃后记为失败，不再重试，
+      避免必然导致浏览器崩溃的页面耗尽所有浏览器
+    - 用例本身的异常（浏览器仍可用）只记为该用例失败，不影响整体运行
+    """
+
+    def __init__(
+        self,
+        size: int,
+        captor_factory: Callable[[], ScreenshotCaptor],
+        login_handler: Optional[LoginHandler] = None,
+        max_restarts: int = 3,
+        max_case_attempts: int = 2,
+    ) -> None:
+        self.size = max(1, size)
+        self.max_restarts = max_restarts
+        self.max_case_attempts = max(1, max_case_attempts)
+        self.workers = [
+            BrowserWorker(i + 1, captor_factory, login_handler) for i in range(self.size)
+        ]
+
+    def run(
+        self, cases: List[TestCase], handler: CaseHandler
+    ) -> Iterator[Tuple[TestCase, Optional[Exception]]]:
+        """并行处理用例，按完成顺序逐条产出 (用例, 异常或 None)。
+
+        产出在调用方线程中进行，调用方可以在这里串行地做 Excel 回写等非线程安全操作。
+        """
+
+        tasks: "queue.Queue[TestCase]" = queue.Queue()
+        for case in cases:
+            tasks.put(case)
+        done: "queue.Queue[Tuple[TestCase, Optional[Exception]]]" = queue.Queue()
+        state = _RunState(len(self.workers), len(cases), done)
+
+        def worker_loop(worker: BrowserWorker) -> None:
+            try:
+                self._run_worker(worker, tasks, state, handler)
+            finally:
+                with state.lock:
+                    state.alive -= 1
+                    last = state.alive == 0
+                if last:
+                    # 所有浏览器都已退出：剩余未处理的用例记为失败，避免调用方一直等待
+                    while True:
+                        try:
+                            case = tasks.get_nowait()
+                        except queue.Empty:
+                            break
+                        state.finish(case, RuntimeError("没有可用的浏览器"))
+
+        threads = [
+            threading.Thread(target=worker_loop, args=(w,), name=f"browser-{w.index}", daemon=True)
+            for w in self.workers
+        ]
+        for t in threads:
+            t.start()
+
+        try:
+            for _ in range(len(cases)):
+                yield done.get()
+        finally:
+            # 调用方提前结束（异常 / 中断）时丢弃剩余任务，让工作线程尽快退出
+            state.stopped.set()
+            while True:
+                try:
+                    tasks.get_nowait()
+                except queue.Empty:
+                    break
+            for t in threads:
+                t.join()
+            self.close()
+
+    def _run_worker(
+        self,
+        worker: BrowserWorker,
+        tasks: "queue.Queue[TestCase]",
+        state: "_RunState",
+        handler: CaseHandler,
+    ) -> None:
+        try:
+            worker.start()
+            print(f"[浏览器 {worker.index}] 已启动")
+        except Exception as e:
+            print(f"[浏览器 {worker.index}] 启动失败: {e}")
+            worker.close()
+            return
+
+        while True:
+            case = state.next_case(tasks)
+            if case is None:
+                return
+
+            if self._process_case(worker, case, tasks, state, handler):
+                return
+
+    def _process_case(
+        self,
+        worker: BrowserWorker,
+        case: TestCase,
+        tasks: "queue.Queue[TestCase]",
+        state: "_RunState",
+        handler: CaseHandler,
+    ) -> bool:
+        """处理一条用例并上报结果；浏览器需要退出时返回 True。"""
+
+        # 浏览器崩溃时重启并重试当前用例；用例自身的错误不重试
+        while True:
+            try:
+                handler(worker.captor, case)
+                worker.consecutive_restarts = 0
+                state.finish(case, None)
+                return False
+            except Exception as e:
+                if is_driver_alive(worker.captor):
+                    worker.consecutive_restarts = 0
+                    state.finish(case, e)
+                    return False
+                retry = state.record_crash(case) < self.max_case_attempts
+                if not retry:
+                    print(f"[浏览器 {worker.index}] 用例 {case.case_id} 多次导致浏览器崩溃，记为失败")
+                    state.finish(case, e)
+                if worker.consecutive_restarts >= self.max_restarts:
+                    print(f"[浏览器 {worker.index}] 连续崩溃次数过多，退出")
+                    self._give_back(worker, case if retry else None, e, tasks, state)
+                    return True
+                print(f"[浏览器 {worker.index}] 浏览器崩溃: {e}，正在重启...")
+                try:
+                    worker.restart()
+                except Exception as restart_error:
+                    print(f"[浏览器 {worker.index}] 重启失败: {restart_error}")
+                    self._give_back(worker, case if retry else None, e, tasks, state)
+                    return True
+                if not retry:
+                    return False
+
+    @staticmethod
+    def _give_back(
+        worker: BrowserWorker,
+        case: Optional[TestCase],
+        error: Exception,
+        tasks: "queue.Queue[TestCase]",
+        state: "_RunState",
+    ) -> None:
+        """浏览器退出前交还正在处理的用例：还有其它浏览器时放回队列，否则记为失败。
+
+        case 为 None 表示当前用例已记为失败，只需关闭浏览器。
+        """
+
+        worker.close()
+        if case is None:
+            return
+        with state.lock:
+            requeue = state.alive > 1
+            if requeue:
+                tasks.put(case)
+        if requeue:
+            print(f"[浏览器 {worker.index}] 用例 {case.case_id} 交由其它浏览器处理")
+        else:
+            state.finish(case, error)
+
+    def close(self) -> None:
+        for worker in self.workers:
+            worker.close()
@@ -29,7 +29,11 @@ class TestCase:
     description: str
     system_url: str
     extra_context: Optional[str] = None
+    # 页面就绪策略（如 "network_idle"、"selector:#main"），为空时使用配置中的默认策略
+    readiness: Optional[str] = None
     screenshot_path: Optional[str] = None
+    # 标注图的缩略图（开启 mark.thumbnail_width 时生成，回写 Excel 时优先嵌入）
+    thumbnail_path: Optional[str] = None
     parameter_regions: List[ParameterRegion] = field(default_factory=list)
 
 
@@ -39,6 +43,8 @@ class ModelRequest:
 
     image_path: str
     prompt: str
+    # 截图阶段已在内存中的截图字节，设置后推理时不再从磁盘读取
+    image_bytes: Optional[bytes] = field(default=None, repr=False)
 
 
 @dataclass
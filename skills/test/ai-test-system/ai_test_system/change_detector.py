@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageChops
+
+from .case_model import BoundingBox, ParameterRegion
+from .image_hash import dhash, hamming_distance, sha256_bytes
+
+
+@dataclass
+class BaselineEntry:
+    """上一次成功处理某条用例时的结果。"""
+
+    sha256: str  # 当时截图（即磁盘上 ./output/<case_id>.png）的内容哈希
+    prompt: str
+    marked_path: str
+    regions: List[ParameterRegion]
+    infer_seconds: float = 0.0
+    mark_seconds: float = 0.0
+    settings: str = ""  # 生成该结果时的标注与模型配置指纹
+
+    def to_dict(self) -> dict:
+        return {
+            "sha256": self.sha256,
+            "prompt": self.prompt,
+            "settings": self.settings,
+            "marked_path": self.marked_path,
+            "regions": [
+                [r.name, r.role, r.box.x1, r.box.y1, r.box.x2, r.box.y2] for r in self.regions
+            ],
+            "infer_seconds": round(self.infer_seconds, 3),
+            "mark_seconds": round(self.mark_seconds, 3),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BaselineEntry":
+        return cls(
+            sha256=data["sha256"],
+            prompt=data.get("prompt", ""),
+            marked_path=data["marked_path"],
+            regions=[
+                ParameterRegion(name, role, BoundingBox(x1, y1, x2, y2))
+                for name, role, x1, y1, x2, y2 in data.get("regions", [])
+            ],
+            infer_seconds=float(data.get("infer_seconds", 0.0)),
+            mark_seconds=float(data.get("mark_seconds", 0.0)),
+            settings=data.get("settings", ""),
+        )
+
+
+class ChangeDetector:
+    """对比本次截图与上一次运行的截图，页面未变化的用例直接复用上次的参数区域与标注图。
+
+    判断顺序（由快到慢）：
+    1. 字节完全相同 → 未变化
+    2. dHash 汉明距离超过 max_hash_distance → 已变化（无需逐像素比较）
+    3. 灰度逐像素比较，差值超过 pixel_tolerance 的像素占比不超过 max_changed_ratio → 未变化
+
+    描述（prompt）或标注、模型配置（settings_fingerprint）变化、上次的标注图不存在、
+    或磁盘上的截图已不是上次记录的那一张时，一律视为已变化。
+    基线记录在 baseline_path（JSON），运行结束时 save() 一次。多个截图线程共用一个实例，内部加锁。
+    """
+
+    def __init__(
+        self,
+        baseline_path: str,
+        max_hash_distance: int = 4,
+        max_changed_ratio: float = 0.0,
+        pixel_tolerance: int = 16,
+        settings_fingerprint: str = "",
+    ) -> None:
+        self.baseline_path = baseline_path
+        self.settings_fingerprint = settings_fingerprint
+        self.max_hash_distance = max_hash_distance
+        self.max_changed_ratio = max_changed_ratio
+        self.pixel_tolerance = pixel_tolerance
+        self._lock = threading.Lock()
+        self._entries: Dict[str, BaselineEntry] = {}
+        self._load()
+
+        # 统计
+        self.compared = 0
+        self.skipped = 0
+        self.saved_seconds = 0.0
+
+    def _load(self) -> None:
+        if not os.path.exists(self.baseline_path):
+            return
+        try:
+            with open(self.baseline_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._entries = {case_id: BaselineEntry.from_dict(item) for case_id, item in data.items()}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"变化检测基线读取失败: {e}，本次运行将全部重新推理")
+            self._entries = {}
+
+    def load_previous(self, case_id: str, prompt: str, screenshot_path: str) -> Optional[bytes]:
+        """截图前调用：读取上一次运行的截图（本次截图会覆盖它）。没有可复用的基线时返回 None。"""
+
+        with self._lock:
+            entry = self._entries.get(case_id)
+        if entry is None or entry.prompt != prompt or entry.settings != self.settings_fingerprint:
+            return None
+        if not os.path.exists(entry.marked_path):
+            return None
+        try:
+            with open(screenshot_path, "rb") as f:
+                previous = f.read()
+        except OSError:
+            return None
+        # 磁盘上的截图必须正是基线记录的那一张，否则基线中的区域与它不对应
+        return previous if sha256_bytes(previous) == entry.sha256 else None
+
+    def check(self, case_id: str, previous: bytes, current: bytes) -> Optional[BaselineEntry]:
+        """比较上一次与本次截图；页面未变化时返回可复用的基线并计入跳过统计，否则返回 None。"""
+
+        unchanged = self.is_unchanged(previous, current)
+        with self._lock:
+            self.compared += 1
+            entry = self._entries.get(case_id)
+            if not unchanged or entry is None:
+                return None
+            self.skipped += 1
+            self.saved_seconds += entry.infer_seconds + entry.mark_seconds
+            # 基线改为指向本次截图，下次运行与它比较
+            entry.sha256 = sha256_bytes(current)
+            return entry
+
+    def is_unchanged(self, previous: bytes, current: bytes) -> bool:
+        if previous == current:
+            return True
+        old = Image.open(io.BytesIO(previous))
+        new = Image.open(io.BytesIO(current))
+        if old.size != new.size:
+            return False
+        if hamming_distance(dhash(old), dhash(new)) > self.max_hash_distance:
+            return False
+
+        diff = ImageChops.difference(old.convert("L"), new.convert("L"))
+        histogram = diff.histogram()
+        changed = sum(histogram[self.pixel_tolerance + 1:])
+        return changed <= self.max_changed_ratio * new.size[0] * new.size[1]
+
+    def record(
+        self,
+        case_id: str,
+        sha256: str,
+        prompt: str,
+        marked_path: str,
+        regions: List[ParameterRegion],
+        infer_seconds: float,
+        mark_seconds: float,
+    ) -> None:
+        """用例重新推理、标注成功后更新基线。"""
+
+        entry = BaselineEntry(
+            sha256, prompt, marked_path, list(regions), infer_seconds, mark_seconds, self.settings_fingerprint
+        )
+        with self._lock:
+            self._entries[case_id] = entry
+
+    def save(self) -> None:
+        """写出基线（先写临时文件再替换，中断不会损坏原基线）。"""
+
+        with self._lock:
+            data = {case_id: entry.to_dict() for case_id, entry in self._entries.items()}
+        directory = os.path.dirname(self.baseline_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.baseline_path}.saving"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.baseline_path)
+
+    def summary(self) -> str:
+        return (
+            f"变化检测: 对比 {self.compared} 条，页面未变化跳过推理与标注 {self.skipped} 条，"
+            f"节省约 {self.saved_seconds:.1f}s"
+        )
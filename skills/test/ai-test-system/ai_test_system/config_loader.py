@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 
 
@@ -11,6 +11,9 @@ class ExcelConfig:
     system_url_column: str
     extra_context_column: str
     output_image_column: str
+    readiness_column: str = "页面就绪"  # 每条用例的页面就绪策略列（不存在或为空时使用默认策略）
+    save_every: int = 20  # 截图回写时每累计多少条保存一次工作簿
+    save_interval_seconds: int = 60  # 距上次保存超过该秒数也会保存（0 表示不按时间保存）
 
 
 @dataclass
@@ -20,6 +23,14 @@ class ScreenshotConfig:
     window_width: int
     window_height: int
     timeout_seconds: int
+    workers: int = 1  # 并行浏览器数量，每个浏览器登录一次后复用
+    max_restarts: int = 3  # 单个浏览器连续崩溃后最多重启次数（成功处理用例后清零）
+    max_case_attempts: int = 2  # 同一用例导致浏览器崩溃达到该次数后记为失败，不再重试
+    readiness: str = "load"  # 默认页面就绪策略: load / network_idle / dom_quiet / selector:<css>，可用分号组合
+    network_idle_ms: int = 500  # network_idle: 无网络请求持续多少毫秒视为就绪
+    network_idle_max_inflight: int = 0  # network_idle: 允许的常驻请求数（长轮询、WebSocket 等）
+    dom_quiet_ms: int = 300  # dom_quiet: DOM 无变化持续多少毫秒视为就绪
+    page_load_strategy: str = "normal"  # normal 等待 load 事件；eager 在 DOMContentLoaded 后即交给就绪策略
 
 
 @dataclass
@@ -39,6 +50,18 @@ class VisionModelConfig:
     provider: str
     endpoint: str
     api_key: Optional[str] = None
+    cache_enabled: bool = False  # 缓存推理结果，重复运行时相同截图不再调用模型
+    cache_path: str = "./output/inference_cache.sqlite"
+    cache_version: str = ""  # 缓存命名空间，模型在同一地址重新部署后修改该值即可不再复用旧结果
+    cache_max_entries: int = 5000  # 超过后按最近使用时间淘汰
+    near_duplicate_distance: int = 0  # dHash 汉明距离阈值，>0 时未变化的页面也复用结果（0 表示仅精确匹配）
+    timeout_seconds: float = 30.0  # 单次推理请求的读取超时
+    connect_timeout_seconds: float = 5.0
+    pool_size: int = 4  # HTTP 连接池大小，应不小于推理并发数
+    max_in_flight: int = 4  # 同时发往模型服务的请求数上限
+    batch_size: int = 1  # >1 时把多张截图合并为一次请求（服务端需支持批量）
+    batch_wait_ms: int = 20  # 合并批量请求时最多等待后续截图的毫秒数
+    batch_endpoint: str = ""  # 批量推理地址，为空时与 endpoint 相同
 
 
 @dataclass
@@ -46,6 +69,26 @@ class MarkConfig:
     input_color: str
     output_color: str
     line_width: int
+    output_format: str = "png"  # 标注图格式: png / jpeg / webp
+    compress_level: int = 6  # PNG 压缩级别 0~9，越小越快、文件越大
+    quality: int = 85  # JPEG / WebP 质量
+    thumbnail_width: int = 0  # >0 时另存该宽度的缩略图并嵌入 Excel（原图仍保留）
+
+
+@dataclass
+class PipelineConfig:
+    infer_workers: int = 2  # 视觉模型推理并发数
+    mark_workers: int = 1  # 图片标注并发数
+    queue_size: int = 8  # 阶段之间队列容量，写满时上游阻塞等待
+
+
+@dataclass
+class ChangeDetectionConfig:
+    enabled: bool = False  # 与上次运行的截图比较，页面未变化时复用上次的区域与标注图
+    baseline_path: str = "./output/change_baseline.json"
+    max_hash_distance: int = 4  # dHash 汉明距离超过该值直接判为已变化
+    max_changed_ratio: float = 0.0  # 变化像素占比不超过该值视为未变化（0 表示只容忍灰度噪点）
+    pixel_tolerance: int = 16  # 灰度差不超过该值的像素不计为变化（抗锯齿、压缩噪点）
 
 
 @dataclass
@@ -62,6 +105,8 @@ class AppConfig:
     vision_model: VisionModelConfig
     mark: MarkConfig
     log: LogConfig
+    pipeline: PipelineConfig = field(default_factory=PipelineConfig)
+    change_detection: ChangeDetectionConfig = field(default_factory=ChangeDetectionConfig)
 
 
 def _build_excel_config(data: dict) -> ExcelConfig:
@@ -74,6 +119,9 @@ def _build_excel_config(data: dict) -> ExcelConfig:
         system_url_column=excel.get("system_url_column", "SystemURL"),
         extra_context_column=excel.get("extra_context_column", "ExtraContext"),
         output_image_column=excel.get("output_image_column", "ScreenshotPath"),
+        readiness_column=excel.get("readiness_column", "页面就绪") or "",
+        save_every=int(excel.get("save_every", 20)),
+        save_interval_seconds=int(excel.get("save_interval_seconds", 60)),
     )
 
 
@@ -85,6 +133,14 @@ def _build_screenshot_config(data: dict) -> ScreenshotConfig:
         window_width=int(screenshot.get("window_width", 1920)),
         window_height=int(screenshot.get("window_height", 1080)),
         timeout_seconds=int(screenshot.get("timeout_seconds", 20)),
+        workers=max(1, int(screenshot.get("workers", 1))),
+        max_restarts=int(screenshot.get("max_restarts", 3)),
+        max_case_attempts=max(1, int(screenshot.get("max_case_attempts", 2))),
+        readiness=screenshot.get("readiness") or "load",
+        network_idle_ms=int(screenshot.get("network_idle_ms", 500)),
+        network_idle_max_inflight=int(screenshot.get("network_idle_max_inflight", 0)),
+        dom_quiet_ms=int(screenshot.get("dom_quiet_ms", 300)),
+        page_load_strategy=screenshot.get("page_load_strategy", "normal"),
     )
 
 
@@ -108,15 +164,56 @@ def _build_vision_model_config(data: dict) -> VisionModelConfig:
         provider=vm.get("provider", "aliyun_open_source"),
         endpoint=vm.get("endpoint", "http://localhost:8000/predict"),
         api_key=vm.get("api_key") or None,
+        cache_enabled=bool(vm.get("cache_enabled", False)),
+        cache_path=vm.get("cache_path", "./output/inference_cache.sqlite"),
+        cache_version=str(vm.get("cache_version") or ""),
+        cache_max_entries=max(1, int(vm.get("cache_max_entries", 5000))),
+        near_duplicate_distance=max(0, int(vm.get("near_duplicate_distance", 0))),
+        timeout_seconds=float(vm.get("timeout_seconds", 30)),
+        connect_timeout_seconds=float(vm.get("connect_timeout_seconds", 5)),
+        pool_size=max(1, int(vm.get("pool_size", 4))),
+        max_in_flight=max(1, int(vm.get("max_in_flight", 4))),
+        batch_size=max(1, int(vm.get("batch_size", 1))),
+        batch_wait_ms=max(0, int(vm.get("batch_wait_ms", 20))),
+        batch_endpoint=vm.get("batch_endpoint") or "",
     )
 
 
 def _build_mark_config(data: dict) -> MarkConfig:
     mark = data.get("mark", {})
+    output_format = str(mark.get("output_format", "png")).lower()
+    thumbnail_width = max(0, int(mark.get("thumbnail_width", 0)))
+    if output_format == "webp" and thumbnail_width == 0:
+        # Excel 无法显示 WebP 图片，回写时需嵌入 PNG 缩略图
+        thumbnail_width = 480
     return MarkConfig(
         input_color=mark.get("input_color", "red"),
         output_color=mark.get("output_color", "green"),
         line_width=int(mark.get("line_width", 3)),
+        output_format=output_format,
+        compress_level=min(9, max(0, int(mark.get("compress_level", 6)))),
+        quality=min(100, max(1, int(mark.get("quality", 85)))),
+        thumbnail_width=thumbnail_width,
+    )
+
+
+def _build_pipeline_config(data: dict) -> PipelineConfig:
+    pipeline = data.get("pipeline", {})
+    return PipelineConfig(
+        infer_workers=max(1, int(pipeline.get("infer_workers", 2))),
+        mark_workers=max(1, int(pipeline.get("mark_workers", 1))),
+        queue_size=max(1, int(pipeline.get("queue_size", 8))),
+    )
+
+
+def _build_change_detection_config(data: dict) -> ChangeDetectionConfig:
+    cd = data.get("change_detection", {})
+    return ChangeDetectionConfig(
+        enabled=bool(cd.get("enabled", False)),
+        baseline_path=cd.get("baseline_path", "./output/change_baseline.json"),
+        max_hash_distance=max(0, int(cd.get("max_hash_distance", 4))),
+        max_changed_ratio=max(0.0, float(cd.get("max_changed_ratio", 0.0))),
+        pixel_tolerance=min(255, max(0, int(cd.get("pixel_tolerance", 16)))),
     )
 
 
@@ -147,6 +244,8 @@ def load_config(path: str) -> AppConfig:
     vm_cfg = _build_vision_model_config(data)
     mark_cfg = _build_mark_config(data)
     log_cfg = _build_log_config(data)
+    pipeline_cfg = _build_pipeline_config(data)
+    change_detection_cfg = _build_change_detection_config(data)
 
     return AppConfig(
         excel=excel_cfg,
@@ -155,4 +254,6 @@ def load_config(path: str) -> AppConfig:
         vision_model=vm_cfg,
         mark=mark_cfg,
         log=log_cfg,
+        pipeline=pipeline_cfg,
+        change_detection=change_detection_cfg,
     )
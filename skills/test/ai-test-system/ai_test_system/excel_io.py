@@ -1,12 +1,19 @@
 from __future__ import annotations
 
+import io
 import os
-from typing import List
+import time
+from typing import Dict, List, Tuple
 
 from openpyxl import load_workbook
 from openpyxl.drawing.image import Image as XLImage
+from openpyxl.drawing.spreadsheet_drawing import AnchorMarker, OneCellAnchor
+from openpyxl.drawing.xdr import XDRPositiveSize2D
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.units import pixels_to_EMU
 
 from .case_model import TestCase
+from .tracing import span
 
 
 def _get_column_index_by_name(header_row, column_name: str) -> int:
@@ -26,6 +33,7 @@ def read_test_cases(
     description_column: str,
     system_url_column: str,
     extra_context_column: str | None = None,
+    readiness_column: str | None = None,
 ) -> List[TestCase]:
     """从 Excel 读取测试用例并转换为 TestCase 列表。
 
@@ -51,6 +59,12 @@ def read_test_cases(
             extra_context_idx = _get_column_index_by_name(header, extra_context_column)
         except KeyError:
             extra_context_idx = None
+    readiness_idx = None
+    if readiness_column:
+        try:
+            readiness_idx = _get_column_index_by_name(header, readiness_column)
+        except KeyError:
+            readiness_idx = None
 
     test_cases: List[TestCase] = []
 
@@ -65,12 +79,16 @@ def read_test_cases(
         extra_context = None
         if extra_context_idx is not None:
             extra_context = row[extra_context_idx - 1].value
+        readiness = None
+        if readiness_idx is not None and row[readiness_idx - 1].value is not None:
+            readiness = str(row[readiness_idx - 1].value).strip() or None
 
         test_case = TestCase(
             case_id=case_id,
             description=str(description),
             system_url=str(system_url),
             extra_context=str(extra_context) if extra_context is not None else None,
+            readiness=readiness,
         )
         test_cases.append(test_case)
 
@@ -85,85 +103,161 @@ def write_screenshot_path(
     case_id_column: str,
     screenshot_column: str,
 ) -> None:
-    """根据 case_id 将截图直接嵌入到指定列。"""
+    """根据 case_id 将截图直接嵌入到指定列。
 
-    wb = load_workbook(excel_path)
-    if sheet_name not in wb.sheetnames:
-        raise ValueError(f"Excel 中不存在工作表: {sheet_name}")
+    每次调用都会完整加载并保存一次工作簿；批量回写请使用 ScreenshotWriteBack。
+    """
 
-    ws = wb[sheet_name]
-    rows = list(ws.iter_rows())
-    if not rows:
-        return
+    writer = ScreenshotWriteBack(
+        excel_path=excel_path,
+        sheet_name=sheet_name,
+        case_id_column=case_id_column,
+        screenshot_column=screenshot_column,
+    )
+    writer.add(case_id, screenshot_path)
+    writer.close()
 
-    header = rows[0]
-    case_id_idx = _get_column_index_by_name(header, case_id_column)
-    screenshot_idx = _get_column_index_by_name(header, screenshot_column)
 
-    target_row_num = None
-    normalized_case_id = str(case_id).strip()
+class ScreenshotWriteBack:
+    """批量将截图嵌入用例工作簿。
 
-    for idx, row in enumerate(rows[1:], start=2):  # 从第2行开始（Excel行号）
-        value = row[case_id_idx - 1].value
-        if value is None:
-            continue
-        if str(value).strip() == normalized_case_id:
-            target_row_num = idx
-            break
-
-    if target_row_num is None:
-        raise ValueError(f"未在 Excel 中找到指定 case_id: {case_id}")
-
-    # 检查图片文件是否存在
-    if not os.path.exists(screenshot_path):
-        print(f"警告: 图片文件不存在 {screenshot_path}")
-        return
-
-    # 获取目标单元格的列字母（如 A, B, C...）
-    from openpyxl.utils import get_column_letter
-    target_col_letter = get_column_letter(screenshot_idx)
-    target_cell = f"{target_col_letter}{target_row_num}"
-
-    # 删除该位置的旧图片
-    images_to_remove = []
-    for img in ws._images:
-        if img.anchor._from.row == target_row_num - 1:  # openpyxl行索引从0开始
-            if img.anchor._from.col == screenshot_idx - 1:  # 列索引也从0开始
-                images_to_remove.append(img)
-    
-    for img in images_to_remove:
-        ws._images.remove(img)
-        print(f"已删除旧图片，位置: {target_cell}")
-
-    # 设置列宽和行高以容纳图片（使用合理的尺寸避免过大）
-    ws.column_dimensions[target_col_letter].width = 30  # 约200像素宽
-    ws.row_dimensions[target_row_num].height = 120  # 约160像素高
-
-    # 创建图片对象并设置大小
-    img = XLImage(screenshot_path)
-    # 限制图片大小（宽度最大180像素，高度最大150像素）
-    original_width = img.width
-    original_height = img.height
-    max_width = 180
-    max_height = 150
-    
-    # 等比例缩放
-    if original_width > max_width or original_height > max_height:
-        ratio = min(max_width / original_width, max_height / original_height)
-        img.width = int(original_width * ratio)
-        img.height = int(original_height * ratio)
-
-    # 将图片锚定到单元格，并设置为移动和调整大小都跟随单元格
-    from openpyxl.drawing.spreadsheet_drawing import OneCellAnchor, AnchorMarker
-    from openpyxl.drawing.xdr import XDRPositiveSize2D
-    from openpyxl.utils.units import pixels_to_EMU
-    
-    # 创建单元格锚点，图片会填充在单元格内
-    marker = AnchorMarker(col=screenshot_idx-1, colOff=0, row=target_row_num-1, rowOff=0)
-    size = XDRPositiveSize2D(pixels_to_EMU(img.width), pixels_to_EMU(img.height))
-    img.anchor = OneCellAnchor(_from=marker, ext=size)
-    
-    ws.add_image(img)
-    
-    print(f"图片已插入到 {target_cell} (尺寸: {img.width}x{img.height})")
-    wb.save(excel_path)
+    工作簿只加载一次，并预先建立 case_id → 行号 索引；截图先插入内存中的工作表，
+    每累计 save_every 条或距上次保存超过 save_interval_seconds 秒时保存一次（checkpoint），
+    close() 时做最后一次保存。2000 条用例只需保存几十次，而不是加载、保存各 2000 次。
+
+    保存先写临时文件再替换原文件，保存过程中中断不会损坏工作簿。
+    """
+
+    def __init__(
+        self,
+        excel_path: str,
+        sheet_name: str,
+        case_id_column: str,
+        screenshot_column: str,
+        save_every: int = 0,
+        save_interval_seconds: float = 0,
+    ) -> None:
+        self.excel_path = excel_path
+        self.save_every = save_every
+        self.save_interval_seconds = save_interval_seconds
+
+        self._wb = load_workbook(excel_path)
+        if sheet_name not in self._wb.sheetnames:
+            raise ValueError(f"Excel 中不存在工作表: {sheet_name}")
+        self._ws = self._wb[sheet_name]
+
+        header = next(self._ws.iter_rows(min_row=1, max_row=1), None)
+        if header is None:
+            raise ValueError(f"工作表 {sheet_name} 为空")
+        case_id_idx = _get_column_index_by_name(header, case_id_column)
+        self._screenshot_idx = _get_column_index_by_name(header, screenshot_column)
+
+        # case_id → Excel 行号（重复的 case_id 取第一行）
+        self._row_index: Dict[str, int] = {}
+        for row_num, (value,) in enumerate(
+            self._ws.iter_rows(min_row=2, min_col=case_id_idx, max_col=case_id_idx, values_only=True),
+            start=2,
+        ):
+            if value is None:
+                continue
+            self._row_index.setdefault(str(value).strip(), row_num)
+
+        # 已有图片按 (行, 列) 索引（0-based），替换旧截图时无需遍历全部图片
+        self._images: Dict[Tuple[int, int], list] = {}
+        # 从文件加载的图片数据。openpyxl 保存时会关闭图片的 BytesIO，
+        # 每次保存前需重新指向新的 BytesIO，否则第二次保存报 I/O operation on closed file
+        self._loaded_data: Dict[int, bytes] = {}
+        for img in self._ws._images:
+            key = (img.anchor._from.row, img.anchor._from.col)
+            self._images.setdefault(key, []).append(img)
+            if not isinstance(img.ref, str):
+                self._loaded_data[id(img)] = img._data()
+
+        self._pending = 0
+        self._last_save = time.monotonic()
+        self.save_count = 0
+
+    def add(self, case_id: str, screenshot_path: str) -> None:
+        """将截图嵌入 case_id 所在行（按需触发 checkpoint 保存）。"""
+
+        target_row_num = self._row_index.get(str(case_id).strip())
+        if target_row_num is None:
+            raise ValueError(f"未在 Excel 中找到指定 case_id: {case_id}")
+
+        # 检查图片文件是否存在
+        if not os.path.exists(screenshot_path):
+            print(f"警告: 图片文件不存在 {screenshot_path}")
+            return
+
+        ws = self._ws
+        screenshot_idx = self._screenshot_idx
+        target_col_letter = get_column_letter(screenshot_idx)
+        target_cell = f"{target_col_letter}{target_row_num}"
+
+        # 删除该位置的旧图片（openpyxl 行列索引从 0 开始）
+        for img in self._images.pop((target_row_num - 1, screenshot_idx - 1), []):
+            ws._images.remove(img)
+            self._loaded_data.pop(id(img), None)
+            print(f"已删除旧图片，位置: {target_cell}")
+
+        # 设置列宽和行高以容纳图片（使用合理的尺寸避免过大）
+        ws.column_dimensions[target_col_letter].width = 30  # 约200像素宽
+        ws.row_dimensions[target_row_num].height = 120  # 约160像素高
+
+        # 创建图片对象并设置大小
+        img = XLImage(screenshot_path)
+        # 限制图片大小（宽度最大180像素，高度最大150像素）
+        original_width = img.width
+        original_height = img.height
+        max_width = 180
+        max_height = 150
+
+        # 等比例缩放
+        if original_width > max_width or original_height > max_height:
+            ratio = min(max_width / original_width, max_height / original_height)
+            img.width = int(original_width * ratio)
+            img.height = int(original_height * ratio)
+
+        # 创建单元格锚点，图片会填充在单元格内
+        marker = AnchorMarker(col=screenshot_idx - 1, colOff=0, row=target_row_num - 1, rowOff=0)
+        size = XDRPositiveSize2D(pixels_to_EMU(img.width), pixels_to_EMU(img.height))
+        img.anchor = OneCellAnchor(_from=marker, ext=size)
+
+        ws.add_image(img)
+        self._images[(target_row_num - 1, screenshot_idx - 1)] = [img]
+        print(f"图片已插入到 {target_cell} (尺寸: {img.width}x{img.height})")
+
+        self._pending += 1
+        if (self.save_every and self._pending >= self.save_every) or (
+            self.save_interval_seconds and time.monotonic() - self._last_save >= self.save_interval_seconds
+        ):
+            self.save()
+
+    def save(self) -> None:
+        """保存工作簿（先写临时文件再替换，避免中断时损坏原文件）。"""
+
+        if not self._pending:
+            return
+        base, ext = os.path.splitext(self.excel_path)
+        tmp_path = f"{base}.saving{ext}"
+        for img in self._ws._images:
+            data = self._loaded_data.get(id(img))
+            if data is not None:
+                img.ref = io.BytesIO(data)
+        with span("excel.save", cases=self._pending):
+            try:
+                self._wb.save(tmp_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            os.replace(tmp_path, self.excel_path)
+        print(f"已保存 {self._pending} 条截图到 {self.excel_path}")
+        self._pending = 0
+        self._last_save = time.monotonic()
+        self.save_count += 1
+
+    def close(self) -> None:
+        """保存剩余的截图。"""
+
+        self.save()
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Union
+
+from PIL import Image
+
+
+def sha256_bytes(data: bytes) -> str:
+    """内容哈希：字节完全相同才相同。"""
+
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return sha256_bytes(f.read())
+
+
+def dhash(image: Union[str, Image.Image], hash_size: int = 8) -> int:
+    """差值感知哈希（dHash）：缩放为 (hash_size+1) x hash_size 灰度图，比较相邻像素明暗。
+
+    页面只有时间戳、光标等细微差异时哈希相同或只差几位，可用 hamming_distance 判断近似重复。
+    """
+
+    img = Image.open(image) if isinstance(image, str) else image
+    # draft() 让 JPEG 等格式在解码时直接降采样，大图也很快
+    img.draft("L", (hash_size * 8, hash_size * 8))
+    small = img.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = small.tobytes()
+
+    value = 0
+    width = hash_size + 1
+    for row in range(hash_size):
+        offset = row * width
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """两个哈希值不同的位数。"""
+
+    return (a ^ b).bit_count()
@@ -1,9 +1,33 @@
+import io
 import os
-from typing import List
+from typing import List, Optional
 
 from PIL import Image, ImageDraw
 
 from .case_model import ParameterRegion
+from .tracing import span
+
+# 输出格式 → (PIL 格式名, 扩展名)
+_FORMATS = {
+    "png": ("PNG", ".png"),
+    "jpeg": ("JPEG", ".jpg"),
+    "jpg": ("JPEG", ".jpg"),
+    "webp": ("WEBP", ".webp"),
+}
+
+
+def thumbnail_path(marked_path: str) -> str:
+    """标注图对应的缩略图路径（Excel 无法显示 WebP，WebP 标注图的缩略图存为 PNG）。"""
+
+    base, ext = os.path.splitext(marked_path)
+    return f"{base}_thumb{'.png' if ext == '.webp' else ext}"
+
+
+def _save(img: Image.Image, path: str, fmt: str, compress_level: int, quality: int) -> None:
+    if fmt == "PNG":
+        img.save(path, fmt, compress_level=compress_level)
+        return
+    img.save(path, fmt, quality=quality)
 
 
 def mark_image(
@@ -12,25 +36,51 @@ def mark_image(
     input_color: str = "red",
     output_color: str = "green",
     line_width: int = 3,
+    image_bytes: Optional[bytes] = None,
+    output_format: str = "png",
+    compress_level: int = 6,
+    quality: int = 85,
+    thumbnail_width: int = 0,
 ) -> str:
-    """在图片上画红/绿框，返回保存后的新图片路径。"""
+    """在图片上画红/绿框，返回保存后的新图片路径。
 
-    img = Image.open(image_path).convert("RGB")
-    draw = ImageDraw.Draw(img)
+    image_bytes 为已在内存中的截图时不再读取磁盘。每个框一次绘制完成（边框向外加粗 line_width 像素）。
+    output_format 可选 png / jpeg / webp；PNG 按 compress_level（0~9，越小越快、文件越大）压缩，
+    JPEG / WebP 按 quality 压缩。thumbnail_width > 0 时另存一张等比缩小的缩略图（见 thumbnail_path）。
+    """
 
-    for region in regions:
-        box = region.box
-        color = input_color if region.role == "input" else output_color
-        for offset in range(line_width):
+    fmt, ext = _FORMATS.get(output_format.lower(), _FORMATS["png"])
+    with span("mark.decode"):
+        img = Image.open(io.BytesIO(image_bytes) if image_bytes is not None else image_path)
+        # 截图的 alpha 通道总是不透明，去掉后编码更快；已是 RGB 时不做整图转换
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        else:
+            img.load()
+
+    with span("mark.draw", regions=len(regions)):
+        draw = ImageDraw.Draw(img)
+        grow = line_width - 1
+        for region in regions if line_width > 0 else []:
+            box = region.box
+            color = input_color if region.role == "input" else output_color
+            # 与逐像素向外扩展绘制 line_width 次的效果相同：外沿扩展 line_width-1，向内画 line_width 宽
             draw.rectangle(
-                [
-                    (box.x1 - offset, box.y1 - offset),
-                    (box.x2 + offset, box.y2 + offset),
-                ],
+                [(box.x1 - grow, box.y1 - grow), (box.x2 + grow, box.y2 + grow)],
                 outline=color,
+                width=line_width,
             )
 
-    base, ext = os.path.splitext(image_path)
-    marked_path = f"{base}_marked{ext or '.png'}"
-    img.save(marked_path)
+    base, _ = os.path.splitext(image_path)
+    marked_path = f"{base}_marked{ext}"
+    with span("mark.encode", format=fmt):
+        _save(img, marked_path, fmt, compress_level, quality)
+
+    if thumbnail_width > 0:
+        with span("mark.thumbnail"):
+            thumb = img
+            if img.width > thumbnail_width:
+                height = max(1, round(img.height * thumbnail_width / img.width))
+                thumb = img.resize((thumbnail_width, height), Image.BILINEAR, reducing_gap=2.0)
+            _save(thumb, thumbnail_path(marked_path), "PNG" if fmt == "WEBP" else fmt, compress_level, quality)
     return marked_path
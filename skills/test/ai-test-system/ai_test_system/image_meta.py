@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import io
+import struct
+from typing import Optional, Tuple
+
+from PIL import Image
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# JPEG 中携带图片尺寸的 SOF 段（排除 DHT / JPG / DAC）
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _png_size(header: bytes) -> Optional[Tuple[int, int]]:
+    # 8 字节签名 + IHDR 块（长度 4、类型 4、宽 4、高 4）
+    if len(header) >= 24 and header.startswith(_PNG_SIGNATURE) and header[12:16] == b"IHDR":
+        return struct.unpack(">II", header[16:24])
+    return None
+
+
+def _jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    if not data.startswith(b"\xff\xd8"):
+        return None
+    pos = 2
+    while pos + 9 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            # 填充字节
+            pos += 1
+            continue
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+        if marker in _JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[pos + 5:pos + 9])
+            return width, height
+        pos += 2 + length
+    return None
+
+
+def image_size(path: Optional[str] = None, data: Optional[bytes] = None) -> Tuple[int, int]:
+    """读取图片宽高，只解析文件头，不解码像素。
+
+    PNG 只读前 24 字节；JPEG 顺序查找 SOF 段；其它格式交给 PIL（同样只读文件头）。
+    data 为已在内存中的图片字节时优先使用，不再读取磁盘。
+    """
+
+    if data is not None:
+        size = _png_size(data[:24]) or _jpeg_size(data)
+        if size is not None:
+            return size
+    else:
+        with open(path, "rb") as f:
+            header = f.read(24)
+            size = _png_size(header)
+            if size is not None:
+                return size
+            if header.startswith(b"\xff\xd8"):
+                size = _jpeg_size(header + f.read())
+                if size is not None:
+                    return size
+
+    with Image.open(io.BytesIO(data) if data is not None else path) as img:
+        return img.size
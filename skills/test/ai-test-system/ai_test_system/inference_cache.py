@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+from PIL import Image
+
+from .case_model import BoundingBox, ModelResponse
+from .image_hash import dhash, hamming_distance, sha256_bytes
+
+
+def _encode_response(response: ModelResponse) -> str:
+    def boxes(items: List[BoundingBox]) -> List[List[int]]:
+        return [[b.x1, b.y1, b.x2, b.y2] for b in items]
+
+    return json.dumps({
+        "input_regions": boxes(response.input_regions),
+        "output_regions": boxes(response.output_regions),
+    })
+
+
+def _decode_response(text: str) -> ModelResponse:
+    data = json.loads(text)
+    return ModelResponse(
+        input_regions=[BoundingBox(*box) for box in data.get("input_regions", [])],
+        output_regions=[BoundingBox(*box) for box in data.get("output_regions", [])],
+    )
+
+
+class CacheFingerprint(NamedTuple):
+    key: str  # sha256(截图) + prompt 键
+    prompt_key: str
+    phash: Optional[int]  # 截图 dHash，未开启近似匹配时为 None
+
+
+class InferenceCache:
+    """视觉模型推理结果的持久化缓存（SQLite）。
+
+    - 精确命中：键为 sha256(截图字节) + prompt（+ 模型地址），同一截图同一描述直接复用结果
+    - 近似命中（near_duplicate_distance > 0）：同一 prompt 下截图 dHash 的汉明距离不超过阈值，
+      视为页面未变化，复用最近一次的结果
+    - 条目数超过 max_entries 时按最近使用时间淘汰（LRU）
+
+    多个推理线程共用一个实例，内部加锁。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 5000,
+        near_duplicate_distance: int = 0,
+        namespace: str = "",
+    ) -> None:
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.near_duplicate_distance = near_duplicate_distance
+        self.namespace = namespace
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.dirname(path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS inference_cache ("
+            " key TEXT PRIMARY KEY,"
+            " prompt_key TEXT NOT NULL,"
+            " phash TEXT,"
+            " response TEXT NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_inference_cache_prompt ON inference_cache(prompt_key)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_inference_cache_lru ON inference_cache(last_used)"
+        )
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM inference_cache").fetchone()[0]
+
+        # 统计
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def fingerprint(self, image_bytes: bytes, prompt: str) -> CacheFingerprint:
+        """计算一次查找 / 写入所需的键；近似匹配开启时顺带计算截图的 dHash。"""
+
+        prompt_key = sha256_bytes(f"{self.namespace}\0{prompt}".encode("utf-8"))
+        phash = None
+        if self.near_duplicate_distance > 0:
+            phash = dhash(Image.open(io.BytesIO(image_bytes)))
+        return CacheFingerprint(sha256_bytes(image_bytes) + prompt_key, prompt_key, phash)
+
+    def get(self, fp: CacheFingerprint) -> Optional[ModelResponse]:
+        """查找缓存结果，未命中返回 None。"""
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM inference_cache WHERE key = ?", (fp.key,)
+            ).fetchone()
+            if row is not None:
+                self._touch(fp.key)
+                self.exact_hits += 1
+                return _decode_response(row[0])
+
+            if fp.phash is not None:
+                best = None
+                for other_key, other_phash, response in self._conn.execute(
+                    "SELECT key, phash, response FROM inference_cache"
+                    " WHERE prompt_key = ? AND phash IS NOT NULL",
+                    (fp.prompt_key,),
+                ):
+                    distance = hamming_distance(fp.phash, int(other_phash, 16))
+                    if distance <= self.near_duplicate_distance and (best is None or distance < best[0]):
+                        best = (distance, other_key, response)
+                if best is not None:
+                    self._touch(best[1])
+                    self.near_hits += 1
+                    return _decode_response(best[2])
+
+            self.misses += 1
+        return None
+
+    def put(self, fp: CacheFingerprint, response: ModelResponse) -> None:
+        """写入模型返回的结果（退化规则产生的结果不应写入）。"""
+
+        phash = format(fp.phash, "016x") if fp.phash is not None else None
+        with self._lock:
+            existed = self._conn.execute(
+                "SELECT 1 FROM inference_cache WHERE key = ?", (fp.key,)
+            ).fetchone() is not None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO inference_cache (key, prompt_key, phash, response, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (fp.key, fp.prompt_key, phash, _encode_response(response), time.time()),
+            )
+            if not existed:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM inference_cache WHERE key IN"
+                    " (SELECT key FROM inference_cache ORDER BY last_used ASC LIMIT ?)",
+                    (self._count - self.max_entries,),
+                )
+                self._count = self.max_entries
+            self._conn.commit()
+
+    def _touch(self, key: str) -> None:
+        """更新最近使用时间（调用方持有锁）。"""
+
+        self._conn.execute("UPDATE inference_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._conn.commit()
+
+    @property
+    def lookups(self) -> int:
+        return self.exact_hits + self.near_hits + self.misses
+
+    def summary(self) -> str:
+        hits = self.exact_hits + self.near_hits
+        rate = hits / self.lookups * 100 if self.lookups else 0.0
+        return (
+            f"推理缓存: 命中 {hits}/{self.lookups}（{rate:.1f}%，精确 {self.exact_hits} / 近似 {self.near_hits}），"
+            f"缓存条目 {self._count}"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -2,6 +2,7 @@ import argparse
 
 from .config_loader import load_config
 from .pipeline import AiTestPipeline
+from .tracing import tracer
 
 
 def main() -> None:
@@ -12,11 +13,29 @@ def main() -> None:
         default="config/config.yaml",
         help="配置文件路径",
     )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        nargs="?",
+        const="./output/trace.json",
+        default=None,
+        help="记录各阶段耗时并导出 Chrome trace（可用 chrome://tracing 或 Perfetto 打开），默认 ./output/trace.json",
+    )
     args = parser.parse_args()
 
     config = load_config(args.config)
     pipeline = AiTestPipeline(config)
-    pipeline.run_all_cases()
+    if args.trace:
+        tracer.enable()
+    try:
+        pipeline.run_all_cases()
+    finally:
+        if args.trace:
+            tracer.disable()
+            tracer.export_chrome_trace(args.trace)
+            print("阶段耗时:")
+            print(tracer.format_summary())
+            print(f"trace 已导出: {args.trace}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Set
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+# 策略别名（Excel 中可填写中文）
+_ALIASES = {
+    "load": "load",
+    "加载完成": "load",
+    "network_idle": "network_idle",
+    "networkidle": "network_idle",
+    "网络空闲": "network_idle",
+    "dom_quiet": "dom_quiet",
+    "domquiet": "dom_quiet",
+    "dom稳定": "dom_quiet",
+    "selector": "selector",
+    "css": "selector",
+    "元素": "selector",
+    "xpath": "xpath",
+}
+
+# 在页面中监听 DOM 变化，连续 quiet_ms 毫秒没有变化（或超时）时回调
+_DOM_QUIET_SCRIPT = """
+const quietMs = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+const start = performance.now();
+let last = start;
+const observer = new MutationObserver(() => { last = performance.now(); });
+observer.observe(document.documentElement || document,
+    {childList: true, subtree: true, attributes: true, characterData: true});
+const timer = setInterval(() => {
+    const now = performance.now();
+    if (now - last >= quietMs || now - start >= timeoutMs) {
+        clearInterval(timer);
+        observer.disconnect();
+        done(now - last >= quietMs);
+    }
+}, Math.max(10, Math.min(50, quietMs / 4)));
+"""
+
+_NETWORK_START = "Network.requestWillBeSent"
+_NETWORK_END = ("Network.loadingFinished", "Network.loadingFailed")
+
+
+@dataclass
+class ReadinessStep:
+    """一个就绪条件：kind 为 load / network_idle / dom_quiet / selector / xpath。"""
+
+    kind: str
+    arg: Optional[str] = None
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{self.arg}" if self.arg else self.kind
+
+
+@dataclass
+class ReadinessResult:
+    ready: bool
+    elapsed: float
+    # 未在超时前满足的条件
+    timed_out: List[str] = field(default_factory=list)
+
+
+def parse_readiness(spec: Optional[str]) -> List[ReadinessStep]:
+    """解析就绪策略，多个条件用分号分隔，依次等待。
+
+    示例: "network_idle"、"dom_quiet:500"、"selector:#grid .row"、"selector:.toolbar; network_idle:300"
+    数字参数为毫秒（network_idle 的空闲窗口、dom_quiet 的静默时长），selector / xpath 参数为定位表达式。
+    """
+
+    steps: List[ReadinessStep] = []
+    for part in (spec or "").replace("；", ";").split(";"):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, arg = part.partition(":")
+        if not arg and "：" in name:
+            name, _, arg = name.partition("：")
+        kind = _ALIASES.get(name.strip().lower())
+        if kind is None:
+            raise ValueError(f"未知的页面就绪策略: {part}")
+        arg = arg.strip() or None
+        if kind in ("selector", "xpath") and not arg:
+            raise ValueError(f"页面就绪策略 {kind} 需要指定定位表达式，如 {kind}:#main")
+        if kind in ("network_idle", "dom_quiet") and arg is not None and not arg.isdigit():
+            raise ValueError(f"页面就绪策略 {kind} 的参数应为毫秒数: {part}")
+        steps.append(ReadinessStep(kind, arg))
+    return steps
+
+
+def _uses_network_idle(default_steps: List[ReadinessStep], case_specs: Iterable[Optional[str]]) -> bool:
+    if any(step.kind == "network_idle" for step in default_steps):
+        return True
+    for spec in case_specs:
+        try:
+            steps = parse_readiness(spec)
+        except ValueError:
+            # 写错的用例策略会使用默认策略
+            continue
+        if any(step.kind == "network_idle" for step in steps):
+            return True
+    return False
+
+
+class PageReadiness:
+    """判断页面是否已渲染完成，替代固定的页面加载超时。
+
+    - load          document.readyState == "complete"
+    - network_idle  通过 DevTools 性能日志（Network 事件）跟踪在途请求，
+                    在途请求数不超过 max_inflight 且持续 network_idle_ms 毫秒即就绪
+    - dom_quiet     MutationObserver 监听 DOM，连续 dom_quiet_ms 毫秒没有变化即就绪
+    - selector      指定 CSS 选择器（xpath: 为 XPath）的元素可见即就绪
+
+    所有条件共用一个截止时间；超时或执行出错的条件只记录，不阻止截图。
+    """
+
+    def __init__(
+        self,
+        default: str = "load",
+        network_idle_ms: int = 500,
+        dom_quiet_ms: int = 300,
+        max_inflight: int = 0,
+        poll_interval: float = 0.05,
+        case_specs: Iterable[Optional[str]] = (),
+    ) -> None:
+        self.default_steps = parse_readiness(default) or [ReadinessStep("load")]
+        self.network_idle_ms = network_idle_ms
+        self.dom_quiet_ms = dom_quiet_ms
+        self.max_inflight = max_inflight
+        self.poll_interval = poll_interval
+        # 只有默认策略或用例策略用到 network_idle 时才需要浏览器开启性能日志
+        self.network_log = _uses_network_idle(self.default_steps, case_specs)
+
+    def steps_for(self, spec: Optional[str]) -> List[ReadinessStep]:
+        """用例指定的策略；为空时使用默认策略，写错时提示并使用默认策略。"""
+
+        try:
+            steps = parse_readiness(spec)
+        except ValueError as e:
+            print(f"{e}，使用默认策略 {'; '.join(map(str, self.default_steps))}")
+            return self.default_steps
+        return steps or self.default_steps
+
+    def before_navigation(self, driver) -> None:
+        """导航前清空已缓冲的性能日志，之后只统计本次页面的网络请求。"""
+
+        if not self.network_log:
+            return
+        try:
+            driver.get_log("performance")
+        except Exception:
+            pass
+
+    def wait(self, driver, steps: List[ReadinessStep], deadline: float) -> ReadinessResult:
+        start = time.monotonic()
+        timed_out: List[str] = []
+        for step in steps:
+            if not self._wait_step(driver, step, deadline):
+                timed_out.append(str(step))
+        return ReadinessResult(ready=not timed_out, elapsed=time.monotonic() - start, timed_out=timed_out)
+
+    def _wait_step(self, driver, step: ReadinessStep, deadline: float) -> bool:
+        """等待单个条件；浏览器执行出错（页面加载失败、脚本异常等）时视为该条件超时。"""
+
+        try:
+            return self._wait_condition(driver, step, deadline)
+        except WebDriverException as e:
+            print(f"页面就绪条件 {step} 检查出错: {e.__class__.__name__}")
+            return False
+
+    def _wait_condition(self, driver, step: ReadinessStep, deadline: float) -> bool:
+        if step.kind == "load":
+            return self._poll(deadline, lambda: driver.execute_script("return document.readyState") == "complete")
+        if step.kind == "network_idle":
+            idle_ms = int(step.arg) if step.arg else self.network_idle_ms
+            return self.wait_for_network_idle(driver, idle_ms, deadline)
+        if step.kind == "dom_quiet":
+            quiet_ms = int(step.arg) if step.arg else self.dom_quiet_ms
+            return self.wait_for_dom_quiet(driver, quiet_ms, deadline)
+        by = By.XPATH if step.kind == "xpath" else By.CSS_SELECTOR
+        return self.wait_for_selector(driver, by, step.arg, deadline)
+
+    def _poll(self, deadline: float, condition) -> bool:
+        while True:
+            if condition():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+
+    def wait_for_network_idle(self, driver, idle_ms: int, deadline: float) -> bool:
+        try:
+            entries = driver.get_log("performance")
+        except Exception:
+            # 浏览器未开启性能日志时，退化为观察资源条目数是否稳定
+            return self._wait_for_resource_idle(driver, idle_ms, deadline)
+
+        inflight: Set[str] = set()
+        last_activity = time.monotonic()
+        while True:
+            if self._apply_network_events(entries, inflight):
+                last_activity = time.monotonic()
+            now = time.monotonic()
+            if len(inflight) <= self.max_inflight and (now - last_activity) * 1000 >= idle_ms:
+                return True
+            if now >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+            entries = driver.get_log("performance")
+
+    @staticmethod
+    def _apply_network_events(entries: list, inflight: Set[str]) -> bool:
+        """根据 Network 事件更新在途请求集合，返回是否有网络活动。"""
+
+        active = False
+        for entry in entries:
+            text = entry.get("message", "")
+            # 先做子串判断，跳过无关事件的 JSON 解析
+            if _NETWORK_START not in text and not any(name in text for name in _NETWORK_END):
+                continue
+            message = json.loads(text).get("message", {})
+            method = message.get("method")
+            request_id = message.get("params", {}).get("requestId")
+            if method == _NETWORK_START:
+                inflight.add(request_id)
+                active = True
+            elif method in _NETWORK_END:
+                inflight.discard(request_id)
+                active = True
+        return active
+
+    def _wait_for_resource_idle(self, driver, idle_ms: int, deadline: float) -> bool:
+        script = "return performance.getEntriesByType('resource').length"
+        count = driver.execute_script(script)
+        last_change = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if (now - last_change) * 1000 >= idle_ms:
+                return True
+            if now >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+            current = driver.execute_script(script)
+            if current != count:
+                count, last_change = current, time.monotonic()
+
+    def wait_for_dom_quiet(self, driver, quiet_ms: int, deadline: float) -> bool:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        previous = driver.timeouts.script
+        driver.set_script_timeout(remaining + 5)
+        try:
+            return bool(driver.execute_async_script(_DOM_QUIET_SCRIPT, quiet_ms, int(remaining * 1000)))
+        except TimeoutException:
+            return False
+        finally:
+            driver.set_script_timeout(previous)
+
+    def wait_for_selector(self, driver, by: str, selector: str, deadline: float) -> bool:
+        remaining = deadline - time.monotonic()
+        try:
+            WebDriverWait(driver, max(0.0, remaining), poll_frequency=self.poll_interval).until(
+                EC.visibility_of_element_located((by, selector))
+            )
+            return True
+        except TimeoutException:
+            return False
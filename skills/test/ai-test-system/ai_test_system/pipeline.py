@@ -1,69 +1,240 @@
+import json
 import os
-from typing import List
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Iterable, List, Optional
 
-from .case_model import ModelRequest, TestCase
+from .browser_pool import BrowserPool
+from .case_model import ModelRequest, ModelResponse, TestCase
+from .change_detector import ChangeDetector
 from .config_loader import AppConfig
-from .excel_io import read_test_cases, write_screenshot_path
-from .image_marker import mark_image
+from .excel_io import ScreenshotWriteBack, read_test_cases
+from .image_hash import sha256_bytes
+from .image_marker import mark_image, thumbnail_path
+from .inference_cache import InferenceCache
 from .locator_service import build_parameter_regions
 from .login_handler import LoginHandler
+from .page_readiness import PageReadiness
 from .screenshot_captor import ScreenshotCaptor
+from .stage_runner import Stage, StageQueue, StageStats
+from .tracing import span
 from .vision_model_client import VisionModelClient
 
 
+@dataclass
+class _CaseJob:
+    """在各阶段之间传递的单条用例中间结果。"""
+
+    case: TestCase
+    screenshot_path: str
+    prompt: str
+    # 截图 PNG 字节，推理阶段直接上传，用完即释放
+    image_bytes: Optional[bytes] = None
+    # 截图内容哈希（开启变化检测时用于更新基线）
+    image_sha256: Optional[str] = None
+    response: Optional[ModelResponse] = None
+    # 页面与上次运行相比未变化，已复用上次的区域与标注图，跳过推理与标注
+    reused: bool = False
+    infer_seconds: float = 0.0
+
+
+class _RunAborted(Exception):
+    """主线程异常退出时，让尚未截图的用例快速跳过。"""
+
+
 class AiTestPipeline:
     def __init__(self, config: AppConfig) -> None:
         self.config = config
-        self.screenshot_captor = ScreenshotCaptor(
-            browser=config.screenshot.browser,
-            driver_path=config.screenshot.driver_path,
-            window_width=config.screenshot.window_width,
-            window_height=config.screenshot.window_height,
-            timeout_seconds=config.screenshot.timeout_seconds,
-        )
+        self.screenshot_captor = self._new_captor()
+        self.inference_cache = self._new_inference_cache()
+        self.change_detector = self._new_change_detector()
+        vm = config.vision_model
         self.vision_client = VisionModelClient(
-            endpoint=config.vision_model.endpoint,
-            api_key=config.vision_model.api_key,
+            endpoint=vm.endpoint,
+            api_key=vm.api_key,
+            cache=self.inference_cache,
+            timeout_seconds=vm.timeout_seconds,
+            connect_timeout_seconds=vm.connect_timeout_seconds,
+            pool_size=vm.pool_size,
+            max_in_flight=vm.max_in_flight,
+            batch_size=vm.batch_size,
+            batch_wait_ms=vm.batch_wait_ms,
+            batch_endpoint=vm.batch_endpoint or None,
+        )
+
+    def _new_change_detector(self) -> Optional[ChangeDetector]:
+        cfg = self.config.change_detection
+        if not cfg.enabled:
+            return None
+        return ChangeDetector(
+            baseline_path=cfg.baseline_path,
+            max_hash_distance=cfg.max_hash_distance,
+            max_changed_ratio=cfg.max_changed_ratio,
+            pixel_tolerance=cfg.pixel_tolerance,
+            settings_fingerprint=self._result_settings_fingerprint(),
+        )
+
+    def _result_settings_fingerprint(self) -> str:
+        """影响区域与标注图的配置指纹，任一项变化时不复用上次的结果。"""
+
+        vm = self.config.vision_model
+        settings = {
+            "mark": asdict(self.config.mark),
+            "model": [vm.provider, vm.endpoint, vm.batch_endpoint, vm.cache_version],
+        }
+        return sha256_bytes(json.dumps(settings, sort_keys=True).encode("utf-8"))
+
+    def _new_inference_cache(self) -> Optional[InferenceCache]:
+        cfg = self.config.vision_model
+        if not cfg.cache_enabled:
+            return None
+        return InferenceCache(
+            path=cfg.cache_path,
+            max_entries=cfg.cache_max_entries,
+            near_duplicate_distance=cfg.near_duplicate_distance,
+            # 不同模型服务、不同模型版本的结果互不复用
+            namespace=f"{cfg.endpoint}\0{cfg.cache_version}",
+        )
+
+    def _new_captor(self, case_readiness: Iterable[Optional[str]] = ()) -> ScreenshotCaptor:
+        """case_readiness 为各用例指定的就绪策略，用于判断浏览器是否需要开启性能日志。"""
+
+        cfg = self.config.screenshot
+        return ScreenshotCaptor(
+            browser=cfg.browser,
+            driver_path=cfg.driver_path,
+            window_width=cfg.window_width,
+            window_height=cfg.window_height,
+            timeout_seconds=cfg.timeout_seconds,
+            readiness=PageReadiness(
+                default=cfg.readiness,
+                network_idle_ms=cfg.network_idle_ms,
+                dom_quiet_ms=cfg.dom_quiet_ms,
+                max_inflight=cfg.network_idle_max_inflight,
+                case_specs=case_readiness,
+            ),
+            page_load_strategy=cfg.page_load_strategy,
+        )
+
+    def _new_login_handler(self) -> Optional[LoginHandler]:
+        cfg = self.config.login
+        if not cfg.enabled:
+            return None
+        return LoginHandler(
+            login_url=cfg.login_url,
+            username=cfg.username,
+            password=cfg.password,
+            username_selector=cfg.username_selector,
+            password_selector=cfg.password_selector,
+            submit_selector=cfg.submit_selector,
+            wait_after_login=cfg.wait_after_login,
         )
 
     def _ensure_dirs(self) -> None:
         os.makedirs("./output", exist_ok=True)
         os.makedirs(os.path.dirname(self.config.log.log_file), exist_ok=True)
 
-    def run_single_case(self, test_case: TestCase) -> TestCase:
-        """执行单条测试用例：截图、调用模型、标注图片并更新 TestCase。"""
+    def run_single_case(
+        self, test_case: TestCase, captor: Optional[ScreenshotCaptor] = None
+    ) -> TestCase:
+        """执行单条测试用例：截图、调用模型、标注图片并更新 TestCase。
+
+        captor 为空时使用 self.screenshot_captor（需已 open）；浏览器池模式下传入各自的浏览器。
+        """
 
         self._ensure_dirs()
+        with span("case", case_id=test_case.case_id):
+            job = self._capture_case(captor or self.screenshot_captor, test_case)
+            if job.reused:
+                return job.case
+            return self._mark_case(self._infer_case(job)).case
 
-        # 1. 截图
-        screenshot_path = os.path.join("./output", f"{test_case.case_id}.png")
-        self.screenshot_captor.capture_page(test_case.system_url, screenshot_path)
+    def _capture_case(self, captor: ScreenshotCaptor, test_case: TestCase) -> _CaseJob:
+        """阶段 1：截图，并与上一次运行的截图比较，页面未变化时直接复用上次的结果。"""
 
-        # 2. 调用视觉模型
+        screenshot_path = os.path.join("./output", f"{test_case.case_id}.png")
         prompt_parts = [test_case.description]
         if test_case.extra_context:
             prompt_parts.append(str(test_case.extra_context))
         prompt = "\n".join(prompt_parts)
 
-        model_req = ModelRequest(image_path=screenshot_path, prompt=prompt)
-        model_resp = self.vision_client.infer(model_req)
-
-        # 3. 构造参数区域，并标注图片
-        regions = build_parameter_regions(model_resp)
-        marked_path = mark_image(
-            image_path=screenshot_path,
-            regions=regions,
-            input_color=self.config.mark.input_color,
-            output_color=self.config.mark.output_color,
-            line_width=self.config.mark.line_width,
-        )
+        detector = self.change_detector
+        # 本次截图会覆盖上一次的截图文件，需在截图前读出
+        previous = detector.load_previous(test_case.case_id, prompt, screenshot_path) if detector else None
+        with span("capture", case_id=test_case.case_id):
+            image_bytes = captor.capture_png(test_case.system_url, screenshot_path, test_case.readiness)
+        job = _CaseJob(case=test_case, screenshot_path=screenshot_path, prompt=prompt, image_bytes=image_bytes)
+        if detector is None:
+            return job
 
-        test_case.screenshot_path = marked_path
-        test_case.parameter_regions = regions
-        return test_case
+        with span("capture.change_detect", case_id=test_case.case_id) as sp:
+            job.image_sha256 = sha256_bytes(image_bytes)
+            baseline = detector.check(test_case.case_id, previous, image_bytes) if previous is not None else None
+            sp.set(unchanged=baseline is not None)
+        if baseline is not None:
+            print(f"用例 {test_case.case_id} 页面未变化，复用上次的标注结果")
+            test_case.screenshot_path = baseline.marked_path
+            thumb = thumbnail_path(baseline.marked_path)
+            if self.config.mark.thumbnail_width > 0 and os.path.exists(thumb):
+                test_case.thumbnail_path = thumb
+            test_case.parameter_regions = list(baseline.regions)
+            job.reused = True
+            job.image_bytes = None
+        return job
+
+    def _infer_case(self, job: _CaseJob) -> _CaseJob:
+        """阶段 2：调用视觉模型。"""
+
+        start = time.perf_counter()
+        model_req = ModelRequest(image_path=job.screenshot_path, prompt=job.prompt, image_bytes=job.image_bytes)
+        with span("infer", case_id=job.case.case_id):
+            job.response = self.vision_client.infer(model_req)
+        job.infer_seconds = time.perf_counter() - start
+        return job
+
+    def _mark_case(self, job: _CaseJob) -> _CaseJob:
+        """阶段 3：构造参数区域，并标注图片。"""
+
+        start = time.perf_counter()
+        regions = build_parameter_regions(job.response)
+        cfg = self.config.mark
+        with span("mark", case_id=job.case.case_id):
+            marked_path = mark_image(
+                image_path=job.screenshot_path,
+                regions=regions,
+                input_color=cfg.input_color,
+                output_color=cfg.output_color,
+                line_width=cfg.line_width,
+                image_bytes=job.image_bytes,
+                output_format=cfg.output_format,
+                compress_level=cfg.compress_level,
+                quality=cfg.quality,
+                thumbnail_width=cfg.thumbnail_width,
+            )
+        job.image_bytes = None
+        job.case.screenshot_path = marked_path
+        job.case.thumbnail_path = thumbnail_path(marked_path) if cfg.thumbnail_width > 0 else None
+        job.case.parameter_regions = regions
+        if self.change_detector is not None and job.image_sha256:
+            self.change_detector.record(
+                job.case.case_id,
+                job.image_sha256,
+                job.prompt,
+                marked_path,
+                regions,
+                job.infer_seconds,
+                time.perf_counter() - start,
+            )
+        return job
 
     def run_all_cases(self) -> List[TestCase]:
-        """从 Excel 读取所有用例并依次执行，最后写回 Excel。"""
+        """从 Excel 读取所有用例，按 截图 → 推理 → 标注 三个阶段流水线执行，截图批量写回 Excel。
+
+        各阶段之间是有界队列，各自独立并发：浏览器截下一条用例时，模型在推理上一条，
+        标注线程在处理更早的用例。下游处理不过来时队列写满，上游阻塞等待（背压）。
+        """
 
         cfg = self.config
         print(f"正在读取Excel: {cfg.excel.input_path}")
@@ -74,6 +245,7 @@ class AiTestPipeline:
             description_column=cfg.excel.description_column,
             system_url_column=cfg.excel.system_url_column,
             extra_context_column=cfg.excel.extra_context_column,
+            readiness_column=cfg.excel.readiness_column,
         )
 
         if not cases:
@@ -81,41 +253,117 @@ class AiTestPipeline:
             return []
 
         print(f"读取到 {len(cases)} 条用例，开始执行...")
-        self.screenshot_captor.open()
-        print("浏览器已启动")
-        
-        # 如果启用了登录，先执行登录
-        if cfg.login.enabled:
+        self._ensure_dirs()
+        # 工作簿只加载一次，截图批量回写、定期保存
+        write_back = ScreenshotWriteBack(
+            excel_path=cfg.excel.input_path,
+            sheet_name=cfg.excel.sheet_name,
+            case_id_column=cfg.excel.case_id_column,
+            screenshot_column=cfg.excel.output_image_column,
+            save_every=cfg.excel.save_every,
+            save_interval_seconds=cfg.excel.save_interval_seconds,
+        )
+        pc = cfg.pipeline
+        case_readiness = {case.readiness for case in cases}
+        pool = BrowserPool(
+            size=min(cfg.screenshot.workers, len(cases)),
+            captor_factory=lambda: self._new_captor(case_readiness),
+            login_handler=self._new_login_handler(),
+            max_restarts=cfg.screenshot.max_restarts,
+            max_case_attempts=cfg.screenshot.max_case_attempts,
+        )
+        print(
+            f"启动流水线: 截图 {pool.size} 个浏览器，推理并发 {pc.infer_workers}，"
+            f"标注并发 {pc.mark_workers}，阶段队列容量 {pc.queue_size}"
+        )
+
+        capture_stats = StageStats("capture", pool.size)
+        infer_stats = StageStats("infer", pc.infer_workers)
+        mark_stats = StageStats("mark", pc.mark_workers)
+        stats_lock = threading.Lock()
+        done: "queue.Queue" = queue.Queue()
+        aborted = threading.Event()
+
+        def finish(job: _CaseJob, error: Optional[Exception] = None) -> None:
+            done.put((job.case, error))
+
+        infer_queue = StageQueue(pc.queue_size, infer_stats)
+        mark_queue = StageQueue(pc.queue_size, mark_stats)
+        mark_stage = Stage("mark", pc.mark_workers, self._mark_case, mark_queue, finish, finish, mark_stats).start()
+        infer_stage = Stage("infer", pc.infer_workers, self._infer_case, infer_queue, mark_queue.put, finish, infer_stats).start()
+
+        def capture(captor: ScreenshotCaptor, case: TestCase) -> TestCase:
+            if aborted.is_set():
+                raise _RunAborted("运行已中止")
+            print(f"处理用例: {case.case_id}")
+            start = time.perf_counter()
+            ok = False
             try:
-                login_handler = LoginHandler(
-                    login_url=cfg.login.login_url,
-                    username=cfg.login.username,
-                    password=cfg.login.password,
-                    username_selector=cfg.login.username_selector,
-                    password_selector=cfg.login.password_selector,
-                    submit_selector=cfg.login.submit_selector,
-                    wait_after_login=cfg.login.wait_after_login,
-                )
-                login_handler.execute(self.screenshot_captor.get_driver())
-            except Exception as e:
-                print(f"登录失败: {e}，继续执行...")
-        
+                job = self._capture_case(captor, case)
+                ok = True
+            finally:
+                with stats_lock:
+                    capture_stats.record(start, time.perf_counter(), ok)
+            if job.reused:
+                # 页面未变化：跳过推理与标注
+                finish(job)
+            else:
+                # 推理队列已满时在这里阻塞，浏览器不会无限领先
+                infer_queue.put(job)
+            return case
+
+        def feed() -> None:
+            try:
+                for case, error in pool.run(cases, capture):
+                    if error is not None:
+                        done.put((case, error))
+            finally:
+                # 截图全部结束后依次关闭下游阶段（各阶段先处理完队列中剩余的用例）
+                infer_stage.close()
+                mark_stage.close()
+
+        feeder = threading.Thread(target=feed, name="capture-feeder", daemon=True)
+        start_time = time.perf_counter()
+        feeder.start()
+
+        failed = 0
         try:
-            for i, case in enumerate(cases, 1):
-                print(f"\n[{i}/{len(cases)}] 处理用例: {case.case_id}")
-                updated_case = self.run_single_case(case)
-                if updated_case.screenshot_path:
-                    write_screenshot_path(
-                        excel_path=cfg.excel.input_path,
-                        sheet_name=cfg.excel.sheet_name,
-                        case_id=updated_case.case_id,
-                        screenshot_path=updated_case.screenshot_path,
-                        case_id_column=cfg.excel.case_id_column,
-                        screenshot_column=cfg.excel.output_image_column,
-                    )
+            for i in range(1, len(cases) + 1):
+                case, error = done.get()
+                if error is not None:
+                    failed += 1
+                    print(f"\n[{i}/{len(cases)}] 用例 {case.case_id} 处理失败: {error}")
+                    continue
+                print(f"\n[{i}/{len(cases)}] 用例 {case.case_id} 截图与标注完成")
+                if case.screenshot_path:
+                    # 开启缩略图时嵌入缩略图，工作簿更小、保存更快
+                    with span("excel.add", case_id=case.case_id):
+                        write_back.add(case.case_id, case.thumbnail_path or case.screenshot_path)
                     print(f"用例 {case.case_id} 处理完成")
         finally:
-            self.screenshot_captor.close()
+            # 异常退出时跳过尚未截图的用例，等待在途用例结束并关闭所有浏览器
+            aborted.set()
+            feeder.join()
             print("\n浏览器已关闭")
+            # 已完成用例的截图无论是否异常退出都保存；保存失败也要关闭模型连接、写出变化检测基线
+            try:
+                write_back.close()
+            finally:
+                self.vision_client.close()
+                if self.inference_cache is not None:
+                    self.inference_cache.close()
+                if self.change_detector is not None:
+                    self.change_detector.save()
 
+        elapsed = time.perf_counter() - start_time
+        restarts = sum(w.restarts for w in pool.workers)
+        print(f"执行完成: 成功 {len(cases) - failed} 条，失败 {failed} 条，浏览器重启 {restarts} 次")
+        print(f"总耗时 {elapsed:.1f}s，整体吞吐 {len(cases) / elapsed if elapsed > 0 else 0:.2f} 条/s")
+        print("阶段统计:")
+        for stats in (capture_stats, infer_stats, mark_stats):
+            print(f"  {stats.format()}")
+        if self.change_detector is not None:
+            print(self.change_detector.summary())
+        if self.inference_cache is not None:
+            print(self.inference_cache.summary())
         return cases
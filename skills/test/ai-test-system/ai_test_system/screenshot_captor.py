@@ -1,10 +1,16 @@
 import os
+import shutil
+import tempfile
+import time
 from typing import Optional
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 
+from .page_readiness import PageReadiness
+from .tracing import span
+
 
 class ScreenshotCaptor:
     def __init__(
@@ -14,13 +20,20 @@ class ScreenshotCaptor:
         window_width: int,
         window_height: int,
         timeout_seconds: int,
+        readiness: Optional[PageReadiness] = None,
+        page_load_strategy: str = "normal",
     ) -> None:
         self.browser = browser.lower()
         self.driver_path = driver_path
         self.window_width = window_width
         self.window_height = window_height
         self.timeout_seconds = timeout_seconds
+        # 页面就绪判断；为空时保持 driver.get 返回即截图的行为
+        self.readiness = readiness
+        # normal: driver.get 等待 load 事件；eager: DOMContentLoaded 即返回，由就绪策略继续等待
+        self.page_load_strategy = page_load_strategy
         self._driver: Optional[webdriver.Remote] = None
+        self._user_data_dir: Optional[str] = None
 
     def open(self) -> None:
         """启动浏览器（当前实现为无头 Chrome）。"""
@@ -37,7 +50,16 @@ class ScreenshotCaptor:
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument(f"--user-data-dir=/tmp/chrome_user_data_{os.getpid()}")
+        # 每个浏览器实例使用独立的用户数据目录，同一进程内可同时启动多个浏览器
+        self._user_data_dir = tempfile.mkdtemp(prefix=f"chrome_user_data_{os.getpid()}_")
+        chrome_options.add_argument(f"--user-data-dir={self._user_data_dir}")
+        chrome_options.page_load_strategy = self.page_load_strategy
+        if self.readiness is not None and self.readiness.network_log:
+            # network_idle 策略通过 DevTools 性能日志跟踪网络请求，只记录 Network 事件
+            chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+            chrome_options.add_experimental_option(
+                "perfLoggingPrefs", {"enableNetwork": True, "enablePage": False}
+            )
 
         service = Service(executable_path=self.driver_path)
         self._driver = webdriver.Chrome(service=service, options=chrome_options)
@@ -46,29 +68,64 @@ class ScreenshotCaptor:
         """获取WebDriver实例，供外部使用（如登录操作）。"""
         return self._driver
 
-    def capture_page(self, url: str, save_path: str) -> str:
+    def capture_page(self, url: str, save_path: str, readiness: Optional[str] = None) -> str:
         """打开指定 URL 并对整页截图，返回保存路径。"""
 
+        self.capture_png(url, save_path, readiness)
+        return save_path
+
+    def capture_png(self, url: str, save_path: str, readiness: Optional[str] = None) -> bytes:
+        """打开指定 URL，等待页面就绪后截图，保存到 save_path 的同时返回 PNG 字节（供后续推理直接使用）。
+
+        readiness 为用例指定的就绪策略（见 page_readiness.parse_readiness），为空时使用默认策略。
+        """
+
         if self._driver is None:
             raise RuntimeError("浏览器未打开，请先调用 open()")
 
         print(f"正在访问: {url}")
         self._driver.set_page_load_timeout(self.timeout_seconds)
-        
+        steps = self.readiness.steps_for(readiness) if self.readiness is not None else None
+        if steps is not None:
+            self.readiness.before_navigation(self._driver)
+        # 页面加载与就绪等待共用 timeout_seconds
+        deadline = time.monotonic() + self.timeout_seconds
+
         try:
-            self._driver.get(url)
+            with span("capture.navigate", url=url):
+                self._driver.get(url)
             print(f"页面加载完成")
         except Exception as e:
             print(f"页面加载超时或失败: {e}，继续截图...")
 
+        if steps is not None:
+            with span("capture.readiness") as sp:
+                result = self.readiness.wait(self._driver, steps, deadline)
+                sp.set(steps="; ".join(map(str, steps)), ready=result.ready)
+            waited = "; ".join(map(str, steps))
+            if result.ready:
+                print(f"页面已就绪（{waited}），等待 {result.elapsed:.2f}s")
+            else:
+                print(f"页面就绪等待超时（{', '.join(result.timed_out)}），继续截图...")
+
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        self._driver.save_screenshot(save_path)
+        with span("capture.screenshot") as sp:
+            png = self._driver.get_screenshot_as_png()
+            sp.set(bytes=len(png))
+        with span("capture.write"):
+            with open(save_path, "wb") as f:
+                f.write(png)
         print(f"截图已保存: {save_path}")
-        return save_path
+        return png
 
     def close(self) -> None:
         """关闭浏览器。"""
 
         if self._driver is not None:
-            self._driver.quit()
-            self._driver = None
+            try:
+                self._driver.quit()
+            finally:
+                self._driver = None
+        if self._user_data_dir is not None:
+            shutil.rmtree(self._user_data_dir, ignore_errors=True)
+            self._user_data_dir = None
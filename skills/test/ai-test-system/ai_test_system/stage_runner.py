@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+# 通知阶段工作线程退出的哨兵
+_STOP = object()
+
+
+@dataclass
+class StageStats:
+    """单个阶段的运行统计。"""
+
+    name: str
+    workers: int
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    first_start: Optional[float] = None
+    last_end: Optional[float] = None
+    # 该阶段输入队列的深度（入队时采样）
+    max_queue_depth: int = 0
+    depth_total: int = 0
+    depth_samples: int = 0
+
+    def record(self, start: float, end: float, ok: bool) -> None:
+        if ok:
+            self.processed += 1
+        else:
+            self.failed += 1
+        self.busy_seconds += end - start
+        if self.first_start is None or start < self.first_start:
+            self.first_start = start
+        if self.last_end is None or end > self.last_end:
+            self.last_end = end
+
+    def sample_depth(self, depth: int) -> None:
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self.depth_total += depth
+        self.depth_samples += 1
+
+    @property
+    def active_seconds(self) -> float:
+        """该阶段从第一条开始到最后一条结束的时长。"""
+        if self.first_start is None or self.last_end is None:
+            return 0.0
+        return self.last_end - self.first_start
+
+    @property
+    def throughput(self) -> float:
+        """每秒处理条数（按阶段活跃时长计算）。"""
+        active = self.active_seconds
+        return (self.processed + self.failed) / active if active > 0 else 0.0
+
+    @property
+    def utilization(self) -> float:
+        """工作线程忙碌时间占比。"""
+        active = self.active_seconds
+        return self.busy_seconds / (active * self.workers) if active > 0 else 0.0
+
+    @property
+    def avg_queue_depth(self) -> float:
+        return self.depth_total / self.depth_samples if self.depth_samples else 0.0
+
+    def format(self) -> str:
+        count = self.processed + self.failed
+        avg = self.busy_seconds / count if count else 0.0
+        text = (
+            f"{self.name:<8} 并发 {self.workers:<2} 完成 {self.processed:<5} 失败 {self.failed:<4} "
+            f"单条平均 {avg:6.2f}s  吞吐 {self.throughput:6.2f} 条/s  "
+            f"忙碌率 {self.utilization * 100:5.1f}%"
+        )
+        if self.depth_samples:
+            text += f"  输入队列 平均 {self.avg_queue_depth:.1f} / 峰值 {self.max_queue_depth}"
+        return text
+
+
+class StageQueue:
+    """阶段之间的有界队列：满时阻塞上游（背压），入队时为下游阶段采样队列深度。"""
+
+    def __init__(self, maxsize: int, stats: Optional[StageStats] = None) -> None:
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, maxsize))
+        self._stats = stats
+        self._lock = threading.Lock()
+
+    def put(self, item: Any) -> None:
+        self._queue.put(item)
+        if self._stats is not None and item is not _STOP:
+            with self._lock:
+                self._stats.sample_depth(self._queue.qsize())
+
+    def get(self) -> Any:
+        return self._queue.get()
+
+
+class Stage:
+    """一个处理阶段：workers 个线程从 inbox 取任务，处理成功放入 outbox，失败交给 on_error。"""
+
+    def __init__(
+        self,
+        name: str,
+        workers: int,
+        fn: Callable[[Any], Any],
+        inbox: StageQueue,
+        outbox: Callable[[Any], None],
+        on_error: Callable[[Any, Exception], None],
+        stats: StageStats,
+    ) -> None:
+        self.name = name
+        self.workers = max(1, workers)
+        self._fn = fn
+        self._inbox = inbox
+        self._outbox = outbox
+        self._on_error = on_error
+        self.stats = stats
+        self._stats_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> "Stage":
+        for i in range(self.workers):
+            t = threading.Thread(target=self._loop, name=f"{self.name}-{i + 1}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def close(self) -> None:
+        """上游已全部入队后调用：通知工作线程处理完剩余任务后退出，并等待结束。"""
+        for _ in self._threads:
+            self._inbox.put(_STOP)
+        for t in self._threads:
+            t.join()
+
+    def _loop(self) -> None:
+        while True:
+            job = self._inbox.get()
+            if job is _STOP:
+                return
+            start = time.perf_counter()
+            try:
+                result = self._fn(job)
+            except Exception as e:
+                self._record(start, ok=False)
+                self._on_error(job, e)
+                continue
+            self._record(start, ok=True)
+            self._outbox(result)
+
+    def _record(self, start: float, ok: bool) -> None:
+        with self._stats_lock:
+            self.stats.record(start, time.perf_counter(), ok)
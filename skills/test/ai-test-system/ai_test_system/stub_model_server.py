@@ -0,0 +1,176 @@
+"""本地视觉模型桩服务：模拟推理延迟与 GPU 并发槽位，用于 VisionModelClient 基准测试。
+
+- POST /predict        单张: multipart 字段 image + payload({"prompt": ...})
+- POST /predict_batch  批量: 多个 images 字段 + payload({"prompts": [...]})，返回 {"results": [...]}
+
+单次请求耗时 = overhead_ms + per_image_ms × 图片数，同一时刻最多 slots 个请求在推理，
+其余排队；关闭批量（batch=False）时 /predict_batch 返回 404。
+
+用法:
+  python -m ai_test_system.stub_model_server --port 18000 --overhead-ms 40 --per-image-ms 10 --slots 2
+  # 然后将 vision_model.endpoint 指向 http://127.0.0.1:18000/predict
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from dataclasses import dataclass
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+
+@dataclass
+class StubModelBehavior:
+    overhead_ms: float = 40.0  # 每次请求的固定开销（排队、预处理、模型前向的固定部分）
+    per_image_ms: float = 10.0  # 每张图片的额外耗时
+    slots: int = 2  # 同时推理的请求数（模拟 GPU 并发能力）
+    batch: bool = True  # 是否支持 /predict_batch
+
+
+@dataclass
+class StubModelStats:
+    requests: int = 0
+    images: int = 0
+    connections: int = 0
+
+
+def _parse_multipart(content_type: str, body: bytes) -> List[Tuple[str, bytes]]:
+    """解析 multipart/form-data，返回 [(字段名, 内容)]。"""
+
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+    )
+    fields = []
+    for part in message.iter_parts():
+        fields.append((part.get_param("name", header="content-disposition"), part.get_payload(decode=True)))
+    return fields
+
+
+def _fake_regions(index: int) -> dict:
+    offset = 10 * (index % 5)
+    return {
+        "input_regions": [[40 + offset, 40, 400 + offset, 300]],
+        "output_regions": [[500, 320 + offset, 900, 600 + offset]],
+    }
+
+
+def _make_handler(behavior: StubModelBehavior, stats: StubModelStats, slots: threading.Semaphore, lock: threading.Lock):
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with lock:
+                stats.connections += 1
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            path = self.path.rstrip("/")
+            if path.endswith("/predict_batch") and not behavior.batch:
+                self._send_json(404, {"message": "batch not supported"})
+                return
+
+            fields = _parse_multipart(self.headers.get("Content-Type", ""), body)
+            images = [content for name, content in fields if name in ("image", "images")]
+            with lock:
+                stats.requests += 1
+                stats.images += len(images)
+
+            with slots:
+                time.sleep((behavior.overhead_ms + behavior.per_image_ms * len(images)) / 1000.0)
+
+            if path.endswith("/predict_batch"):
+                self._send_json(200, {"results": [_fake_regions(i) for i in range(len(images))]})
+            else:
+                self._send_json(200, _fake_regions(0))
+
+        def _send_json(self, status: int, body: dict):
+            content = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            pass
+
+    return _Handler
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class StubModelServer:
+    """可在后台线程中启动的视觉模型桩服务（供基准测试脚本使用）。"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, behavior: Optional[StubModelBehavior] = None) -> None:
+        self.behavior = behavior or StubModelBehavior()
+        self.stats = StubModelStats()
+        slots = threading.Semaphore(max(1, self.behavior.slots))
+        handler = _make_handler(self.behavior, self.stats, slots, threading.Lock())
+        self._server = _StubHTTPServer((host, port), handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.base_url}/predict"
+
+    @property
+    def batch_endpoint(self) -> str:
+        return f"{self.base_url}/predict_batch"
+
+    def start(self) -> "StubModelServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="视觉模型本地桩服务")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="监听地址（默认 127.0.0.1）")
+    parser.add_argument("--port", type=int, default=18000, help="监听端口（默认 18000）")
+    parser.add_argument("--overhead-ms", type=float, default=40.0, help="每次请求固定耗时（毫秒）")
+    parser.add_argument("--per-image-ms", type=float, default=10.0, help="每张图片额外耗时（毫秒）")
+    parser.add_argument("--slots", type=int, default=2, help="同时推理的请求数（默认 2）")
+    parser.add_argument("--no-batch", action="store_true", help="不支持批量推理（/predict_batch 返回 404）")
+    args = parser.parse_args()
+
+    behavior = StubModelBehavior(
+        overhead_ms=args.overhead_ms,
+        per_image_ms=args.per_image_ms,
+        slots=args.slots,
+        batch=not args.no_batch,
+    )
+    server = StubModelServer(args.host, args.port, behavior)
+    print(f"视觉模型桩服务已启动: {server.endpoint}（批量: {server.batch_endpoint if behavior.batch else '不支持'}）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+# (名称, 分类, 开始 ns, 结束 ns, 线程 id, 参数)
+_Event = Tuple[str, str, int, int, int, Optional[Dict[str, Any]]]
+
+
+class _NullSpan:
+    """未开启追踪时使用的空 span：进入、退出都不做任何事。"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+    def set(self, **args: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("_tracer", "_name", "_cat", "_args", "_start")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Optional[Dict[str, Any]]) -> None:
+        self._tracer = tracer
+        self._name = name
+        self._cat = cat
+        self._args = args
+
+    def __enter__(self) -> "_Span":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.set(error=exc_type.__name__)
+        self._tracer._events.append(
+            (self._name, self._cat, self._start, end, threading.get_ident(), self._args)
+        )
+        return False
+
+    def set(self, **args: Any) -> None:
+        """为 span 补充参数（如图片字节数、命中与否），会写入 trace 的 args。"""
+        if self._args is None:
+            self._args = {}
+        self._args.update(args)
+
+
+class Tracer:
+    """记录各阶段耗时的 span 追踪器，可导出 Chrome trace JSON（chrome://tracing、Perfetto 打开）与按阶段汇总。
+
+    用法：
+        with span("capture.navigate", "capture", url=url):
+            driver.get(url)
+
+    未开启时 span() 返回共享的空对象，开销只有一次属性判断。
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        # list.append 在 CPython 中是原子操作，多线程记录无需加锁
+        self._events: List[_Event] = []
+        self._thread_names: Dict[int, str] = {}
+        self._origin = time.perf_counter_ns()
+
+    def enable(self) -> None:
+        self._events = []
+        self._thread_names = {}
+        self._origin = time.perf_counter_ns()
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def span(self, name: str, cat: str = "", **args: Any):
+        if not self.enabled:
+            return _NULL_SPAN
+        ident = threading.get_ident()
+        if ident not in self._thread_names:
+            self._thread_names[ident] = threading.current_thread().name
+        return _Span(self, name, cat, args or None)
+
+    def export_chrome_trace(self, path: str) -> None:
+        """导出为 Chrome trace 格式（完整事件 ph=X，时间单位微秒）。"""
+
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in self._thread_names.items()
+        ]
+        for name, cat, start, end, tid, args in list(self._events):
+            event = {
+                "name": name,
+                "cat": cat or name.split(".", 1)[0],
+                "ph": "X",
+                "ts": (start - self._origin) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = args
+            events.append(event)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False, default=str)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """按 span 名称汇总: [{"name", "count", "total_s", "avg_ms", "p50_ms", "p95_ms", "max_ms"}]，按总耗时降序。"""
+
+        durations: Dict[str, List[int]] = defaultdict(list)
+        for name, _, start, end, _, _ in list(self._events):
+            durations[name].append(end - start)
+
+        rows = []
+        for name, values in durations.items():
+            values.sort()
+            count = len(values)
+            rows.append({
+                "name": name,
+                "count": count,
+                "total_s": sum(values) / 1e9,
+                "avg_ms": sum(values) / count / 1e6,
+                "p50_ms": values[count // 2] / 1e6,
+                "p95_ms": values[min(count - 1, int(count * 0.95))] / 1e6,
+                "max_ms": values[-1] / 1e6,
+            })
+        rows.sort(key=lambda row: -row["total_s"])
+        return rows
+
+    def format_summary(self) -> str:
+        lines = [
+            f"  {'span':<24}{'count':>8}{'total':>12}{'avg':>12}{'p50':>10}{'p95':>10}{'max':>10}"
+        ]
+        for row in self.summary():
+            lines.append(
+                f"  {row['name']:<24}{row['count']:>8}{row['total_s']:>11.2f}s"
+                f"{row['avg_ms']:>10.1f}ms{row['p50_ms']:>8.1f}ms{row['p95_ms']:>8.1f}ms{row['max_ms']:>8.1f}ms"
+            )
+        return "\n".join(lines)
+
+
+# 进程内共用的追踪器，各模块通过 span() 记录
+tracer = Tracer()
+
+
+def span(name: str, cat: str = "", **args: Any):
+    """在全局追踪器上开启一个 span；未开启追踪时几乎没有开销。"""
+
+    if not tracer.enabled:
+        return _NULL_SPAN
+    return tracer.span(name, cat, **args)
@@ -1,12 +1,105 @@
 from __future__ import annotations
 
 import json
-from typing import List, Optional
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple
 
 import requests
-from PIL import Image
+from requests.adapters import HTTPAdapter
 
 from .case_model import BoundingBox, ModelRequest, ModelResponse
+from .image_meta import image_size
+from .inference_cache import InferenceCache
+from .tracing import span
+
+# 一张待推理的截图: (图片字节, prompt)
+InferItem = Tuple[bytes, str]
+
+# 通知合并线程退出的哨兵
+_STOP = object()
+
+
+class BatchUnsupportedError(Exception):
+    """模型服务不支持一次请求多张截图。"""
+
+
+@dataclass
+class _PendingInfer:
+    image_bytes: bytes
+    prompt: str
+    future: Future
+
+
+class _MicroBatcher:
+    """把多个推理线程同时发起的单张请求合并为一次批量请求。
+
+    第一条请求到达后最多再等待 wait_seconds 收集后续请求，凑满 batch_size 立即发送；
+    批量请求在 max_in_flight 个发送线程中执行，合并线程本身不阻塞在网络上。
+    """
+
+    def __init__(
+        self,
+        send: Callable[[List[InferItem]], List[Optional[ModelResponse]]],
+        batch_size: int,
+        wait_seconds: float,
+        max_in_flight: int,
+    ) -> None:
+        self._send = send
+        self._batch_size = batch_size
+        self._wait_seconds = wait_seconds
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="vision-batch")
+        self._thread = threading.Thread(target=self._loop, name="vision-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, image_bytes: bytes, prompt: str) -> Future:
+        future: Future = Future()
+        self._queue.put(_PendingInfer(image_bytes, prompt, future))
+        return future
+
+    def close(self) -> None:
+        """发送完已排队的请求后退出。"""
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def _loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stopping = False
+            deadline = time.monotonic() + self._wait_seconds
+            while len(batch) < self._batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._executor.submit(self._dispatch, batch)
+            if stopping:
+                return
+
+    def _dispatch(self, batch: List[_PendingInfer]) -> None:
+        try:
+            responses = self._send([(p.image_bytes, p.prompt) for p in batch])
+        except Exception as e:
+            for p in batch:
+                p.future.set_exception(e)
+            return
+        for p, response in zip(batch, responses):
+            p.future.set_result(response)
 
 
 class VisionModelClient:
@@ -14,37 +107,231 @@ class VisionModelClient:
 
     为保证系统可执行，如果调用失败，会退化为一个简单的“中心区域”规则，
     返回一块输入区域和一块输出区域，方便你快速体验整体流程。
+
+    - 所有请求共用一个带连接池的 Session（keep-alive 复用连接），在途请求数不超过 max_in_flight
+    - batch_size > 1 时，多个推理线程同时发起的请求会合并为一次批量请求
+      （多个 images 文件 + prompts 列表，服务端返回 results 列表）；
+      服务端不支持批量时自动改为逐张请求
+    - ModelRequest 带有截图字节时直接上传，不再从磁盘读取
     """
 
-    def __init__(self, endpoint: str, api_key: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        endpoint: str,
+        api_key: Optional[str] = None,
+        cache: Optional[InferenceCache] = None,
+        timeout_seconds: float = 30.0,
+        connect_timeout_seconds: float = 5.0,
+        pool_size: int = 4,
+        max_in_flight: int = 4,
+        batch_size: int = 1,
+        batch_wait_ms: int = 20,
+        batch_endpoint: Optional[str] = None,
+    ) -> None:
         self.endpoint = endpoint
         self.api_key = api_key
+        # 推理结果缓存：同一截图同一描述（或开启近似匹配时未变化的页面）不再调用模型
+        self.cache = cache
+        self.timeout = (connect_timeout_seconds, timeout_seconds)
+        self.pool_size = max(1, pool_size)
+        self.max_in_flight = max(1, max_in_flight)
+        self.batch_size = max(1, batch_size)
+        self.batch_wait_seconds = max(0, batch_wait_ms) / 1000.0
+        self.batch_endpoint = batch_endpoint or endpoint
+        # 首次批量请求被服务端拒绝后置为 False，之后逐张请求
+        self.batch_supported = True
+
+        self.session = self._create_session()
+        self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        self._batcher: Optional[_MicroBatcher] = None
+        self._batcher_lock = threading.Lock()
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        # 连接池大小不小于推理并发数，否则多余连接用完即丢弃，无法复用
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["Accept"] = "application/json"
+        if self.api_key:
+            session.headers["Authorization"] = f"Bearer {self.api_key}"
+        return session
 
     def infer(self, request: ModelRequest) -> ModelResponse:
         """调用视觉模型服务并返回输入/输出区域坐标。"""
 
+        image_bytes = self.read_image(request)
+        if image_bytes is None:
+            return self._fallback_regions(request.image_path)
+
+        fingerprint = None
+        if self.cache is not None:
+            with span("infer.cache_lookup") as sp:
+                fingerprint = self.cache.fingerprint(image_bytes, request.prompt)
+                cached = self.cache.get(fingerprint)
+                sp.set(hit=cached is not None)
+            if cached is not None:
+                return cached
+
+        if self.batch_size > 1 and self.batch_supported:
+            future = self._get_batcher().submit(image_bytes, request.prompt)
+            # 包含等待合并批次与批量请求本身的时间
+            with span("infer.batch_wait"):
+                response = future.result()
+        else:
+            response = self._call_model(image_bytes, request.prompt)
+        if response is None:
+            # 模型不可用或没有返回有效数据时退化为简单规则（退化结果不写入缓存）
+            with span("infer.fallback"):
+                return self._fallback_regions(request.image_path, image_bytes)
+
+        if fingerprint is not None:
+            self.cache.put(fingerprint, response)
+        return response
+
+    def infer_batch(self, model_requests: List[ModelRequest]) -> List[ModelResponse]:
+        """一次推理多张截图：先查缓存，未命中的按 batch_size 分批请求，结果与输入顺序一致。"""
+
+        responses, pending = self.lookup_cached(model_requests)
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start:start + self.batch_size]
+            results = self.call_many([(b, model_requests[i].prompt) for i, b, _ in chunk])
+            for (i, _, _), response in zip(chunk, results):
+                responses[i] = response
+        return self.finish_batch(model_requests, responses, pending)
+
+    def lookup_cached(
+        self, model_requests: List[ModelRequest]
+    ) -> Tuple[List[Optional[ModelResponse]], List[Tuple[int, bytes, Any]]]:
+        """读取截图并查缓存，返回 (各截图的结果，未命中为 None, 待请求的 [(序号, 截图字节, 缓存指纹)])。"""
+
+        responses: List[Optional[ModelResponse]] = [None] * len(model_requests)
+        pending: List[Tuple[int, bytes, Any]] = []
+        for i, request in enumerate(model_requests):
+            image_bytes = self.read_image(request)
+            if image_bytes is None:
+                continue
+            fingerprint = None
+            if self.cache is not None:
+                fingerprint = self.cache.fingerprint(image_bytes, request.prompt)
+                responses[i] = self.cache.get(fingerprint)
+                if responses[i] is not None:
+                    continue
+            pending.append((i, image_bytes, fingerprint))
+        return responses, pending
+
+    def finish_batch(
+        self,
+        model_requests: List[ModelRequest],
+        responses: List[Optional[ModelResponse]],
+        pending: List[Tuple[int, bytes, Any]],
+    ) -> List[ModelResponse]:
+        """把模型返回的结果写入缓存，没有结果的截图使用退化规则。"""
+
+        for i, _, fingerprint in pending:
+            if responses[i] is not None and fingerprint is not None:
+                self.cache.put(fingerprint, responses[i])
+        return [
+            response if response is not None else self._fallback_regions(request.image_path, request.image_bytes)
+            for request, response in zip(model_requests, responses)
+        ]
+
+    def call_many(self, items: List[InferItem]) -> List[Optional[ModelResponse]]:
+        """一次请求多张截图；服务端不支持批量时逐张请求。失败的截图对应 None。"""
+
+        if len(items) > 1 and self.batch_supported:
+            try:
+                return self._call_model_batch(items)
+            except BatchUnsupportedError:
+                if self.batch_supported:
+                    self.batch_supported = False
+                    print("视觉模型服务不支持批量推理，改为逐张请求")
+        return [self._call_model(image_bytes, prompt) for image_bytes, prompt in items]
+
+    def close(self) -> None:
+        """发送完合并中的请求并关闭连接池（之后仍可继续使用，会重新建立连接）。"""
+
+        with self._batcher_lock:
+            batcher, self._batcher = self._batcher, None
+        if batcher is not None:
+            batcher.close()
+        self.session.close()
+
+    def _get_batcher(self) -> _MicroBatcher:
+        with self._batcher_lock:
+            if self._batcher is None:
+                self._batcher = _MicroBatcher(
+                    self.call_many, self.batch_size, self.batch_wait_seconds, self.max_in_flight
+                )
+            return self._batcher
+
+    @staticmethod
+    def read_image(request: ModelRequest) -> Optional[bytes]:
+        if request.image_bytes is not None:
+            return request.image_bytes
         try:
-            files = {"image": open(request.image_path, "rb")}
-            payload = {"prompt": request.prompt}
-            headers = {"Accept": "application/json"}
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
+            with open(request.image_path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
 
-            resp = requests.post(self.endpoint, files=files, data={"payload": json.dumps(payload)}, headers=headers, timeout=30)
+    def _call_model(self, image_bytes: bytes, prompt: str) -> Optional[ModelResponse]:
+        """请求模型服务，失败或没有返回有效区域时返回 None。"""
+
+        try:
+            with self._in_flight, span("infer.http", images=1, bytes=len(image_bytes)):
+                resp = self.session.post(
+                    self.endpoint,
+                    files={"image": ("screenshot.png", image_bytes, "image/png")},
+                    data={"payload": json.dumps({"prompt": prompt})},
+                    timeout=self.timeout,
+                )
             resp.raise_for_status()
-            data = resp.json()
+            return self.build_response(resp.json())
+        except Exception:
+            # 为提高可执行性，任何异常都按模型不可用处理
+            return None
 
-            input_regions = self._parse_boxes(data.get("input_regions", []))
-            output_regions = self._parse_boxes(data.get("output_regions", []))
+    def _call_model_batch(self, items: List[InferItem]) -> List[Optional[ModelResponse]]:
+        files = [
+            ("images", (f"screenshot_{i}.png", image_bytes, "image/png"))
+            for i, (image_bytes, _) in enumerate(items)
+        ]
+        payload = {"prompts": [prompt for _, prompt in items]}
+        try:
+            with self._in_flight, span(
+                "infer.http", images=len(items), bytes=sum(len(image_bytes) for image_bytes, _ in items)
+            ):
+                resp = self.session.post(
+                    self.batch_endpoint,
+                    files=files,
+                    data={"payload": json.dumps(payload)},
+                    timeout=self.timeout,
+                )
+            status = resp.status_code
+            data = resp.json() if status == 200 else None
+        except Exception:
+            return [None] * len(items)
+        return self.parse_batch(status, data, len(items))
 
-            if not input_regions and not output_regions:
-                # 如果模型没有返回有效数据，则退化为简单规则
-                return self._fallback_regions(request.image_path)
+    def parse_batch(self, status: int, data: Any, count: int) -> List[Optional[ModelResponse]]:
+        """解析批量响应 {"results": [...]}；服务端拒绝或格式不符时抛出 BatchUnsupportedError。"""
 
-            return ModelResponse(input_regions=input_regions, output_regions=output_regions)
-        except Exception:
-            # 为提高可执行性，任何异常直接退化为简单规则
-            return self._fallback_regions(request.image_path)
+        if status in (400, 404, 405, 413, 415, 422, 501):
+            raise BatchUnsupportedError(f"HTTP {status}")
+        if status != 200:
+            return [None] * count
+        results = data.get("results") if isinstance(data, dict) else None
+        if not isinstance(results, list) or len(results) != count:
+            raise BatchUnsupportedError("响应中没有与请求数量一致的 results")
+        return [self.build_response(item) if isinstance(item, dict) else None for item in results]
+
+    def build_response(self, data: dict) -> Optional[ModelResponse]:
+        input_regions = self._parse_boxes(data.get("input_regions", []))
+        output_regions = self._parse_boxes(data.get("output_regions", []))
+        if not input_regions and not output_regions:
+            return None
+        return ModelResponse(input_regions=input_regions, output_regions=output_regions)
 
     def _parse_boxes(self, raw_boxes: List) -> List[BoundingBox]:
         boxes: List[BoundingBox] = []
@@ -66,11 +353,10 @@ class VisionModelClient:
                 continue
         return boxes
 
-    def _fallback_regions(self, image_path: str) -> ModelResponse:
-        """当模型不可用时，基于图片尺寸构造简单的两个矩形区域。"""
+    def _fallback_regions(self, image_path: str, image_bytes: Optional[bytes] = None) -> ModelResponse:
+        """当模型不可用时，基于图片尺寸构造简单的两个矩形区域（只读取图片文件头获取尺寸）。"""
 
-        img = Image.open(image_path)
-        width, height = img.size
+        width, height = image_size(image_path, image_bytes)
 
         # 左上为“输入”，右下为“输出”
         input_box = BoundingBox(int(width * 0.05), int(height * 0.05), int(width * 0.45), int(height * 0.45))
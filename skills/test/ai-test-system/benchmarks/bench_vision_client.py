@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+视觉模型客户端基准：对本地桩模型服务对比各调用方式的吞吐与延迟
+
+1. 生成若干张不同内容的 PNG 截图（默认 1920x1080）
+2. 在本进程后台线程中启动 StubModelServer（固定开销 + 每图耗时，GPU 并发槽位可配）
+3. 每个模式推理相同数量的截图，输出 images/s、p50/p99 单张耗时、HTTP 请求数与新建连接数
+
+模式:
+  legacy   每张图单独 requests.post、每次从磁盘重新读取（改造前的调用方式），--workers 个线程
+  pooled   VisionModelClient 连接池 + 在途上限，--workers 个线程逐张推理
+  batched  同上，并将多个线程的请求合并为批量请求（--batch-size）
+  async    AsyncVisionModelClient（需 aiohttp），按 --batch-size 分批并发提交
+
+推理缓存在基准中关闭，每张截图都会真正请求模型服务。
+
+用法:
+  python benchmarks/bench_vision_client.py
+  python benchmarks/bench_vision_client.py --images 200 --workers 16 --batch-size 8 \\
+      --overhead-ms 40 --per-image-ms 10 --slots 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+import requests
+from PIL import Image, ImageDraw
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ai_test_system.case_model import ModelRequest  # noqa: E402
+from ai_test_system.stub_model_server import StubModelBehavior, StubModelServer  # noqa: E402
+from ai_test_system.vision_model_client import VisionModelClient  # noqa: E402
+
+MODES = ("legacy", "pooled", "batched", "async")
+
+
+def generate_screenshots(out_dir: str, count: int, width: int, height: int, seed: int) -> List[str]:
+    """生成内容各不相同的截图（色块 + 文字，PNG 大小接近真实页面截图）"""
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        img = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(img)
+        for _ in range(30):
+            x, y = rng.randrange(width - 200), rng.randrange(height - 80)
+            color = tuple(rng.randrange(256) for _ in range(3))
+            draw.rectangle([x, y, x + rng.randrange(40, 200), y + rng.randrange(20, 80)], fill=color)
+            draw.text((x + 5, y + 5), f"field-{i}-{rng.randrange(10000)}", fill="black")
+        path = os.path.join(out_dir, f"case_{i}.png")
+        img.save(path)
+        paths.append(path)
+    return paths
+
+
+def _legacy_infer(endpoint: str, request: ModelRequest) -> None:
+    """改造前的调用方式：每次新建连接、从磁盘读取截图"""
+    with open(request.image_path, "rb") as f:
+        resp = requests.post(
+            endpoint,
+            files={"image": f},
+            data={"payload": json.dumps({"prompt": request.prompt})},
+            headers={"Accept": "application/json"},
+            timeout=30,
+        )
+    resp.raise_for_status()
+
+
+def _percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def _run_threads(fn: Callable[[ModelRequest], object], model_requests: List[ModelRequest], workers: int) -> List[float]:
+    def timed(request: ModelRequest) -> float:
+        start = time.perf_counter()
+        fn(request)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(timed, model_requests))
+
+
+def _run_async(client: VisionModelClient, model_requests: List[ModelRequest]) -> List[float]:
+    from ai_test_system.async_vision_client import AsyncVisionModelClient
+
+    async def run() -> List[float]:
+        async with AsyncVisionModelClient(client) as async_client:
+            async def timed(chunk: List[ModelRequest]) -> List[float]:
+                start = time.perf_counter()
+                await async_client.infer_batch(chunk)
+                return [time.perf_counter() - start] * len(chunk)
+
+            size = client.batch_size
+            chunks = [model_requests[i:i + size] for i in range(0, len(model_requests), size)]
+            results = await asyncio.gather(*(timed(chunk) for chunk in chunks))
+            return [t for chunk_times in results for t in chunk_times]
+
+    return asyncio.run(run())
+
+
+def run_mode(mode: str, server: StubModelServer, model_requests: List[ModelRequest], args) -> dict:
+    client = None
+    if mode != "legacy":
+        client = VisionModelClient(
+            endpoint=server.endpoint,
+            batch_endpoint=server.batch_endpoint,
+            pool_size=args.workers,
+            max_in_flight=args.max_in_flight or args.workers,
+            batch_size=1 if mode == "pooled" else args.batch_size,
+            batch_wait_ms=args.batch_wait_ms,
+        )
+
+    before_requests = server.stats.requests
+    before_connections = server.stats.connections
+    start = time.perf_counter()
+    if mode == "legacy":
+        latencies = _run_threads(lambda r: _legacy_infer(server.endpoint, r), model_requests, args.workers)
+    elif mode == "async":
+        latencies = _run_async(client, model_requests)
+    else:
+        latencies = _run_threads(client.infer, model_requests, args.workers)
+    elapsed = time.perf_counter() - start
+    if client is not None:
+        client.close()
+
+    return {
+        "mode": mode,
+        "images": len(model_requests),
+        "elapsed_s": round(elapsed, 3),
+        "images_per_s": round(len(model_requests) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+        "http_requests": server.stats.requests - before_requests,
+        "connections": server.stats.connections - before_connections,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VisionModelClient 吞吐基准")
+    parser.add_argument("--images", type=int, default=120, help="推理的截图数（默认 120）")
+    parser.add_argument("--distinct", type=int, default=20, help="生成的不同截图张数，循环使用（默认 20）")
+    parser.add_argument("--width", type=int, default=1920, help="截图宽度（默认 1920）")
+    parser.add_argument("--height", type=int, default=1080, help="截图高度（默认 1080）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子（默认 0）")
+    parser.add_argument(
+        "--modes",
+        type=str,
+        default=",".join(MODES),
+        help=f"逗号分隔的模式，可选 {','.join(MODES)}（默认全部）",
+    )
+    parser.add_argument("--workers", "-w", type=int, default=16, help="推理线程数 / 连接池大小（默认 16）")
+    parser.add_argument("--max-in-flight", type=int, default=0, help="在途请求上限（默认等于 --workers）")
+    parser.add_argument("--batch-size", type=int, default=8, help="batched / async 模式每批截图数（默认 8）")
+    parser.add_argument("--batch-wait-ms", type=int, default=20, help="合并批量请求的最长等待（默认 20ms）")
+    parser.add_argument("--overhead-ms", type=float, default=40.0, help="桩服务每次请求固定耗时（默认 40ms）")
+    parser.add_argument("--per-image-ms", type=float, default=10.0, help="桩服务每张图片耗时（默认 10ms）")
+    parser.add_argument("--slots", type=int, default=2, help="桩服务同时推理的请求数（默认 2）")
+    parser.add_argument("--no-batch", action="store_true", help="桩服务不支持批量（验证自动降级为逐张请求）")
+    parser.add_argument("--json", type=str, default=None, help="将结果另存为 JSON 文件")
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"未知模式: {', '.join(sorted(unknown))}")
+    if "async" in modes:
+        try:
+            import aiohttp  # noqa: F401
+        except ImportError:
+            print("未安装 aiohttp，跳过 async 模式")
+            modes.remove("async")
+
+    work_dir = tempfile.mkdtemp(prefix="bench_vision_")
+    paths = generate_screenshots(work_dir, max(1, args.distinct), args.width, args.height, args.seed)
+    model_requests = [
+        ModelRequest(image_path=paths[i % len(paths)], prompt=f"用例 {i}: 标注输入与输出参数")
+        for i in range(args.images)
+    ]
+
+    behavior = StubModelBehavior(
+        overhead_ms=args.overhead_ms,
+        per_image_ms=args.per_image_ms,
+        slots=args.slots,
+        batch=not args.no_batch,
+    )
+    server = StubModelServer(behavior=behavior).start()
+    print(f"截图={args.images}（{args.width}x{args.height}）  线程={args.workers}  批大小={args.batch_size}  "
+          f"桩服务 {args.overhead_ms}ms + {args.per_image_ms}ms/图，{args.slots} 槽位"
+          f"{'，不支持批量' if args.no_batch else ''}")
+    print(f"  {'mode':<10}{'images/s':>10}{'elapsed':>10}{'p50':>10}{'p99':>10}{'requests':>10}{'conns':>8}")
+
+    reports = []
+    try:
+        for mode in modes:
+            report = run_mode(mode, server, model_requests, args)
+            reports.append(report)
+            print(f"  {mode:<10}{report['images_per_s']:>10.1f}{report['elapsed_s']:>9.2f}s"
+                  f"{report['p50_ms']:>8.1f}ms{report['p99_ms']:>8.1f}ms"
+                  f"{report['http_requests']:>10}{report['connections']:>8}")
+    finally:
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        json_dir = os.path.dirname(args.json)
+        if json_dir:
+            os.makedirs(json_dir, exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": reports}, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
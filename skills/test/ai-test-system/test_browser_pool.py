@@ -0,0 +1,136 @@
+"""测试浏览器池的崩溃重启与用例交还"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_test_system.browser_pool import BrowserPool
+from ai_test_system import case_model
+
+
+class FakeDriver:
+    def __init__(self):
+        self.crashed = False
+
+    def execute_script(self, script):
+        if self.crashed:
+            raise RuntimeError("会话已失效")
+        return 1
+
+
+class FakeCaptor:
+    def __init__(self):
+        self._driver = None
+
+    def open(self):
+        self._driver = FakeDriver()
+
+    def get_driver(self):
+        return self._driver
+
+    def close(self):
+        self._driver = None
+
+
+def _cases(count):
+    return [
+        case_model.TestCase(case_id=str(i), description="", system_url=f"http://x/{i}")
+        for i in range(count)
+    ]
+
+
+def _run(pool, cases, handler):
+    results = {}
+    for case, error in pool.run(cases, handler):
+        results[case.case_id] = error
+    return results
+
+
+def _crashing_handler(crashing_thread, handled):
+    def handler(captor, case):
+        if threading.current_thread().name == crashing_thread:
+            captor.get_driver().crashed = True
+            raise RuntimeError("浏览器崩溃")
+        time.sleep(0.01)
+        handled.append(case.case_id)
+        return case
+
+    return handler
+
+
+def test_case_handed_back_when_browser_gives_up():
+    """浏览器重启次数用完后，它正在处理的用例交由其它浏览器完成"""
+    pool = BrowserPool(size=3, captor_factory=FakeCaptor, max_restarts=1, max_case_attempts=3)
+    handled = []
+    results = _run(pool, _cases(12), _crashing_handler("browser-1", handled))
+
+    assert len(results) == 12
+    assert all(error is None for error in results.values())
+    assert sorted(handled, key=int) == [str(i) for i in range(12)]
+    assert [w.restarts for w in pool.workers] == [1, 0, 0]
+
+
+def test_last_browser_fails_case_and_remaining():
+    """只剩一个浏览器且它也放弃时，当前用例与剩余用例记为失败"""
+    pool = BrowserPool(size=1, captor_factory=FakeCaptor, max_restarts=2, max_case_attempts=4)
+    results = _run(pool, _cases(3), _crashing_handler("browser-1", []))
+
+    assert len(results) == 3
+    assert all(error is not None for error in results.values())
+    assert sum("浏览器崩溃" in str(e) for e in results.values()) == 1
+    assert sum("没有可用的浏览器" in str(e) for e in results.values()) == 2
+    assert pool.workers[0].restarts == 2
+
+
+def test_case_error_does_not_restart_browser():
+    """浏览器仍可用时，用例自身的异常只记为该用例失败"""
+
+    def handler(captor, case):
+        if case.case_id == "1":
+            raise ValueError("页面元素缺失")
+        return case
+
+    pool = BrowserPool(size=2, captor_factory=FakeCaptor, max_restarts=1)
+    results = _run(pool, _cases(4), handler)
+
+    assert isinstance(results["1"], ValueError)
+    assert sum(error is None for error in results.values()) == 3
+    assert all(w.restarts == 0 for w in pool.workers)
+
+
+def test_sporadic_crashes_across_long_run():
+    """偶发崩溃分散在整个运行中时，成功处理用例后连续重启计数清零，浏览器不会退出"""
+    crash_once = {"10", "80", "150", "220", "290"}
+
+    def handler(captor, case):
+        if case.case_id in crash_once:
+            crash_once.discard(case.case_id)
+            captor.get_driver().crashed = True
+            raise RuntimeError("浏览器崩溃")
+        return case
+
+    pool = BrowserPool(size=1, captor_factory=FakeCaptor, max_restarts=3)
+    results = _run(pool, _cases(300), handler)
+
+    assert len(results) == 300
+    assert all(error is None for error in results.values())
+    assert pool.workers[0].restarts == 5
+
+
+def test_case_that_always_crashes_fails_alone():
+    """必然导致崩溃的用例达到 max_case_attempts 后记为失败，其它用例不受影响"""
+
+    def handler(captor, case):
+        if case.case_id == "3":
+            captor.get_driver().crashed = True
+            raise RuntimeError("浏览器崩溃")
+        return case
+
+    pool = BrowserPool(size=2, captor_factory=FakeCaptor, max_restarts=3, max_case_attempts=2)
+    results = _run(pool, _cases(20), handler)
+
+    assert "浏览器崩溃" in str(results["3"])
+    assert sum(error is None for error in results.values()) == 19
+    assert sum(w.restarts for w in pool.workers) == 2
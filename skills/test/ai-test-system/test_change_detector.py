@@ -0,0 +1,99 @@
+"""测试页面变化检测"""
+import io
+import os
+import sys
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_test_system.case_model import BoundingBox, ParameterRegion
+from ai_test_system.change_detector import ChangeDetector
+from ai_test_system.config_loader import ChangeDetectionConfig
+from ai_test_system.image_hash import sha256_bytes
+
+
+def _page(size=(400, 300), text_box=None, noise=0):
+    img = Image.new("RGB", size, (240, 240, 240))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([20, 20, 380, 60], fill=(30, 60, 120))
+    draw.rectangle([20, 100, 200, 280], fill=(255, 255, 255), outline=(0, 0, 0))
+    if text_box is not None:
+        draw.rectangle(text_box, fill=(0, 0, 0))
+    if noise:
+        # 抗锯齿、渲染抖动等轻微灰度差异
+        for x in range(0, size[0], 7):
+            r, g, b = img.getpixel((x, 150))
+            img.putpixel((x, 150), (r - noise, g - noise, b - noise))
+    buf = io.BytesIO()
+    img.save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _detector(tmp_path):
+    return ChangeDetector(str(tmp_path / "baseline.json"))
+
+
+def test_identical_and_noise_only_pages_unchanged(tmp_path):
+    detector = _detector(tmp_path)
+    assert detector.is_unchanged(_page(), _page())
+    assert detector.is_unchanged(_page(), _page(noise=10))
+
+
+def test_small_content_change_detected(tmp_path):
+    """一个字符大小的内容变化也视为已变化"""
+    detector = _detector(tmp_path)
+    assert not detector.is_unchanged(_page(), _page(text_box=[300, 200, 306, 210]))
+
+
+def test_size_change_or_visible_difference_detected(tmp_path):
+    detector = _detector(tmp_path)
+    assert not detector.is_unchanged(_page(), _page(size=(400, 320)))
+    assert not detector.is_unchanged(_page(), _page(noise=60))
+
+
+def test_baseline_round_trip(tmp_path):
+    """记录基线并保存后，下次运行可复用上次的区域；描述变化时不复用"""
+    screenshot = tmp_path / "case1.png"
+    marked = tmp_path / "case1_marked.png"
+    previous = _page()
+    screenshot.write_bytes(previous)
+    marked.write_bytes(previous)
+    regions = [ParameterRegion("金额", "input", BoundingBox(1, 2, 3, 4))]
+
+    detector = _detector(tmp_path)
+    detector.record("1", sha256_bytes(previous), "描述", str(marked), regions, 2.5, 0.5)
+    detector.save()
+
+    detector = _detector(tmp_path)
+    assert detector.load_previous("1", "新描述", str(screenshot)) is None
+    loaded = detector.load_previous("1", "描述", str(screenshot))
+    assert loaded == previous
+
+    entry = detector.check("1", loaded, _page(noise=10))
+    assert entry is not None
+    assert entry.regions == regions
+    assert detector.skipped == 1
+    assert detector.saved_seconds == 3.0
+    assert detector.check("1", loaded, _page(text_box=[300, 200, 306, 210])) is None
+
+
+def test_settings_change_prevents_reuse(tmp_path):
+    """标注或模型配置变化后，不再复用旧配置生成的区域与标注图"""
+    screenshot = tmp_path / "case1.png"
+    marked = tmp_path / "case1_marked.png"
+    screenshot.write_bytes(_page())
+    marked.write_bytes(_page())
+
+    detector = ChangeDetector(str(tmp_path / "baseline.json"), settings_fingerprint="line_width=2")
+    detector.record("1", sha256_bytes(_page()), "描述", str(marked), [], 1.0, 0.1)
+    detector.save()
+
+    same = ChangeDetector(str(tmp_path / "baseline.json"), settings_fingerprint="line_width=2")
+    assert same.load_previous("1", "描述", str(screenshot)) == _page()
+    changed = ChangeDetector(str(tmp_path / "baseline.json"), settings_fingerprint="line_width=4")
+    assert changed.load_previous("1", "描述", str(screenshot)) is None
+
+
+def test_disabled_by_default():
+    assert not ChangeDetectionConfig().enabled
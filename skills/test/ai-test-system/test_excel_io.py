@@ -0,0 +1,62 @@
+"""测试截图批量写回 Excel"""
+import os
+import sys
+
+from openpyxl import Workbook, load_workbook
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_test_system.excel_io import ScreenshotWriteBack
+
+
+def _make_workbook(tmp_path, count):
+    path = str(tmp_path / "cases.xlsx")
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "用例"
+    ws.append(["序号", "截图"])
+    for i in range(count):
+        ws.append([str(i + 1), None])
+    wb.save(path)
+
+    images = []
+    for i in range(count):
+        image_path = str(tmp_path / f"{i + 1}.png")
+        Image.new("RGB", (64, 48), (i * 40 % 256, 0, 0)).save(image_path)
+        images.append(image_path)
+    return path, images
+
+
+def _write_all(path, images, save_every):
+    write_back = ScreenshotWriteBack(path, "用例", "序号", "截图", save_every=save_every)
+    for i, image_path in enumerate(images):
+        write_back.add(str(i + 1), image_path)
+    write_back.close()
+    return write_back
+
+
+def test_repeated_saves_on_workbook_with_images(tmp_path):
+    """工作簿中已有上次运行的截图时，多次 checkpoint 保存不应失败"""
+    path, images = _make_workbook(tmp_path, 5)
+    _write_all(path, images, save_every=2)
+
+    # 第二次运行：替换前两条截图后保存，其余旧图片需在后续保存中保持可写
+    write_back = ScreenshotWriteBack(path, "用例", "序号", "截图", save_every=1)
+    write_back.add("1", images[0])
+    write_back.add("2", images[1])
+    write_back.close()
+
+    assert write_back.save_count == 2
+    assert len(load_workbook(path)["用例"]._images) == 5
+    assert not os.path.exists(str(tmp_path / "cases.saving.xlsx"))
+
+
+def test_rerun_replaces_images(tmp_path):
+    """重复运行时替换同一单元格的旧截图，而不是叠加"""
+    path, images = _make_workbook(tmp_path, 3)
+    _write_all(path, images, save_every=1)
+    write_back = _write_all(path, images, save_every=1)
+
+    assert write_back.save_count == 3
+    assert len(load_workbook(path)["用例"]._images) == 3
@@ -0,0 +1,48 @@
+"""测试只读文件头获取图片尺寸"""
+import io
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_test_system.image_meta import image_size
+
+
+def _encode(fmt, size=(321, 123), **options):
+    buf = io.BytesIO()
+    Image.new("RGB", size, (10, 120, 200)).save(buf, fmt, **options)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize(
+    "fmt, options",
+    [
+        ("PNG", {}),
+        ("JPEG", {}),
+        ("JPEG", {"progressive": True}),
+        # EXIF 段位于 SOF 之前，需要跳过
+        ("JPEG", {"exif": b"Exif\x00\x00" + b"\x00" * 64}),
+        ("WEBP", {}),
+    ],
+)
+def test_size_from_bytes_and_file(tmp_path, fmt, options):
+    data = _encode(fmt, **options)
+    path = tmp_path / f"image.{fmt.lower()}"
+    path.write_bytes(data)
+
+    assert image_size(data=data) == (321, 123)
+    assert image_size(str(path)) == (321, 123)
+
+
+def test_png_read_from_header_only(tmp_path):
+    """PNG 只读取文件头，像素数据损坏也不影响"""
+    data = _encode("PNG", size=(1920, 1080))
+    truncated = data[:64]
+    path = tmp_path / "truncated.png"
+    path.write_bytes(truncated)
+
+    assert image_size(data=truncated) == (1920, 1080)
+    assert image_size(str(path)) == (1920, 1080)
@@ -0,0 +1,109 @@
+"""测试推理结果缓存"""
+import io
+import itertools
+import os
+import sys
+import types
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_test_system import inference_cache
+from ai_test_system.case_model import BoundingBox, ModelResponse
+from ai_test_system.config_loader import VisionModelConfig
+from ai_test_system.inference_cache import InferenceCache
+
+
+def _png(shade=0, dot=None):
+    img = Image.new("RGB", (320, 200), "white")
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([20, 20, 150, 90], fill=(shade, shade, 200))
+    draw.rectangle([180, 110, 300, 180], fill=(0, 160, 0))
+    if dot is not None:
+        img.putpixel(dot, (0, 0, 0))
+    buf = io.BytesIO()
+    img.save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _response(x):
+    return ModelResponse(input_regions=[BoundingBox(x, 0, x + 10, 10)], output_regions=[])
+
+
+def _fake_clock(monkeypatch):
+    # 每次调用递增 1 秒，保证最近使用时间严格有序
+    ticks = itertools.count(1)
+    monkeypatch.setattr(inference_cache, "time", types.SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def test_exact_hit_persists_across_instances(tmp_path):
+    """同一截图同一描述命中缓存，重新打开缓存文件后仍可命中"""
+    path = str(tmp_path / "cache.sqlite")
+    cache = InferenceCache(path)
+    fp = cache.fingerprint(_png(), "登录页")
+    assert cache.get(fp) is None
+    cache.put(fp, _response(5))
+    cache.close()
+
+    cache = InferenceCache(path)
+    assert cache.get(cache.fingerprint(_png(), "登录页")).input_regions[0].x1 == 5
+    assert cache.get(cache.fingerprint(_png(), "首页")) is None
+    assert (cache.exact_hits, cache.misses) == (1, 1)
+    cache.close()
+
+
+def test_lru_evicts_least_recently_used(tmp_path, monkeypatch):
+    """超过 max_entries 时淘汰最久未使用的条目，刚被读取过的条目保留"""
+    _fake_clock(monkeypatch)
+    cache = InferenceCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    fps = [cache.fingerprint(_png(shade), "p") for shade in (0, 60, 120)]
+    cache.put(fps[0], _response(0))
+    cache.put(fps[1], _response(1))
+    assert cache.get(fps[0]) is not None  # fps[0] 变为最近使用
+    cache.put(fps[2], _response(2))
+
+    assert cache.get(fps[1]) is None
+    assert cache.get(fps[0]) is not None
+    assert cache.get(fps[2]) is not None
+    assert "缓存条目 2" in cache.summary()
+    cache.close()
+
+
+def test_near_duplicate_matches_within_distance(tmp_path):
+    """开启近似匹配时，同一描述下仅有细微差异的截图复用结果；描述不同或页面不同则不命中"""
+    cache = InferenceCache(str(tmp_path / "cache.sqlite"), near_duplicate_distance=4)
+    cache.put(cache.fingerprint(_png(), "p"), _response(7))
+
+    near = cache.get(cache.fingerprint(_png(dot=(250, 40)), "p"))
+    assert near is not None and near.input_regions[0].x1 == 7
+    assert cache.near_hits == 1
+
+    assert cache.get(cache.fingerprint(_png(dot=(250, 40)), "other")) is None
+    different = Image.new("RGB", (320, 200), "black")
+    ImageDraw.Draw(different).rectangle([0, 100, 320, 200], fill="white")
+    buf = io.BytesIO()
+    different.save(buf, "PNG")
+    assert cache.get(cache.fingerprint(buf.getvalue(), "p")) is None
+    cache.close()
+
+
+def test_near_duplicate_disabled_by_default(tmp_path):
+    """未开启近似匹配时只做精确匹配"""
+    cache = InferenceCache(str(tmp_path / "cache.sqlite"))
+    cache.put(cache.fingerprint(_png(), "p"), _response(1))
+    assert cache.get(cache.fingerprint(_png(dot=(250, 40)), "p")) is None
+    cache.close()
+
+
+def test_namespace_separates_model_versions(tmp_path):
+    """模型地址或 cache_version 不同的结果互不复用；缓存默认关闭"""
+    path = str(tmp_path / "cache.sqlite")
+    old = InferenceCache(path, namespace="http://model/predict\0v1")
+    old.put(old.fingerprint(_png(), "p"), _response(1))
+    old.close()
+
+    new = InferenceCache(path, namespace="http://model/predict\0v2")
+    assert new.get(new.fingerprint(_png(), "p")) is None
+    new.close()
+    assert not VisionModelConfig(provider="", endpoint="").cache_enabled
@@ -29,6 +29,16 @@ def test_module_imports():
         "ai_test_system.locator_service",
         "ai_test_system.screenshot_captor",
         "ai_test_system.vision_model_client",
+        "ai_test_system.browser_pool",
+        "ai_test_system.stage_runner",
+        "ai_test_system.image_hash",
+        "ai_test_system.inference_cache",
+        "ai_test_system.async_vision_client",
+        "ai_test_system.stub_model_server",
+        "ai_test_system.page_readiness",
+        "ai_test_system.change_detector",
+        "ai_test_system.image_meta",
+        "ai_test_system.tracing",
     ]
     
     results = []
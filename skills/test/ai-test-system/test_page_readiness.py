@@ -0,0 +1,120 @@
+"""测试页面就绪策略解析"""
+import os
+import sys
+import time
+import types
+
+import pytest
+from selenium.common.exceptions import JavascriptException, WebDriverException
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_test_system.page_readiness import PageReadiness, ReadinessStep, parse_readiness
+from ai_test_system.screenshot_captor import ScreenshotCaptor
+
+
+def test_parse_steps_and_aliases():
+    """多个条件用分号分隔（含中文分号、中文冒号），支持中文别名"""
+    assert parse_readiness(None) == []
+    assert parse_readiness("  ") == []
+    assert parse_readiness("network_idle") == [ReadinessStep("network_idle")]
+    assert parse_readiness("selector:#grid .row; 网络空闲:300") == [
+        ReadinessStep("selector", "#grid .row"),
+        ReadinessStep("network_idle", "300"),
+    ]
+    assert parse_readiness("元素：.toolbar；DOM稳定") == [
+        ReadinessStep("selector", ".toolbar"),
+        ReadinessStep("dom_quiet"),
+    ]
+    # XPath 中的冒号属于表达式本身
+    assert parse_readiness("xpath://div[@id='a']") == [ReadinessStep("xpath", "//div[@id='a']")]
+
+
+@pytest.mark.parametrize("spec", ["unknown", "selector", "xpath:", "network_idle:abc", "dom_quiet:1.5"])
+def test_parse_rejects_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_readiness(spec)
+
+
+def test_steps_for_falls_back_to_default():
+    """用例未指定或写错时使用默认策略"""
+    readiness = PageReadiness(default="dom_quiet:200")
+    assert readiness.steps_for("") == [ReadinessStep("dom_quiet", "200")]
+    assert readiness.steps_for("bogus") == [ReadinessStep("dom_quiet", "200")]
+    assert readiness.steps_for("selector:#main") == [ReadinessStep("selector", "#main")]
+    assert PageReadiness(default="").default_steps == [ReadinessStep("load")]
+
+
+def test_network_events_track_inflight_requests():
+    """根据 DevTools Network 事件维护在途请求集合"""
+
+    def entry(method, request_id):
+        return {"message": '{"message": {"method": "%s", "params": {"requestId": "%s"}}}' % (method, request_id)}
+
+    inflight = set()
+    assert PageReadiness._apply_network_events(
+        [entry("Network.requestWillBeSent", "1"), entry("Network.requestWillBeSent", "2")], inflight
+    )
+    assert inflight == {"1", "2"}
+    assert PageReadiness._apply_network_events(
+        [entry("Network.loadingFinished", "1"), entry("Network.loadingFailed", "2")], inflight
+    )
+    assert inflight == set()
+    assert not PageReadiness._apply_network_events([entry("Page.frameNavigated", "3")], inflight)
+
+
+class BrokenPageDriver:
+    """页面加载失败、页面脚本无法执行的浏览器"""
+
+    def __init__(self):
+        self.timeouts = types.SimpleNamespace(script=30)
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def get(self, url):
+        raise WebDriverException("net::ERR_CONNECTION_REFUSED")
+
+    def execute_script(self, script, *args):
+        raise WebDriverException("no such window")
+
+    def execute_async_script(self, script, *args):
+        raise JavascriptException("document.documentElement is null")
+
+    def set_script_timeout(self, seconds):
+        self.timeouts.script = seconds
+
+    def get_log(self, log_type):
+        raise WebDriverException("log type 'performance' not found")
+
+    def get_screenshot_as_png(self):
+        return b"png"
+
+
+@pytest.mark.parametrize("spec", ["load", "dom_quiet", "network_idle", "load; dom_quiet"])
+def test_driver_errors_mark_step_timed_out(spec):
+    """就绪检查中的浏览器异常只记为该条件超时，不中断后续条件"""
+    driver = BrokenPageDriver()
+    readiness = PageReadiness(poll_interval=0.01)
+    steps = parse_readiness(spec)
+    result = readiness.wait(driver, steps, time.monotonic() + 0.5)
+    assert not result.ready
+    assert result.timed_out == [str(step) for step in steps]
+    # dom_quiet 临时调整的脚本超时已恢复
+    assert driver.timeouts.script == 30
+
+
+def test_capture_continues_when_page_and_readiness_fail(tmp_path):
+    """页面加载失败且就绪检查出错时仍然截图"""
+    captor = ScreenshotCaptor("chrome", "", 800, 600, 1, readiness=PageReadiness(default="dom_quiet"))
+    captor._driver = BrokenPageDriver()
+    path = str(tmp_path / "shot" / "case.png")
+    assert captor.capture_png("http://x/", path) == b"png"
+    assert os.path.exists(path)
+
+
+def test_network_log_only_when_network_idle_used():
+    assert not PageReadiness(default="load").network_log
+    assert PageReadiness(default="selector:#main; network_idle").network_log
+    assert PageReadiness(default="load", case_specs=[None, "bogus", "网络空闲:300"]).network_log
+    assert not PageReadiness(default="load", case_specs=[None, "dom_quiet"]).network_log
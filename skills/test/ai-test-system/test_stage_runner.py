@@ -0,0 +1,81 @@
+"""测试流水线阶段的关闭与背压"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_test_system.stage_runner import Stage, StageQueue, StageStats
+
+
+def _stage(name, workers, fn, inbox, outbox, errors):
+    stats = StageStats(name, workers)
+    return Stage(name, workers, fn, inbox, outbox, lambda job, e: errors.append((job, e)), stats).start()
+
+
+def test_close_drains_queue_before_exit():
+    """close() 前已入队的任务全部处理完，工作线程才退出"""
+    done, errors = [], []
+    lock = threading.Lock()
+
+    def slow_double(x):
+        time.sleep(0.005)
+        return x * 2
+
+    def collect(x):
+        with lock:
+            done.append(x)
+
+    inbox = StageQueue(50)
+    stage = _stage("double", 3, slow_double, inbox, collect, errors)
+    for i in range(40):
+        inbox.put(i)
+    stage.close()
+
+    assert sorted(done) == [i * 2 for i in range(40)]
+    assert errors == []
+    assert stage.stats.processed == 40
+    assert all(not t.is_alive() for t in stage._threads)
+
+
+def test_chained_stages_shut_down_in_order():
+    """上游关闭后再关闭下游，串联的阶段不丢任务；失败的任务交给 on_error"""
+    done, errors = [], []
+    second_inbox = StageQueue(2)
+    first_inbox = StageQueue(2)
+
+    def check(x):
+        if x % 5 == 0:
+            raise ValueError(x)
+        return x
+
+    second = _stage("second", 1, lambda x: x + 100, second_inbox, done.append, errors)
+    first = _stage("first", 2, check, first_inbox, second_inbox.put, errors)
+    for i in range(20):
+        first_inbox.put(i)
+    first.close()
+    second.close()
+
+    assert sorted(done) == [i + 100 for i in range(20) if i % 5]
+    assert sorted(job for job, _ in errors) == [0, 5, 10, 15]
+    assert first.stats.failed == 4
+    assert second.stats.processed == 16
+
+
+def test_full_queue_blocks_producer():
+    """下游处理不过来时队列写满，入队阻塞（背压）"""
+    stats = StageStats("sink", 1)
+    inbox = StageQueue(2, stats)
+    inbox.put(1)
+    inbox.put(2)
+
+    blocked = threading.Thread(target=inbox.put, args=(3,), daemon=True)
+    blocked.start()
+    blocked.join(0.1)
+    assert blocked.is_alive()
+
+    assert inbox.get() == 1
+    blocked.join(1)
+    assert not blocked.is_alive()
+    assert stats.max_queue_depth == 2
@@ -0,0 +1,77 @@
+"""测试阶段耗时追踪"""
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_test_system import tracing
+from ai_test_system.tracing import Tracer
+
+
+def _record(tracer, name, start_ns, end_ns, args=None):
+    tracer._events.append((name, "", start_ns, end_ns, threading.get_ident(), args))
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    with tracer.span("capture") as sp:
+        sp.set(bytes=1)
+    assert tracer._events == []
+    assert tracer.summary() == []
+
+
+def test_summary_percentiles_and_order():
+    """按 span 名称汇总次数、总耗时与分位数，按总耗时降序"""
+    tracer = Tracer()
+    for i in range(1, 21):
+        _record(tracer, "infer", 0, i * 1_000_000)  # 1ms ~ 20ms
+    _record(tracer, "mark", 0, 500_000_000)
+
+    rows = tracer.summary()
+    assert [row["name"] for row in rows] == ["mark", "infer"]
+    infer = rows[1]
+    assert infer["count"] == 20
+    assert infer["total_s"] == pytest.approx(0.21)
+    assert infer["avg_ms"] == pytest.approx(10.5)
+    assert infer["p50_ms"] == pytest.approx(11.0)
+    assert infer["p95_ms"] == pytest.approx(20.0)
+    assert infer["max_ms"] == pytest.approx(20.0)
+    assert "infer" in tracer.format_summary()
+
+
+def test_span_records_args_and_errors(tmp_path):
+    """span 记录参数与异常类型，导出为 Chrome trace 完整事件"""
+    tracer = Tracer()
+    tracer.enable()
+    with tracer.span("infer.http", images=2) as sp:
+        sp.set(bytes=10)
+    with pytest.raises(KeyError):
+        with tracer.span("mark.encode"):
+            raise KeyError("x")
+    tracer.disable()
+
+    path = str(tmp_path / "trace" / "trace.json")
+    tracer.export_chrome_trace(path)
+    with open(path, encoding="utf-8") as f:
+        events = json.load(f)["traceEvents"]
+
+    spans = {e["name"]: e for e in events if e["ph"] == "X"}
+    assert spans["infer.http"]["args"] == {"images": 2, "bytes": 10}
+    assert spans["infer.http"]["cat"] == "infer"
+    assert spans["mark.encode"]["args"] == {"error": "KeyError"}
+    assert any(e["ph"] == "M" and e["name"] == "thread_name" for e in events)
+
+
+def test_module_span_uses_global_tracer(monkeypatch):
+    tracer = Tracer()
+    monkeypatch.setattr(tracing, "tracer", tracer)
+    with tracing.span("case"):
+        pass
+    tracer.enable()
+    with tracing.span("case", case_id="1"):
+        pass
+    assert [e[0] for e in tracer._events] == ["case"]
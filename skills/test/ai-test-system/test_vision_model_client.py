@@ -0,0 +1,131 @@
+"""测试视觉模型客户端的批量合并、逐张退化与退化规则"""
+import asyncio
+import io
+import os
+import sys
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_test_system.async_vision_client import AsyncVisionModelClient
+from ai_test_system.case_model import BoundingBox, ModelRequest, ModelResponse
+from ai_test_system.inference_cache import InferenceCache
+from ai_test_system.stub_model_server import StubModelBehavior, StubModelServer
+from ai_test_system.vision_model_client import VisionModelClient, _MicroBatcher
+
+
+def _png(width=200, height=100):
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), "white").save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _requests(count):
+    return [ModelRequest(image_path=f"case_{i}.png", prompt=f"p{i}", image_bytes=_png()) for i in range(count)]
+
+
+@pytest.fixture
+def server():
+    server = StubModelServer(behavior=StubModelBehavior(overhead_ms=0, per_image_ms=0, slots=4)).start()
+    yield server
+    server.stop()
+
+
+def _client(server, **kwargs):
+    return VisionModelClient(endpoint=server.endpoint, batch_endpoint=server.batch_endpoint, **kwargs)
+
+
+def test_batch_results_keep_request_order(server, tmp_path):
+    """一次批量请求的结果按请求顺序对应，并写入缓存"""
+    cache = InferenceCache(str(tmp_path / "cache.sqlite"))
+    client = _client(server, batch_size=4, cache=cache)
+    responses = client.infer_batch(_requests(4))
+
+    # 桩服务第 i 张图的输入区域 x1 为 40 + 10 * i
+    assert [r.input_regions[0].x1 for r in responses] == [40, 50, 60, 70]
+    assert server.stats.requests == 1
+    assert client.infer_batch(_requests(4))[3].input_regions[0].x1 == 70
+    assert server.stats.requests == 1
+    client.close()
+    cache.close()
+
+
+def test_batch_404_falls_back_to_single_requests(server):
+    """服务端不支持批量时改为逐张请求，之后不再尝试批量"""
+    server.behavior.batch = False
+    client = _client(server, batch_size=3)
+    responses = client.call_many([(_png(), "a"), (_png(), "b"), (_png(), "c")])
+
+    assert client.batch_supported is False
+    assert all(r is not None for r in responses)
+    assert server.stats.requests == 3
+    client.call_many([(_png(), "d"), (_png(), "e")])
+    assert server.stats.requests == 5
+    client.close()
+
+
+def test_failed_batch_returns_fallback_regions():
+    """模型服务不可用时按截图尺寸返回退化区域，并保持批量模式"""
+    client = VisionModelClient(endpoint="http://127.0.0.1:9/predict", batch_size=2, connect_timeout_seconds=1)
+    responses = client.infer_batch(_requests(2))
+
+    assert client.parse_batch(500, None, 2) == [None, None]
+    assert client.batch_supported is True
+    assert [r.input_regions for r in responses] == [[BoundingBox(10, 5, 90, 45)]] * 2
+    assert [r.output_regions for r in responses] == [[BoundingBox(110, 55, 190, 95)]] * 2
+    client.close()
+
+
+def test_micro_batcher_merges_concurrent_submits():
+    """同时提交的请求合并为一次发送，各自拿到对应的结果"""
+    batches = []
+
+    def send(items):
+        batches.append(len(items))
+        return [ModelResponse(input_regions=[BoundingBox(len(b), 0, 1, 1)], output_regions=[]) for b, _ in items]
+
+    batcher = _MicroBatcher(send, batch_size=4, wait_seconds=0.5, max_in_flight=1)
+    futures = [batcher.submit(b"x" * (i + 1), "p") for i in range(4)]
+    results = [f.result(timeout=2) for f in futures]
+    batcher.close()
+
+    assert batches == [4]
+    assert [r.input_regions[0].x1 for r in results] == [1, 2, 3, 4]
+
+
+def test_micro_batcher_close_drains_pending():
+    """close() 不等待合并窗口结束，已排队的请求发送完成后才返回"""
+    release = threading.Event()
+
+    def send(items):
+        release.wait(2)
+        return [None] * len(items)
+
+    batcher = _MicroBatcher(send, batch_size=8, wait_seconds=5.0, max_in_flight=1)
+    futures = [batcher.submit(b"x", "p") for _ in range(3)]
+    threading.Timer(0.1, release.set).start()
+    start = time.monotonic()
+    batcher.close()
+
+    assert time.monotonic() - start < 2
+    assert all(f.done() and f.result() is None for f in futures)
+
+
+def test_async_client_batches_in_order(server, tmp_path):
+    cache = InferenceCache(str(tmp_path / "cache.sqlite"))
+    client = _client(server, batch_size=2, cache=cache)
+
+    async def run():
+        async with AsyncVisionModelClient(client) as async_client:
+            return await async_client.infer_batch(_requests(4))
+
+    responses = asyncio.run(run())
+    assert [r.input_regions[0].x1 for r in responses] == [40, 50, 40, 50]
+    assert server.stats.requests == 2
+    assert cache.summary().endswith("缓存条目 4")
+    client.close()
+    cache.close()